@@ -0,0 +1,337 @@
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Deque, Dict, Hashable, List, Optional
+
+from metrics import booking_admissions
+
+
+logger = logging.getLogger(__name__)
+
+
+# Assumed time a booking holds its browser until real bookings have been timed
+DEFAULT_HOLD_SECONDS = 90.0
+
+
+class AdmissionRejected(Exception):
+    """Raised when a booking cannot be admitted or queued; the message is meant for the user."""
+
+
+class AdmissionWithdrawn(AdmissionRejected):
+    """Raised to a queued booking whose user gave up on it, e.g. by cancelling; nothing to tell the user."""
+
+
+class Ticket:
+    """One user's place in the booking scheduler, queued or active."""
+
+    def __init__(self, user_id: Hashable, chat_id: int):
+        self.user_id = user_id
+        self.chat_id = chat_id
+        self.enqueued_at = time.monotonic()
+        self.admitted_at: Optional[float] = None
+        self.rejected: Optional[str] = None
+        self.withdrawn = False
+        # Set whenever the queue moves, including when this ticket is admitted or rejected
+        self.moved = asyncio.Event()
+
+
+class BookingScheduler:
+    """
+    Admission control for booking sessions, the flows that hold a browser.
+
+    At most max_active bookings hold a browser at once and each user has at
+    most one booking, active or queued. Further bookings wait in a queue
+    that is fair across chats: chats take turns, so a busy group chat cannot
+    starve everyone else. Waiting users are told their position and an ETA
+    based on how long recent bookings held their browser, and bookings
+    beyond max_queue are rejected straight away instead of piling up.
+    """
+
+    def __init__(self, max_active: int, max_queue: Optional[int] = None, update_interval: float = 20):
+        """
+        Args:
+            max_active: Bookings holding a browser at once, e.g. the number of browser sessions
+            max_queue: Bookings allowed to wait, defaults to BOOKING_QUEUE_SIZE or 10
+            update_interval: Minimum seconds between position messages to one user
+        """
+        self.max_active = max(1, max_active)
+        self.max_queue = max_queue if max_queue is not None else int(os.getenv("BOOKING_QUEUE_SIZE", 10))
+        self.update_interval = update_interval
+
+        self._active: Dict[Hashable, Ticket] = {}
+        # Chat -> its waiting tickets; chats are served in this order, round robin
+        self._waiting: "OrderedDict[int, Deque[Ticket]]" = OrderedDict()
+        self._queued_users: Dict[Hashable, Ticket] = {}
+        # Moving average of how long an admitted booking holds its browser
+        self.average_hold = DEFAULT_HOLD_SECONDS
+        self.admitted = 0
+        self.rejected = 0
+
+    @property
+    def active(self) -> int:
+        return len(self._active)
+
+    @property
+    def queued(self) -> int:
+        return len(self._queued_users)
+
+    def queue_order(self) -> List[Ticket]:
+        """Waiting tickets in the order they will be admitted: one per chat per round."""
+        order = []
+        queues = list(self._waiting.values())
+        for round_index in range(max((len(q) for q in queues), default=0)):
+            order.extend(q[round_index] for q in queues if round_index < len(q))
+        return order
+
+    def position(self, ticket: Ticket) -> int:
+        """1-based place of a waiting ticket in the queue."""
+        return self.queue_order().index(ticket) + 1
+
+    def eta(self, position: int) -> float:
+        """Estimated seconds until the ticket at a position is admitted."""
+        return position * self.average_hold / self.max_active
+
+    async def acquire(self, user_id: Hashable, chat_id: int,
+                      on_wait: Optional[Callable[[int, float], Awaitable[None]]] = None) -> Ticket:
+        """
+        Admit a booking, waiting in the queue if every slot is taken.
+
+        Args:
+            user_id: User making the booking, or another key owning it such as ("snipe", chat_id)
+            chat_id: Chat the booking runs in, the unit of fairness
+            on_wait: Coroutine function called with (position, ETA seconds) when the
+                booking is queued and as it moves up
+
+        Returns:
+            Ticket: The admitted ticket, to be passed to release()
+
+        Raises:
+            AdmissionRejected: If the user already has a booking, the queue is full,
+                or queued bookings were rejected on shutdown
+            AdmissionWithdrawn: If the queued booking was withdrawn
+        """
+        if user_id in self._active:
+            self._reject("You already have a booking in progress. Finish or cancel it first.")
+        if user_id in self._queued_users:
+            position = self.position(self._queued_users[user_id])
+            self._reject(f"⏳ You are already waiting in the booking queue (#{position}).")
+
+        ticket = Ticket(user_id, chat_id)
+        if len(self._active) < self.max_active and not self._queued_users:
+            self._admit(ticket)
+            booking_admissions.inc(result="immediate")
+            return ticket
+        if self.queued >= self.max_queue:
+            self._reject(f"⏳ <b>The bot is busy right now.</b>\n\n"
+                         f"{self.queued} bookings are already waiting. Please try again in a few minutes.")
+
+        self._waiting.setdefault(chat_id, deque()).append(ticket)
+        self._queued_users[user_id] = ticket
+        booking_admissions.inc(result="queued")
+        logger.info(f"🚦 Booking for chat {chat_id} queued at #{self.position(ticket)} "
+                    f"({self.active} active, {self.queued} waiting)")
+
+        try:
+            last_position, last_update = None, 0.0
+            while ticket.admitted_at is None:
+                if ticket.withdrawn:
+                    raise AdmissionWithdrawn("Booking withdrawn from the queue")
+                if ticket.rejected:
+                    raise AdmissionRejected(ticket.rejected)
+                position = self.position(ticket)
+                if on_wait is not None and position != last_position and (
+                        last_position is None or time.monotonic() - last_update >= self.update_interval):
+                    last_position, last_update = position, time.monotonic()
+                    try:
+                        await on_wait(position, self.eta(position))
+                    except Exception as e:
+                        logger.warning(f"⚠️ Failed to send queue position to chat {chat_id}: {e}")
+                    # The queue may have moved while the message was being sent
+                    continue
+                ticket.moved.clear()
+                await ticket.moved.wait()
+        except BaseException:
+            if ticket.admitted_at is not None:
+                # Admitted just as the caller gave up: pass the slot on
+                self.release(ticket)
+            else:
+                self._dequeue(ticket)
+            raise
+
+        logger.info(f"🚦 Booking for chat {chat_id} admitted after {ticket.admitted_at - ticket.enqueued_at:.0f}s in the queue")
+        return ticket
+
+    def release(self, ticket: Ticket) -> None:
+        """Free an admitted ticket's slot and admit the next waiting booking."""
+        if self._active.get(ticket.user_id) is not ticket:
+            return
+        del self._active[ticket.user_id]
+        held = time.monotonic() - ticket.admitted_at
+        self.average_hold = 0.8 * self.average_hold + 0.2 * held
+        self._admit_waiting()
+
+    def withdraw(self, user_id: Hashable) -> bool:
+        """
+        Take a user's booking out of the queue, e.g. when they cancel or start over.
+
+        The waiting acquire() raises AdmissionWithdrawn. An admitted booking is
+        left alone; its owner releases it.
+
+        Returns:
+            bool: Whether a queued booking was withdrawn
+        """
+        ticket = self._queued_users.get(user_id)
+        if ticket is None:
+            return False
+        ticket.withdrawn = True
+        self._dequeue(ticket)
+        ticket.moved.set()
+        logger.info(f"🚦 Booking for chat {ticket.chat_id} withdrawn from the queue")
+        return True
+
+    def reject_waiting(self, reason: str) -> int:
+        """
+        Reject every queued booking, e.g. on shutdown.
+
+        Returns:
+            int: Number of bookings rejected
+        """
+        tickets = list(self._queued_users.values())
+        for ticket in tickets:
+            ticket.rejected = reason
+            self._dequeue(ticket)
+            ticket.moved.set()
+        self.rejected += len(tickets)
+        booking_admissions.inc(len(tickets), result="rejected")
+        return len(tickets)
+
+    def _reject(self, reason: str) -> None:
+        self.rejected += 1
+        booking_admissions.inc(result="rejected")
+        raise AdmissionRejected(reason)
+
+    def _admit(self, ticket: Ticket) -> None:
+        ticket.admitted_at = time.monotonic()
+        self._active[ticket.user_id] = ticket
+        self.admitted += 1
+
+    def _dequeue(self, ticket: Ticket) -> None:
+        if self._queued_users.get(ticket.user_id) is ticket:
+            del self._queued_users[ticket.user_id]
+        queue = self._waiting.get(ticket.chat_id)
+        if queue is not None and ticket in queue:
+            queue.remove(ticket)
+            if not queue:
+                del self._waiting[ticket.chat_id]
+        self._notify_waiting()
+
+    def _admit_waiting(self) -> None:
+        while len(self._active) < self.max_active and self._waiting:
+            chat_id, queue = next(iter(self._waiting.items()))
+            ticket = queue.popleft()
+            # The chat goes to the back of the rotation
+            if queue:
+                self._waiting.move_to_end(chat_id)
+            else:
+                del self._waiting[chat_id]
+            del self._queued_users[ticket.user_id]
+            self._admit(ticket)
+            ticket.moved.set()
+        self._notify_waiting()
+
+    def _notify_waiting(self) -> None:
+        for ticket in self._queued_users.values():
+            ticket.moved.set()
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            'active': self.active,
+            'queued': self.queued,
+            'max_active': self.max_active,
+            'admitted': self.admitted,
+            'rejected': self.rejected,
+            'average_hold_seconds': round(self.average_hold, 1),
+        }
+
+
+class DriverReserve:
+    """
+    Drivers kept back from admitted bookings for lookups, which take a driver without admission.
+
+    Interactive lookups (/book cache misses, /find) always go first.
+    Background work (the month sweep, watch polls and cache revalidation)
+    takes a reserved driver only when no interactive lookup is waiting, and
+    at most size - 1 of them at once when the reserve has more than one
+    driver. A long sweep then cannot make a user's lookup wait for it.
+    """
+
+    def __init__(self, size: int):
+        """
+        Args:
+            size: Drivers in the reserve
+        """
+        self.size = max(1, size)
+        self.background_limit = max(1, self.size - 1)
+
+        self._cond = asyncio.Condition()
+        self._held = 0
+        self._background_held = 0
+        self._interactive_waiting = 0
+
+    async def acquire(self, background: bool = False, timeout: Optional[float] = None) -> None:
+        """
+        Wait for a reserved driver slot.
+
+        Args:
+            background: Whether this is background work, which yields to interactive lookups
+            timeout: Seconds to wait, None to wait indefinitely
+
+        Raises:
+            asyncio.TimeoutError: If no slot became free in time
+        """
+        async with self._cond:
+            if not background:
+                self._interactive_waiting += 1
+            try:
+                await asyncio.wait_for(self._cond.wait_for(lambda: self._available(background)), timeout)
+            finally:
+                if not background:
+                    self._interactive_waiting -= 1
+                    # Background work may have been waiting behind this lookup
+                    self._cond.notify_all()
+            self._held += 1
+            if background:
+                self._background_held += 1
+
+    async def release(self, background: bool = False) -> None:
+        """Free a slot taken with acquire(), with the same background flag."""
+        async with self._cond:
+            self._held -= 1
+            if background:
+                self._background_held -= 1
+            self._cond.notify_all()
+
+    @asynccontextmanager
+    async def hold(self, background: bool = False, timeout: Optional[float] = None) -> AsyncIterator[None]:
+        """acquire() and release() around a block."""
+        await self.acquire(background, timeout)
+        try:
+            yield
+        finally:
+            await self.release(background)
+
+    def _available(self, background: bool) -> bool:
+        if self._held >= self.size:
+            return False
+        return not background or (self._interactive_waiting == 0 and self._background_held < self.background_limit)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'size': self.size,
+            'held': self._held,
+            'background_held': self._background_held,
+            'interactive_waiting': self._interactive_waiting,
+        }
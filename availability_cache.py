@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+
+class AvailabilityCache:
+    """
+    TTL cache of scraped time slots, keyed by booking date.
+
+    Entries younger than ttl are served as-is. Entries older than ttl but
+    younger than max_stale are still served immediately, while a background
+    revalidation refreshes them (stale-while-revalidate). The cache holds
+    at most max_entries dates and evicts the least recently used one.
+    """
+
+    def __init__(self,
+                 fetch: Callable[[Any], Awaitable[Optional[List[Dict]]]],
+                 ttl: Optional[float] = None,
+                 max_stale: Optional[float] = None,
+                 max_entries: Optional[int] = None):
+        """
+        Args:
+            fetch: Coroutine function scraping slots for a key, used for revalidation
+            ttl: Seconds an entry is considered fresh, defaults to AVAILABILITY_TTL_SECONDS or 60
+            max_stale: Seconds an entry may still be served while revalidating,
+                defaults to AVAILABILITY_MAX_STALE_SECONDS or 300
+            max_entries: Maximum cached dates, defaults to AVAILABILITY_CACHE_SIZE or 62
+        """
+        self.fetch = fetch
+        self.ttl = ttl if ttl is not None else float(os.getenv("AVAILABILITY_TTL_SECONDS", 60))
+        self.max_stale = max_stale if max_stale is not None else float(os.getenv("AVAILABILITY_MAX_STALE_SECONDS", 300))
+        self.max_entries = max_entries or int(os.getenv("AVAILABILITY_CACHE_SIZE", 62))
+
+        self._entries: "OrderedDict[Any, Tuple[float, List[Dict]]]" = OrderedDict()
+        self._revalidating: Set[Any] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key) -> Optional[Tuple[List[Dict], float]]:
+        """
+        Look up cached slots, scheduling a background refresh if they are stale.
+
+        Args:
+            key: Booking date
+
+        Returns:
+            Tuple[List[Dict], float]: Slots and their age in seconds, or None on a miss
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        stored_at, slots = entry
+        age = time.monotonic() - stored_at
+        if age > self.max_stale:
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        if age > self.ttl:
+            self.stale_hits += 1
+            self.revalidate(key)
+        else:
+            self.hits += 1
+        return slots, age
+
+    def put(self, key, slots: Optional[List[Dict]]) -> None:
+        """Store freshly scraped slots; empty results are not cached."""
+        if not slots:
+            return
+        self._entries[key] = (time.monotonic(), slots)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key) -> None:
+        """Drop a date, e.g. after a booking for it was submitted."""
+        self._entries.pop(key, None)
+
+    def revalidate(self, key) -> None:
+        """Refresh a date in the background unless a refresh is already running."""
+        if key in self._revalidating:
+            return
+        self._revalidating.add(key)
+        task = asyncio.get_running_loop().create_task(self._revalidate(key))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _revalidate(self, key) -> None:
+        try:
+            slots = await self.fetch(key)
+            self.put(key, slots)
+        except Exception as e:
+            logger.warning(f"⚠️ Background revalidation for {key} failed: {e}")
+        finally:
+            self._revalidating.discard(key)
+
+    def stats(self) -> Dict[str, int]:
+        """Cache counters for logging and health endpoints."""
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'revalidating': len(self._revalidating),
+        }
+
+
+def format_age(age: float) -> str:
+    """Human readable data age for the slot list message."""
+    if age < 5:
+        return "just now"
+    if age < 60:
+        return f"{int(age)}s ago"
+    return f"{int(age // 60)} min ago"
@@ -0,0 +1,355 @@
+"""
+Offline benchmark of the Selenium booking flow.
+
+Serves the static replica in fixtures/replica from a local HTTP server and runs
+the real service functions against it in headless Chromium. For every stage it
+reports the median wall time, WebDriver round trips and peak Chromium memory,
+and compares them with a stored baseline so regressions fail the run.
+
+Usage:
+    python benchmark.py --runs 5
+    python benchmark.py --runs 5 --save-baseline
+    python benchmark.py --slots-ms 1200 --no-compare
+    python benchmark.py --profile-cache --url "$BOOKING_URL"
+"""
+import argparse
+import functools
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlencode
+
+import service
+from browser_profile import ProfileStore
+from procstats import drivers_rss, format_bytes
+from waits import mark_time_picker_stale
+
+
+REPLICA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "replica")
+BASELINE_PATH = os.path.join(REPLICA_DIR, "baseline.json")
+
+# Render delays of the replica page (ms), see fixtures/replica/booking_page.html
+DEFAULT_DELAYS = {
+    'render_ms': 300,
+    'picker_ms': 250,
+    'slots_ms': 400,
+    'form_ms': 200,
+}
+
+# Wall time and memory may drift by this fraction before counting as a regression
+DEFAULT_TOLERANCE = 0.25
+# Wall time differences below this are noise, whatever the ratio (ms)
+WALL_TIME_SLACK_MS = 50
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, directory=REPLICA_DIR, **kwargs)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ReplicaServer:
+    """The replica page served from a background thread on a free local port."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self._server = ThreadingHTTPServer((host, port), _QuietHandler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def url(self, delays: Dict[str, int]) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/booking_page.html?{urlencode(delays)}"
+
+
+class RoundTripCounter:
+    """Counts WebDriver commands sent by one driver."""
+
+    def __init__(self, driver):
+        self.count = 0
+        execute = driver.command_executor.execute
+
+        @functools.wraps(execute)
+        def counting_execute(*args, **kwargs):
+            self.count += 1
+            return execute(*args, **kwargs)
+
+        driver.command_executor.execute = counting_execute
+
+
+class PeakMemorySampler:
+    """Samples the RSS of a driver's process tree in the background and keeps the peak."""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.driver = None
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def reset(self) -> int:
+        """Return the peak since the last reset and start a new measurement."""
+        peak, self.peak = self.peak, self.sample()
+        return max(peak, self.peak)
+
+    def sample(self) -> int:
+        if self.driver is None:
+            return 0
+        return drivers_rss([self.driver])
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, self.sample())
+
+
+class StageRecorder:
+    """Times stages of one run and collects wall time, round trips and peak memory."""
+
+    def __init__(self, sampler: PeakMemorySampler):
+        self.sampler = sampler
+        self.counter: Optional[RoundTripCounter] = None
+        self.results: Dict[str, Dict[str, float]] = {}
+
+    def run(self, stage: str, func: Callable, *args, check_result: bool = True):
+        """Run one stage; a falsy result fails the run unless check_result is off."""
+        round_trips_before = self.counter.count if self.counter else 0
+        self.sampler.reset()
+        start = time.perf_counter()
+        result = func(*args)
+        wall_ms = (time.perf_counter() - start) * 1000
+        self.results[stage] = {
+            'wall_ms': round(wall_ms, 1),
+            'round_trips': (self.counter.count if self.counter else 0) - round_trips_before,
+            'peak_rss_mb': round(self.sampler.reset() / (1024 * 1024), 1),
+        }
+        if check_result and not result:
+            raise RuntimeError(f"Stage {stage} failed against the replica")
+        return result
+
+
+def run_once(url: str, day: int, other_day: int) -> Dict[str, Dict[str, float]]:
+    """
+    Drive the replica through the whole booking flow once.
+
+    Returns:
+        Dict[str, Dict[str, float]]: Measurements per stage
+    """
+    service.BOOKING_URL = url
+    sampler = PeakMemorySampler()
+    sampler.start()
+    recorder = StageRecorder(sampler)
+    driver = None
+    try:
+        driver = recorder.run('driver_start', service.initialize_driver)
+        sampler.driver = driver
+        recorder.counter = RoundTripCounter(driver)
+
+        # End to end lookup as the bot does it, then the same steps one by one
+        recorder.run('get_squash_court_times', service.get_squash_court_times, driver, day)
+        recorder.run('page_load', service.load_booking_page, driver, check_result=False)
+        recorder.run('squash_court_click', service.click_squash_court, driver)
+        recorder.run('date_selection', service.select_date, driver, day)
+        recorder.run('slot_extraction', service.read_time_slots, driver)
+
+        # In-page switch to another day, as BookingPageSession does
+        def switch_day():
+            mark_time_picker_stale(driver)
+            if not service.select_date(driver, other_day):
+                return None
+            return service.read_time_slots(driver, switched_date=True)
+        time_slots = recorder.run('date_switch', switch_day)
+
+        recorder.run('slot_click', service.select_and_click_timeslot, driver, time_slots, 1)
+        recorder.run('form_fill', service.fill_booking_form, driver)
+        recorder.run('form_submit', service.submit_booking_form, driver)
+    finally:
+        sampler.stop()
+        if driver is not None:
+            driver.quit()
+    return recorder.results
+
+
+def measure_profile_cache(url: str, day: int, runs: int) -> Dict[str, float]:
+    """
+    Time get_squash_court_times on a fresh profile and again on the same, now warm, profile.
+
+    Every run starts from an empty profile store, so the first lookup fills the
+    disk cache and the second one is what a recycled pool driver sees.
+
+    Returns:
+        Dict[str, float]: Median cold and warm wall time (ms)
+    """
+    service.BOOKING_URL = url
+    samples = {'cold_ms': [], 'warm_ms': []}
+    for index in range(runs):
+        with tempfile.TemporaryDirectory(prefix="benchmark-profiles-") as root:
+            store = ProfileStore(root=root, enabled=True)
+            for key in ('cold_ms', 'warm_ms'):
+                lease = store.acquire()
+                driver = service.initialize_driver(profile=lease)
+                try:
+                    started = time.perf_counter()
+                    service.get_squash_court_times(driver, day)
+                    samples[key].append((time.perf_counter() - started) * 1000)
+                finally:
+                    driver.quit()
+                    lease.release()
+        print(f"Profile cache run {index + 1}/{runs}: "
+              f"cold {samples['cold_ms'][-1]:.0f}ms, warm {samples['warm_ms'][-1]:.0f}ms")
+    return {key: round(statistics.median(values), 1) for key, values in samples.items()}
+
+
+def summarize(runs: List[Dict[str, Dict[str, float]]]) -> Dict[str, Dict[str, float]]:
+    """Median of every measurement across runs, keeping stage order."""
+    summary = {}
+    for stage in runs[0]:
+        samples = [run[stage] for run in runs if stage in run]
+        summary[stage] = {
+            key: round(statistics.median(sample[key] for sample in samples), 1)
+            for key in samples[0]
+        }
+    return summary
+
+
+def compare(summary: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """
+    List the measurements that regressed against the baseline.
+
+    Round trips are deterministic against the replica, so any increase counts.
+    """
+    regressions = []
+    for stage, current in summary.items():
+        base = baseline.get(stage)
+        if base is None:
+            continue
+        if (current['wall_ms'] > base['wall_ms'] * (1 + tolerance)
+                and current['wall_ms'] - base['wall_ms'] > WALL_TIME_SLACK_MS):
+            regressions.append(f"{stage}: wall time {base['wall_ms']:.0f}ms -> {current['wall_ms']:.0f}ms")
+        if current['round_trips'] > base['round_trips']:
+            regressions.append(f"{stage}: round trips {base['round_trips']:.0f} -> {current['round_trips']:.0f}")
+        if base['peak_rss_mb'] and current['peak_rss_mb'] > base['peak_rss_mb'] * (1 + tolerance):
+            regressions.append(f"{stage}: peak memory {base['peak_rss_mb']:.1f} MB -> {current['peak_rss_mb']:.1f} MB")
+    return regressions
+
+
+def format_table(summary: Dict[str, Dict[str, float]], baseline: Optional[Dict[str, Dict[str, float]]] = None) -> str:
+    lines = [f"{'stage':<24}{'wall':>10}{'trips':>8}{'peak rss':>12}{'baseline':>12}"]
+    for stage, result in summary.items():
+        base = (baseline or {}).get(stage)
+        base_text = f"{base['wall_ms']:.0f}ms" if base else "-"
+        lines.append(
+            f"{stage:<24}{result['wall_ms']:>8.0f}ms{result['round_trips']:>8.0f}"
+            f"{format_bytes(int(result['peak_rss_mb'] * 1024 * 1024)):>12}{base_text:>12}"
+        )
+    return "\n".join(lines)
+
+
+def load_baseline(path: str) -> Optional[dict]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_baseline(path: str, summary: Dict[str, Dict[str, float]], runs: int, delays: Dict[str, int]) -> None:
+    with open(path, "w") as f:
+        json.dump({
+            'recorded_at': datetime.now().isoformat(timespec='seconds'),
+            'runs': runs,
+            'delays': delays,
+            'stages': summary,
+        }, f, indent=2)
+        f.write("\n")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the booking flow against an offline replica of the Bookings page")
+    parser.add_argument("--runs", type=int, default=3, help="Full booking flows to run; medians are reported")
+    parser.add_argument("--day", type=int, default=2, help="Day opened first")
+    parser.add_argument("--other-day", type=int, default=3, help="Day switched to in-page")
+    for name, value in DEFAULT_DELAYS.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", dest=name, type=int, default=value,
+                            help=f"Replica render delay in ms (default {value})")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline file to compare with or save to")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--no-compare", action="store_true", help="Only report, never fail on regressions")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed wall time and memory growth as a fraction of the baseline")
+    parser.add_argument("--verbose", action="store_true", help="Show the service's debug logs")
+    parser.add_argument("--profile-cache", action="store_true",
+                        help="Compare get_squash_court_times on a cold and a warm browser profile instead")
+    parser.add_argument("--url", help="Page to run --profile-cache against instead of the replica, e.g. the live BOOKING_URL")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING, stream=sys.stdout)
+    delays = {name: getattr(args, name) for name in DEFAULT_DELAYS}
+
+    if args.profile_cache:
+        if args.url:
+            result = measure_profile_cache(args.url, args.day, args.runs)
+        else:
+            with ReplicaServer() as server:
+                result = measure_profile_cache(server.url(delays), args.day, args.runs)
+        saved = result['cold_ms'] - result['warm_ms']
+        print(f"get_squash_court_times: cold profile {result['cold_ms']:.0f}ms, "
+              f"warm profile {result['warm_ms']:.0f}ms ({saved:+.0f}ms saved)")
+        return 0
+
+    runs = []
+    with ReplicaServer() as server:
+        url = server.url(delays)
+        for index in range(args.runs):
+            print(f"Run {index + 1}/{args.runs} against {url}")
+            runs.append(run_once(url, args.day, args.other_day))
+    summary = summarize(runs)
+
+    baseline = load_baseline(args.baseline)
+    if baseline is not None and baseline.get('delays') != delays:
+        print(f"Baseline was recorded with delays {baseline.get('delays')}, not comparing")
+        baseline = None
+    baseline_stages = baseline['stages'] if baseline else None
+    print(format_table(summary, baseline_stages))
+
+    if args.save_baseline:
+        save_baseline(args.baseline, summary, args.runs, delays)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if baseline_stages and not args.no_compare:
+        regressions = compare(summary, baseline_stages, args.tolerance)
+        if regressions:
+            print("Regressions against the baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print("No regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
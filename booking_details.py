@@ -0,0 +1,13 @@
+# Customer details shared by both booking engines. Kept apart from service.py so
+# the HTTP engine can read them without importing selenium.
+
+# Default user data for form filling
+default_user_data = {
+    'first_and_surname': 'Oleksii Matiunin',
+    'email': 'matalexnin@gmail.com',
+    'address': '78 Curzon street, Reading, UK',
+    'phone_number': '07423624106',
+    'special_requests': 'Automated booking via Telegram bot',
+    'membership_number': '8060',
+    'opponent_name': '-'
+}
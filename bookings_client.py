@@ -0,0 +1,286 @@
+import asyncio
+import logging
+import os
+import re
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+import aiohttp
+
+
+logger = logging.getLogger(__name__)
+
+
+# JSON endpoints of the business mailbox the public Bookings page is assumed to use.
+# The paths and payload shapes have only been run against bookings_stub.py and its
+# fixtures, not against the live site, so treat BOOKING_ENGINE=http as unverified.
+# Override BOOKINGS_API_BASE to point the client at bookings_stub.py for offline runs.
+BOOKINGS_API_BASE = "https://outlook.office365.com"
+BOOKINGS_MAILBOX = "CaversamParkVillageAssociationMilestoneCentre@cpva.org.uk"
+BOOKINGS_SERVICE_PATH = "/owa/calendar/{mailbox}/bookings/service.svc"
+
+GET_BUSINESS_ENDPOINT = "GetBookingBusiness"
+GET_AVAILABILITY_ENDPOINT = "GetStaffBookability"
+CREATE_BOOKING_ENDPOINT = "AppointmentBooking"
+
+DEFAULT_TIME_ZONE = "GMT Standard Time"
+
+
+class BookingsApiError(Exception):
+    """Raised when the Bookings endpoint returns an error or an unexpected payload."""
+
+
+def parse_duration(value: str, default: timedelta = timedelta(minutes=45)) -> timedelta:
+    """
+    Parse an ISO 8601 duration such as "PT45M" or "PT1H30M".
+
+    Args:
+        value: Duration string from the service definition
+        default: Duration used when the value is missing or malformed
+
+    Returns:
+        timedelta: Parsed duration
+    """
+    match = re.fullmatch(r"P(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)", value or "")
+    if not match or not any(match.groups()):
+        return default
+    hours, minutes, seconds = (int(part or 0) for part in match.groups())
+    return timedelta(hours=hours, minutes=minutes, seconds=seconds)
+
+
+class BookingsHttpClient:
+    """
+    Browserless client for the Microsoft Bookings endpoints.
+
+    Fetches services and availability and creates bookings directly over
+    HTTP using one pooled aiohttp session, so no Chromium is needed. The
+    endpoint paths and JSON shapes are an unverified model of the real
+    service, exercised only against bookings_stub.py; every failure,
+    including timeouts and payloads of an unexpected shape, surfaces as
+    BookingsApiError.
+    Time slots are returned in the same shape as get_squash_court_times,
+    with the extra 'start', 'end', 'service_id' and 'staff_id' keys needed
+    to book them.
+    """
+
+    def __init__(self,
+                 base_url: Optional[str] = None,
+                 mailbox: Optional[str] = None,
+                 service_name: str = "Squash Court",
+                 time_zone: str = DEFAULT_TIME_ZONE,
+                 timeout: float = 15,
+                 max_connections: int = 10):
+        """
+        Args:
+            base_url: Scheme and host of the Bookings API, defaults to BOOKINGS_API_BASE
+            mailbox: Business mailbox the booking page belongs to
+            service_name: Name of the bookable service to look up
+            time_zone: Windows time zone name sent with availability and booking requests
+            timeout: Total request timeout in seconds
+            max_connections: Connection pool size of the shared session
+        """
+        self.base_url = (base_url or os.getenv("BOOKINGS_API_BASE", BOOKINGS_API_BASE)).rstrip("/")
+        self.mailbox = mailbox or os.getenv("BOOKINGS_MAILBOX", BOOKINGS_MAILBOX)
+        self.service_name = service_name
+        self.time_zone = time_zone
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.max_connections = max_connections
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._service: Optional[Dict] = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def _url(self, endpoint: str) -> str:
+        return self.base_url + BOOKINGS_SERVICE_PATH.format(mailbox=self.mailbox) + "/" + endpoint
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self.timeout,
+                headers={"Accept": "application/json", "Content-Type": "application/json"}
+            )
+        return self._session
+
+    async def close(self) -> None:
+        """Close the pooled session."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _post(self, endpoint: str, payload: Dict) -> Dict:
+        try:
+            async with self._get_session().post(self._url(endpoint), json=payload) as response:
+                if response.status >= 400:
+                    body = await response.text()
+                    raise BookingsApiError(f"{endpoint} returned HTTP {response.status}: {body[:200]}")
+                try:
+                    result = await response.json(content_type=None)
+                except ValueError as e:
+                    raise BookingsApiError(f"{endpoint} returned invalid JSON: {e}")
+        except asyncio.TimeoutError:
+            # aiohttp's ClientTimeout is not a ClientError
+            raise BookingsApiError(f"{endpoint} timed out after {self.timeout.total:g}s")
+        except aiohttp.ClientError as e:
+            raise BookingsApiError(f"{endpoint} request failed: {e}")
+        if not isinstance(result, dict):
+            raise BookingsApiError(f"{endpoint} returned {type(result).__name__} instead of an object")
+        return result
+
+    async def get_services(self) -> List[Dict]:
+        """
+        Fetch the bookable services of the business.
+
+        Returns:
+            List[Dict]: Service definitions as returned by the endpoint
+        """
+        business = await self._post(GET_BUSINESS_ENDPOINT, {"Mailbox": self.mailbox})
+        services = business.get("Services", [])
+        if not isinstance(services, list) or not all(isinstance(service, dict) for service in services):
+            raise BookingsApiError(f"{GET_BUSINESS_ENDPOINT} returned malformed Services")
+        return services
+
+    async def get_service(self) -> Dict:
+        """
+        Find the configured service (Squash Court), caching it for the client's lifetime.
+
+        Raises:
+            BookingsApiError: If the service does not exist
+        """
+        if self._service is None:
+            for service in await self.get_services():
+                if self.service_name.lower() in (service.get("Name") or "").lower():
+                    self._service = service
+                    break
+            else:
+                raise BookingsApiError(f"Service '{self.service_name}' not found")
+        return self._service
+
+    async def get_availability(self, start: date, end: date) -> Dict[date, List[Dict]]:
+        """
+        Fetch bookable slots for every day in [start, end] with one request.
+
+        Args:
+            start: First day to include
+            end: Last day to include
+
+        Returns:
+            Dict[date, List[Dict]]: Time slots per day, in get_squash_court_times format
+
+        Raises:
+            BookingsApiError: If a request fails or times out, or a payload is malformed
+        """
+        service = await self.get_service()
+        duration = parse_duration(service.get("DefaultDuration"))
+        if duration <= timedelta(0):
+            raise BookingsApiError(f"Service '{self.service_name}' has no duration")
+        payload = {
+            "ServiceId": service.get("Id"),
+            "StaffList": service.get("StaffMemberIds", []),
+            "Start": datetime.combine(start, datetime.min.time()).isoformat(),
+            "End": datetime.combine(end + timedelta(days=1), datetime.min.time()).isoformat(),
+            "TimeZone": self.time_zone,
+        }
+        response = await self._post(GET_AVAILABILITY_ENDPOINT, payload)
+
+        try:
+            slots_by_start = self._parse_bookability(response, service, duration, start, end)
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            raise BookingsApiError(f"{GET_AVAILABILITY_ENDPOINT} returned a malformed time block: {e!r}")
+
+        availability: Dict[date, List[Dict]] = {}
+        for slot_start in sorted(slots_by_start):
+            availability.setdefault(slot_start.date(), []).append(slots_by_start[slot_start])
+        return availability
+
+    @staticmethod
+    def _parse_bookability(response: Dict, service: Dict, duration: timedelta,
+                           start: date, end: date) -> Dict[datetime, Dict]:
+        """Split bookable time blocks into service-length slots within [start, end], by start time."""
+        slots_by_start: Dict[datetime, Dict] = {}
+        for staff in response.get("StaffBookabilities", []):
+            for block in staff.get("BookableTimeBlocks", []):
+                block_start = datetime.fromisoformat(block["Start"])
+                block_end = datetime.fromisoformat(block["End"])
+                slot_start = block_start
+                while slot_start + duration <= block_end:
+                    if start <= slot_start.date() <= end and slot_start not in slots_by_start:
+                        slots_by_start[slot_start] = {
+                            'text': slot_start.strftime("%H:%M"),
+                            'tag_name': 'li',
+                            'is_enabled': True,
+                            'is_displayed': True,
+                            'attributes': {},
+                            'start': slot_start.isoformat(),
+                            'end': (slot_start + duration).isoformat(),
+                            'service_id': service.get("Id"),
+                            'staff_id': staff.get("StaffId"),
+                        }
+                    slot_start += duration
+        return slots_by_start
+
+    async def get_time_slots(self, booking_date: date) -> Optional[List[Dict]]:
+        """
+        Fetch bookable slots for a single day.
+
+        Returns:
+            List[Dict]: Time slots, empty if the day has no availability
+
+        Raises:
+            BookingsApiError: If a request fails or times out, or a payload is malformed
+        """
+        availability = await self.get_availability(booking_date, booking_date)
+        return availability.get(booking_date, [])
+
+    async def create_booking(self, time_slot: Dict, user_data: Dict[str, str]) -> bool:
+        """
+        Book a slot returned by get_time_slots.
+
+        Args:
+            time_slot: Slot dict including 'start', 'end', 'service_id' and 'staff_id'
+            user_data: Customer details in the default_user_data format
+
+        Returns:
+            bool: True if the booking was created, False otherwise
+        """
+        try:
+            service = await self.get_service()
+            answers = []
+            for question in service.get("CustomQuestions", []):
+                text = (question.get("Text") or "").lower()
+                if "membership" in text:
+                    answers.append({"QuestionId": question.get("Id"), "Answer": user_data.get('membership_number', '')})
+                elif "opponent" in text:
+                    answers.append({"QuestionId": question.get("Id"), "Answer": user_data.get('opponent_name', '')})
+
+            payload = {
+                "ServiceId": time_slot.get('service_id'),
+                "StaffMemberIds": [time_slot.get('staff_id')],
+                "StartTime": {"DateTime": time_slot.get('start'), "TimeZone": self.time_zone},
+                "EndTime": {"DateTime": time_slot.get('end'), "TimeZone": self.time_zone},
+                "Customers": [{
+                    "Name": user_data.get('first_and_surname', ''),
+                    "EmailAddress": user_data.get('email', ''),
+                    "Phone": user_data.get('phone_number', ''),
+                    "Address": user_data.get('address', ''),
+                    "Notes": user_data.get('special_requests', ''),
+                    "CustomQuestionAnswers": answers,
+                }],
+            }
+            response = await self._post(CREATE_BOOKING_ENDPOINT, payload)
+        except (BookingsApiError, AttributeError, TypeError) as e:
+            logger.error(f"❌ Booking request failed: {e}")
+            return False
+
+        appointment_id = response.get("AppointmentId")
+        if appointment_id:
+            logger.info(f"✅ Booking created: {appointment_id}")
+            return True
+        logger.error(f"❌ Booking response had no appointment id: {response}")
+        return False
@@ -0,0 +1,113 @@
+"""
+Local stand-in for the Microsoft Bookings endpoints used by bookings_client.py.
+
+Replays the sample responses in fixtures/bookings so the HTTP engine can be
+exercised offline. The samples follow the endpoint paths and JSON shapes the
+client assumes; they were not captured from the live site, so a client that
+works against this stub is not proof that BOOKING_ENGINE=http works for real.
+Sample availability is shifted so that it starts today ("RecordedFrom" is the
+day the samples are anchored to).
+
+Usage:
+    python bookings_stub.py --port 8765
+    BOOKING_ENGINE=http BOOKINGS_API_BASE=http://localhost:8765 python main.py
+"""
+import argparse
+import asyncio
+import json
+import os
+from datetime import date, datetime
+
+from aiohttp import web
+
+from bookings_client import (
+    BOOKINGS_MAILBOX,
+    BOOKINGS_SERVICE_PATH,
+    GET_BUSINESS_ENDPOINT,
+    GET_AVAILABILITY_ENDPOINT,
+    CREATE_BOOKING_ENDPOINT,
+)
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "bookings")
+
+
+def load_fixture(name: str) -> dict:
+    with open(os.path.join(FIXTURES_DIR, f"{name}.json")) as f:
+        return json.load(f)
+
+
+def shift_availability(recording: dict, today: date) -> dict:
+    """Move every recorded time block so the recording starts today."""
+    recorded_from = date.fromisoformat(recording.get("RecordedFrom", today.isoformat()))
+    offset = today - recorded_from
+
+    shifted = []
+    for staff in recording.get("StaffBookabilities", []):
+        blocks = []
+        for block in staff.get("BookableTimeBlocks", []):
+            blocks.append({
+                "Start": (datetime.fromisoformat(block["Start"]) + offset).isoformat(),
+                "End": (datetime.fromisoformat(block["End"]) + offset).isoformat(),
+            })
+        shifted.append({"StaffId": staff.get("StaffId"), "BookableTimeBlocks": blocks})
+    return {"StaffBookabilities": shifted}
+
+
+def create_app(mailbox: str = BOOKINGS_MAILBOX, delay: float = 0.0) -> web.Application:
+    """
+    Build the stub application.
+
+    Args:
+        mailbox: Business mailbox used in the endpoint paths
+        delay: Artificial latency added to every response (seconds)
+    """
+    base_path = BOOKINGS_SERVICE_PATH.format(mailbox=mailbox)
+    business = load_fixture(GET_BUSINESS_ENDPOINT)
+    availability = load_fixture(GET_AVAILABILITY_ENDPOINT)
+    booking = load_fixture(CREATE_BOOKING_ENDPOINT)
+    bookings_made = []
+
+    async def respond(payload: dict) -> web.Response:
+        if delay:
+            await asyncio.sleep(delay)
+        return web.json_response(payload)
+
+    async def get_business(request: web.Request) -> web.Response:
+        return await respond(business)
+
+    async def get_availability(request: web.Request) -> web.Response:
+        body = await request.json()
+        start = datetime.fromisoformat(body["Start"])
+        end = datetime.fromisoformat(body["End"])
+        payload = shift_availability(availability, date.today())
+        # Only return blocks inside the requested window, like the real endpoint
+        for staff in payload["StaffBookabilities"]:
+            staff["BookableTimeBlocks"] = [
+                block for block in staff["BookableTimeBlocks"]
+                if datetime.fromisoformat(block["End"]) > start and datetime.fromisoformat(block["Start"]) < end
+            ]
+        return await respond(payload)
+
+    async def create_booking(request: web.Request) -> web.Response:
+        body = await request.json()
+        if not body.get("Customers"):
+            return web.json_response({"Error": "Customer details are required"}, status=400)
+        bookings_made.append(body)
+        return await respond(booking)
+
+    app = web.Application()
+    app["bookings_made"] = bookings_made
+    app.router.add_post(f"{base_path}/{GET_BUSINESS_ENDPOINT}", get_business)
+    app.router.add_post(f"{base_path}/{GET_AVAILABILITY_ENDPOINT}", get_availability)
+    app.router.add_post(f"{base_path}/{CREATE_BOOKING_ENDPOINT}", create_booking)
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay sample Microsoft Bookings responses locally")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0, help="Artificial latency per response in seconds")
+    args = parser.parse_args()
+    web.run_app(create_app(delay=args.delay), host=args.host, port=args.port)
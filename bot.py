@@ -1,5 +1,11 @@
+import asyncio
+import logging
 import sys
 import os
+import threading
+import time
+import aiohttp
+from datetime import date, datetime, timedelta
 from aiogram import Bot, Dispatcher, html
 from aiogram.filters import CommandStart, Command
 from aiogram.types import Message
@@ -8,14 +14,27 @@ from aiogram.enums import ParseMode
 from aiogram import F
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
+from aiogram.fsm.storage.base import StorageKey
 from aiogram.fsm.storage.memory import MemoryStorage
-from service import (
-    initialize_driver,
-    get_squash_court_times,
-    select_and_click_timeslot,
-    fill_booking_form,
-    submit_booking_form
-)
+from aiogram.methods import GetUpdates
+import browser_stack
+import startup_timing
+from workers import BrowserWorkerPool, WorkerQueueFull
+from driver_pool import DriverPool, DriverPoolExhausted
+from availability_cache import AvailabilityCache, format_age
+from prefetcher import MonthPrefetcher
+from bookings_client import BookingsHttpClient, BookingsApiError
+from session_registry import SessionRegistry
+from single_flight import SingleFlight
+from booking_details import default_user_data
+from admission import AdmissionRejected, AdmissionWithdrawn, BookingScheduler, DriverReserve
+from selector_cache import selector_cache
+from slot_finder import SlotFinder, parse_slot_time, parse_time_window
+from watcher import AvailabilityWatcher
+from tracing import current_trace_id, span, start_trace
+
+
+logger = logging.getLogger(__name__)
 
 
 class BookingStates(StatesGroup):
@@ -28,12 +47,64 @@ class TelegramBot:
         # Get token from environment variable
         self.token = os.getenv('TELEGRAM_BOT_TOKEN')
         if not self.token:
-            print("Error: TELEGRAM_BOT_TOKEN environment variable is not set")
+            logger.error("Error: TELEGRAM_BOT_TOKEN environment variable is not set")
             sys.exit(1)
         
+        self.bot = Bot(token=self.token, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+        
         # Use memory storage for FSM (Finite State Machine)
         storage = MemoryStorage()
         self.disp = Dispatcher(storage=storage)
+        
+        # "selenium" drives the booking page, "http" talks to the Bookings endpoints directly
+        self.engine = os.getenv("BOOKING_ENGINE", "selenium").lower()
+        self.http_client = BookingsHttpClient() if self.engine == "http" else None
+        
+        # Selenium calls are blocking, so they run on a dedicated worker pool
+        self.workers = BrowserWorkerPool()
+        # Warm Chromium sessions, checked out per booking
+        self.driver_pool = DriverPool()
+        # Drivers kept back from bookings for lookups and the month sweep, which take
+        # drivers without admission; user lookups go before background work
+        self.driver_reserve = DriverReserve(int(os.getenv("BOOKING_DRIVER_RESERVE", 2)))
+        # In-flight scrapes per date, shared by concurrent lookups of the same date
+        self.lookups = SingleFlight("availability")
+        # Recently scraped days, so /book can answer without a browser
+        self.availability = AvailabilityCache(fetch=self._poll_day)
+        # Periodic whole-month sweep feeding the availability cache
+        self.prefetcher = MonthPrefetcher(self.workers, self.driver_pool, self.availability,
+                                          reserve=self.driver_reserve)
+        # Browser sessions parked in FSM state, reaped when the chat goes idle
+        self.sessions = SessionRegistry()
+        # Bookings and snipers allowed to hold a browser at once, queued fairly across chats beyond that
+        self.admission = BookingScheduler(
+            max_active=int(os.getenv("BOOKING_MAX_ACTIVE", max(1, self.driver_pool.max_size - self.driver_reserve.size)))
+        )
+        # Admission tickets of open booking sessions, by id(session)
+        self._tickets = {}
+        # Earliest-slot search over several days in parallel; its lookups queue for reserved drivers
+        self.finder = SlotFinder(
+            lookup=self._scrape_day,
+            cache=self.availability,
+            concurrency=int(os.getenv("FIND_CONCURRENCY", self.workers.max_workers))
+        )
+        # Shared polling of watched dates, one lookup per date for all subscribers
+        self.watcher = AvailabilityWatcher(
+            lookup=self._poll_day,
+            cache=self.availability,
+            notify=self._notify_freed_slots
+        )
+        # Armed release-time bookings per chat: (task, cancel event, job)
+        self.snipes = {}
+        # Updates received on the webhook that are still being handled
+        self._webhook_tasks = set()
+        self._in_flight = 0
+        # Monotonic time Telegram last answered a poll, and whether the webhook is registered
+        self.last_poll_at = None
+        self.webhook_set = False
+        self.bot.session.middleware(self._track_polls)
+        self.disp.update.outer_middleware(self._track_in_flight)
+        self.disp.message.middleware(self._trace_handler)
         self.setup_handlers()
     
     def setup_handlers(self):
@@ -53,6 +124,12 @@ class TelegramBot:
                 "🌅 /tomorrow - Book a squash court for tomorrow\n"
                 "📆 /book [day] - Book a squash court for a specific day (1-31)\n"
                 "   Example: /book 15 (books for the 15th of current month)\n"
+                "🔎 /find [days] [window] - Earliest free slots over the next days\n"
+                "   Example: /find 7 evening or /find 3 18:00-21:00\n"
+                "🎯 /snipe [day] [slot] [release time] - Book a slot the moment it is released\n"
+                "   Example: /snipe 25 18:00 07:00, /snipe cancel to disarm\n"
+                "🔔 /watch [day] [window] - Get a message when a slot frees up\n"
+                "   Example: /watch 25 evening, /watch alone lists, /unwatch [day] stops\n"
                 "❓ /help - Show this help message\n\n"
                 "📝 <b>How it works:</b>\n"
                 "1. Choose a command (/today, /tomorrow, or /book [day])\n"
@@ -105,61 +182,79 @@ class TelegramBot:
                 )
                 return
             
+            try:
+                booking_date = date.today().replace(day=preferred_day)
+            except ValueError:
+                await message.answer(
+                    f"❌ <b>Invalid day!</b>\n\n"
+                    f"The current month has no day {preferred_day}."
+                )
+                return
+            
+            # Starting over gives up a place in the booking queue for the previous pick
+            self.admission.withdraw(message.from_user.id)
+            
+            # A chat that changes its mind keeps its browser session and switches day in-page
+            session = (await state.get_data()).get('session')
+            
+            # Serve recently scraped days straight from the availability cache
+            cached = self.availability.get(booking_date)
+            if cached:
+                time_slots, age = cached
+                if not await self._show_time_slots(message, state, preferred_day, time_slots, age=age, session=session):
+                    await message.answer("❌ No available time slots found for booking.")
+                    await self._release_session(session)
+                    await state.clear()
+                return
+            
             await message.answer(f"🎾 Starting squash court booking for day {preferred_day}...\n"
                                f"📅 Selected date: Day {preferred_day}\n"
                                f"🏟️ Court: Squash Court\n\n"
                                f"⏳ Please wait while I check available time slots...")
             
-            # Run the booking process in an executor to avoid blocking
+            if self.engine == "http":
+                try:
+                    time_slots = await self._scrape_day(booking_date)
+                except (BookingsApiError, aiohttp.ClientError) as e:
+                    await message.answer(f"❌ <b>Booking Error:</b>\n\n"
+                                       f"Could not load availability: {e}\n\n"
+                                       f"Please try again later.")
+                    return
+                self.availability.put(booking_date, time_slots)
+                if not time_slots or not await self._show_time_slots(message, state, preferred_day, time_slots, age=0):
+                    await message.answer("❌ No available time slots found for booking.")
+                return
+            
+            # Run the booking process on the browser workers to avoid blocking
             try:
-                # Step 1: Initialize the driver
-                driver = initialize_driver(headless=True)
+                if session is not None:
+                    # This chat already holds a browser: switch day within its page
+                    time_slots = await self.workers.run(session.get_times, preferred_day, timeout=25)
+                else:
+                    # Concurrent lookups of the same date share one pooled-driver scrape;
+                    # the chat waits for a browser of its own when it picks a slot
+                    time_slots = await self._scrape_day(booking_date)
+                self.availability.put(booking_date, time_slots)
                 
-                try:
-                    # Step 2: Get time slots for the selected day
-                    time_slots = get_squash_court_times(driver, preferred_day, timeout=25)
-                    
-                    if time_slots:
-                        # Step 3: Display available time slots
-                        slots_text = f"\n🕐 <b>Available Time Slots for Day {preferred_day}:</b>\n"
-                        available_slots = []
-                        
-                        for i, slot in enumerate(time_slots, 1):
-                            text = slot.get('text', '').strip()
-                            enabled = slot.get('is_enabled', False)
-                            displayed = slot.get('is_displayed', False)
-                            
-                            if text and enabled and displayed:
-                                available_slots.append((i, text, slot))
-                                slots_text += f"{i}. {text} ✅\n"
-                            else:
-                                slots_text += f"{i}. {text or 'No text'} ❌\n"
-                        
-                        if available_slots:
-                            slots_text += f"\n📝 Please reply with the number (1-{len(available_slots)}) of your preferred time slot or 'cancel' to exit."
-                            await message.answer(slots_text)
-                            
-                            # Store booking data in FSM context and wait for user input
-                            await state.update_data(
-                                driver=driver,
-                                time_slots=time_slots,
-                                preferred_day=preferred_day,
-                                available_slots=available_slots
-                            )
-                            await state.set_state(BookingStates.waiting_for_slot_selection)
-                            
-                        else:
-                            await message.answer("❌ No available time slots found for booking.")
-                            driver.quit()
-                    else:
-                        await message.answer("❌ Failed to retrieve time slots. Please try again later.")
-                        driver.quit()
-                        
-                except Exception as inner_e:
-                    await message.answer(f"❌ Error during time slot retrieval: {inner_e}")
-                    driver.quit()
+                if time_slots is not None:
+                    # Step 3: Display available time slots
+                    if not await self._show_time_slots(message, state, preferred_day, time_slots, age=0, session=session):
+                        await message.answer("❌ No available time slots found for booking.")
+                        await self._release_session(session)
+                        await state.clear()
+                else:
+                    await message.answer("❌ Failed to retrieve time slots. Please try again later.")
+                    await self._release_session(session)
+                    await state.clear()
                         
+            except (WorkerQueueFull, DriverPoolExhausted):
+                await message.answer("⏳ <b>The bot is busy right now.</b>\n\n"
+                                   "Too many bookings are in progress. Please try again in a minute.")
             except Exception as e:
+                if session is not None:
+                    # The parked page is in an unknown state
+                    await self._release_session(session, reusable=False)
+                    await state.clear()
                 error_message = str(e)
                 if "chromedriver" in error_message.lower():
                     await message.answer("❌ <b>Browser Error:</b>\n\n"
@@ -174,23 +269,179 @@ class TelegramBot:
                                        f"An error occurred during booking: {error_message}\n\n"
                                        f"Please try again later.")
         
+        @self.disp.message(Command("find"))
+        async def command_find_handler(message: Message):
+            usage = ("🔎 <b>Find Command Usage:</b>\n\n"
+                     "<code>/find [days] [window]</code>\n"
+                     "Days to search from today (default 7) and an optional time window: "
+                     "morning, afternoon, evening or e.g. 18:00-21:00.\n"
+                     "Example: <code>/find 7 evening</code>")
+            days = int(os.getenv("FIND_DEFAULT_DAYS", 7))
+            window = None
+            for part in (message.text or "").split()[1:]:
+                if part.isdigit():
+                    days = int(part)
+                    continue
+                try:
+                    window = parse_time_window(part)
+                except ValueError:
+                    await message.answer(usage)
+                    return
+            if not (1 <= days <= 31):
+                await message.answer(usage)
+                return
+            
+            # The date picker only shows the current month
+            start = date.today()
+            next_month = (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+            end = min(start + timedelta(days=days - 1), next_month - timedelta(days=1))
+            
+            await message.answer(f"🔎 Searching {start:%d %b} to {end:%d %b} for free slots...\n"
+                               f"⏳ This takes about as long as checking a single day.")
+            search = await self.finder.find(start, end, window)
+            await message.answer(self._format_search(search, window))
+        
+        @self.disp.message(Command("snipe"))
+        async def command_snipe_handler(message: Message):
+            chat_id = message.chat.id
+            parts = (message.text or "").split()[1:]
+            
+            if parts == ['cancel']:
+                armed = self.snipes.pop(chat_id, None)
+                if armed is None:
+                    await message.answer("❌ No sniper is armed for this chat.")
+                    return
+                task, cancel, job = armed
+                cancel.set()
+                task.cancel()
+                await message.answer(f"🛑 Sniper for day {job.preferred_day} at {job.slot_text} disarmed.")
+                return
+            
+            if self.engine != "selenium":
+                await message.answer("❌ Sniper mode needs the selenium booking engine.")
+                return
+            
+            usage = ("🎯 <b>Snipe Command Usage:</b>\n\n"
+                     "<code>/snipe [day] [slot] [release time]</code>\n"
+                     "Books the slot on that day as soon as it is released.\n"
+                     "Example: <code>/snipe 25 18:00 07:00</code>")
+            if len(parts) != 3 or not parts[0].isdigit() or parse_slot_time(parts[1]) is None:
+                await message.answer(usage)
+                return
+            preferred_day, slot_text = int(parts[0]), parts[1]
+            try:
+                booking_date = date.today().replace(day=preferred_day)
+                release_time = datetime.strptime(parts[2], "%H:%M:%S" if parts[2].count(":") == 2 else "%H:%M").time()
+            except ValueError:
+                await message.answer(usage)
+                return
+            if booking_date < date.today():
+                await message.answer("❌ That day has already passed this month.")
+                return
+            
+            if chat_id in self.snipes:
+                await message.answer("⏳ A sniper is already armed for this chat. Use /snipe cancel first.")
+                return
+            
+            release_at = datetime.combine(date.today(), release_time)
+            if release_at <= datetime.now():
+                release_at += timedelta(days=1)
+            await browser_stack.ready()
+            from sniper import SnipeJob
+            job = SnipeJob(self.driver_pool, booking_date, slot_text, release_at)
+            cancel = threading.Event()
+            task = asyncio.create_task(self._run_snipe(chat_id, job, cancel))
+            self.snipes[chat_id] = (task, cancel, job)
+            
+            warmup_at = release_at - timedelta(seconds=self._snipe_warmup_seconds())
+            await message.answer(f"🎯 <b>Sniper armed</b>\n\n"
+                               f"📅 Day {preferred_day}, ⏰ {slot_text}\n"
+                               f"🚀 Fires at {release_at:%H:%M:%S} {release_at:%d %b}, "
+                               f"browser warms up at {warmup_at:%H:%M:%S}\n\n"
+                               f"Use /snipe cancel to disarm.")
+        
+        @self.disp.message(Command("watch"))
+        async def command_watch_handler(message: Message):
+            chat_id = message.chat.id
+            parts = (message.text or "").split()[1:]
+            
+            if not parts:
+                subscriptions = self.watcher.subscriptions(chat_id)
+                if not subscriptions:
+                    await message.answer("🔔 You are not watching any day. Example: <code>/watch 25 evening</code>")
+                    return
+                lines = [f"• {s.day:%a %d %b}" + (f" {s.window[0]:%H:%M}-{s.window[1]:%H:%M}" if s.window else "")
+                         for s in subscriptions]
+                await message.answer("🔔 <b>Watching:</b>\n" + "\n".join(lines))
+                return
+            
+            usage = ("🔔 <b>Watch Command Usage:</b>\n\n"
+                     "<code>/watch [day] [window]</code>\n"
+                     "Sends a message when a slot frees up on that day, optionally only "
+                     "in a window: morning, afternoon, evening or e.g. 18:00-21:00.\n"
+                     "Example: <code>/watch 25 evening</code>")
+            try:
+                if not parts[0].isdigit() or len(parts) > 2:
+                    raise ValueError(parts)
+                watch_date = date.today().replace(day=int(parts[0]))
+                window = parse_time_window(parts[1]) if len(parts) == 2 else None
+            except ValueError:
+                await message.answer(usage)
+                return
+            if watch_date < date.today():
+                await message.answer("❌ That day has already passed this month.")
+                return
+            
+            max_per_chat = int(os.getenv("WATCH_MAX_PER_CHAT", 5))
+            watched_days = {s.day for s in self.watcher.subscriptions(chat_id)}
+            if watch_date not in watched_days and len(watched_days) >= max_per_chat:
+                await message.answer(f"❌ You can watch at most {max_per_chat} days. Use /unwatch [day] first.")
+                return
+            
+            subscription = self.watcher.subscribe(chat_id, watch_date, window)
+            window_text = f" between {window[0]:%H:%M} and {window[1]:%H:%M}" if window else ""
+            current = self.watcher.current_matches(subscription)
+            current_text = f"\n\n✅ Free right now: {', '.join(current)}" if current else ""
+            minutes = self.watcher.poll_interval(watch_date) / 60
+            await message.answer(f"🔔 Watching {watch_date:%a %d %b}{window_text}.\n"
+                               f"I'll check about every {minutes:.0f} min and message you when a slot frees up."
+                               f"{current_text}")
+        
+        @self.disp.message(Command("unwatch"))
+        async def command_unwatch_handler(message: Message):
+            parts = (message.text or "").split()[1:]
+            watch_date = None
+            if parts:
+                try:
+                    watch_date = date.today().replace(day=int(parts[0]))
+                except ValueError:
+                    await message.answer("❌ Usage: <code>/unwatch [day]</code>, or /unwatch to stop watching every day.")
+                    return
+            removed = self.watcher.unsubscribe(message.chat.id, watch_date)
+            if removed:
+                await message.answer(f"🔕 Stopped watching {watch_date:%a %d %b}." if watch_date else
+                                   f"🔕 Stopped watching {removed} day(s).")
+            else:
+                await message.answer("❌ You were not watching that day.")
+        
         # Handler for slot selection
         @self.disp.message(BookingStates.waiting_for_slot_selection)
         async def handle_slot_selection(message: Message, state: FSMContext):
             user_input = message.text.strip().lower()
+            self.sessions.touch((message.chat.id, message.from_user.id))
             
             # Handle cancel
             if user_input == 'cancel':
+                self.admission.withdraw(message.from_user.id)
                 data = await state.get_data()
-                if 'driver' in data:
-                    data['driver'].quit()
+                await self._release_session(data.get('session'))
                 await state.clear()
                 await message.answer("❌ Booking cancelled.")
                 return
             
             # Get stored data
             data = await state.get_data()
-            driver = data.get('driver')
+            session = data.get('session')
             time_slots = data.get('time_slots', [])
             preferred_day = data.get('preferred_day')
             available_slots = data.get('available_slots', [])
@@ -217,38 +468,94 @@ class TelegramBot:
                 await message.answer(f"🎯 Selected slot #{selected_slot_number}: {selected_available_slot[1]}\n"
                                    f"⏳ Processing your selection...")
                 
-                # Step 4: Click on the selected time slot
-                if select_and_click_timeslot(driver, time_slots, selected_slot_number, timeout=30):
-                    await message.answer("✅ Time slot successfully selected!")
+                # The HTTP engine needs no browser: go straight to confirmation
+                if self.engine == "http":
+                    await self._ask_confirmation(message, state, preferred_day, time_slots[selected_slot_number - 1])
+                    return
+                
+                # Slots served from the cache may have no browser on this day yet: open it now
+                if session is None or session.current_day != preferred_day:
+                    if session is None:
+                        try:
+                            session = await self._open_session(message)
+                        except (WorkerQueueFull, DriverPoolExhausted):
+                            await message.answer("⏳ <b>The bot is busy right now.</b>\n\n"
+                                               "Please send the slot number again in a minute.")
+                            return
+                        except AdmissionWithdrawn:
+                            # Cancelled or started over while queued; that handler has answered
+                            return
+                        except AdmissionRejected as e:
+                            await message.answer(str(e))
+                            return
+                        
+                        # The chat may have cancelled or picked another day while this one waited
+                        current = await state.get_data()
+                        if (await state.get_state() != BookingStates.waiting_for_slot_selection.state
+                                or current.get('listed_at') != data.get('listed_at')):
+                            await self._release_session(session)
+                            return
                     
-                    # Step 5: Fill the booking form
-                    if fill_booking_form(driver):
+                    try:
+                        fresh_slots = await self.workers.run(session.get_times, preferred_day, timeout=25)
+                    except Exception as e:
+                        # Closes the browser, whose page is in an unknown state, unless the job never ran
+                        await self._abort_booking(message, state, session, e)
+                        return
+                    if fresh_slots is None:
+                        await message.answer("❌ Failed to retrieve time slots. Please run /book again later.")
+                        await self._release_session(session, reusable=False)
+                        await state.clear()
+                        return
+                    booking_date = date.today().replace(day=preferred_day)
+                    self.availability.put(booking_date, fresh_slots)
+                    
+                    fresh_number = self._find_slot_number(fresh_slots, selected_available_slot[1])
+                    if fresh_number is None:
+                        await message.answer("❌ This time slot is no longer available. Please run /book again.")
+                        await self._release_session(session)
+                        await state.clear()
+                        return
+                    
+                    time_slots = fresh_slots
+                    selected_slot_number = fresh_number
+                    await state.update_data(session=session, time_slots=time_slots)
+                
+                # Steps 4 and 5 run in the parked browser; if one fails the booking ends there
+                try:
+                    # Step 4: Click on the selected time slot
+                    selected = await self.workers.run(session.select_slot, time_slots, selected_slot_number, timeout=30)
+                    if selected:
+                        await message.answer("✅ Time slot successfully selected!")
+                        
+                        # Step 5: Fill the booking form
+                        service = await browser_stack.ready()
+                        filled = await self.workers.run(service.fill_booking_form, session.driver)
+                    else:
+                        await message.answer("❌ Failed to select the time slot.")
+                        # Go back to the day's slot list within the same page instead of reloading
+                        fresh_slots = await self.workers.run(session.get_times, preferred_day, timeout=25)
+                except Exception as e:
+                    await self._abort_booking(message, state, session, e)
+                    return
+                
+                if selected:
+                    if filled:
                         await message.answer("✅ Booking form filled successfully!")
                         
                         # Step 6: Show confirmation and ask user
-                        selected_time_slot = time_slots[selected_slot_number - 1]
-                        
-                        confirmation_text = (
-                            f"🎾 <b>BOOKING CONFIRMATION</b>\n\n"
-                            f"📅 Date: Day {preferred_day} of current month\n"
-                            f"⏰ Time Slot: {selected_time_slot.get('text', 'Unknown time')}\n"
-                            f"🏟️ Court: Squash Court\n\n"
-                            f"✅ Please type 'confirm' to proceed with booking or 'cancel' to cancel."
-                        )
-                        await message.answer(confirmation_text)
-                        
-                        # Update state data and move to confirmation state
-                        await state.update_data(selected_time_slot=selected_time_slot)
-                        await state.set_state(BookingStates.waiting_for_confirmation)
+                        await self._ask_confirmation(message, state, preferred_day, time_slots[selected_slot_number - 1])
                         
                     else:
                         await message.answer("⚠️ Failed to fill booking form.")
-                        driver.quit()
+                        await self._release_session(session)
                         await state.clear()
                 else:
-                    await message.answer("❌ Failed to select the time slot.")
-                    driver.quit()
-                    await state.clear()
+                    self.availability.put(date.today().replace(day=preferred_day), fresh_slots)
+                    if not fresh_slots or not await self._show_time_slots(message, state, preferred_day, fresh_slots, age=0, session=session):
+                        await message.answer("❌ No other time slots are available. Please run /book again later.")
+                        await self._release_session(session)
+                        await state.clear()
                     
             except ValueError:
                 await message.answer(f"❌ Invalid input. Please enter a number between 1 and {len(available_slots)} or 'cancel' to exit.")
@@ -257,33 +564,418 @@ class TelegramBot:
         @self.disp.message(BookingStates.waiting_for_confirmation)
         async def handle_booking_confirmation(message: Message, state: FSMContext):
             user_input = message.text.strip().lower()
+            self.sessions.touch((message.chat.id, message.from_user.id))
             
             data = await state.get_data()
-            driver = data.get('driver')
+            session = data.get('session')
             preferred_day = data.get('preferred_day')
             
             if user_input == 'confirm':
                 await message.answer("🎾 Confirming your booking...")
                 
                 # Step 7: Submit the booking form
-                if submit_booking_form(driver):
+                try:
+                    if self.engine == "http":
+                        submitted = await self.http_client.create_booking(data.get('selected_time_slot'), default_user_data)
+                    else:
+                        service = await browser_stack.ready()
+                        submitted = await self.workers.run(service.submit_booking_form, session.driver)
+                except Exception as e:
+                    self.availability.invalidate(date.today().replace(day=preferred_day))
+                    await self._abort_booking(message, state, session, e, submitting=True)
+                    return
+                # Availability for this date has changed either way
+                self.availability.invalidate(date.today().replace(day=preferred_day))
+                if submitted:
                     await message.answer("🎉 <b>Booking completed successfully!</b>\n\n"
                                        f"Your squash court is booked for day {preferred_day}!")
                 else:
                     await message.answer("⚠️ Form was filled but submission may have failed.")
                 
-                driver.quit()
+                await self._release_session(session)
                 await state.clear()
                 
             elif user_input == 'cancel':
                 await message.answer("❌ Booking cancelled.")
-                driver.quit()
+                await self._release_session(session)
                 await state.clear()
             else:
                 await message.answer("❌ Invalid input. Please type 'confirm' to proceed or 'cancel' to cancel.")
     
+    @staticmethod
+    def _snipe_warmup_seconds() -> float:
+        return float(os.getenv("SNIPER_WARMUP_SECONDS", 180))
+    
+    async def _run_snipe(self, chat_id: int, job, cancel: threading.Event):
+        """Wait for the warm-up time, run the sniper on its own thread and report the result"""
+        try:
+            delay = job.release_at.timestamp() - self._snipe_warmup_seconds() - time.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            # The sniper holds its browser like a booking does, so it is admitted like one;
+            # it queues under its own key so the chat can still /book meanwhile
+            ticket = await self.admission.acquire(("snipe", chat_id), chat_id)
+            try:
+                # A dedicated thread, so queued browser jobs cannot delay the release-time click
+                submitted = await asyncio.to_thread(job.run, cancel)
+            finally:
+                self.admission.release(ticket)
+        except asyncio.CancelledError:
+            cancel.set()
+            raise
+        except Exception as e:
+            await self.bot.send_message(chat_id, f"❌ Sniper failed: {e}")
+            return
+        finally:
+            if self.snipes.get(chat_id, (None,))[0] is asyncio.current_task():
+                del self.snipes[chat_id]
+        
+        self.availability.invalidate(job.booking_date)
+        latency = job.click_to_submit_ms()
+        timing = f"\n⏱️ Release to Book click: {latency} ms" if latency is not None else ""
+        if submitted:
+            text = f"🎉 <b>Sniper booked day {job.preferred_day} at {job.slot_text}!</b>{timing}"
+        else:
+            text = (f"⚠️ Sniper did not book day {job.preferred_day} at {job.slot_text} "
+                    f"({job.outcome.replace('_', ' ')}).{timing}")
+        await self.bot.send_message(chat_id, text + f"\n\n<code>{job.format_timeline()}</code>")
+    
+    async def _notify_freed_slots(self, chat_id: int, day: date, slot_texts: list):
+        """Tell a watching chat that slots have freed up"""
+        await self.bot.send_message(
+            chat_id,
+            f"🔔 <b>Slots freed up on {day:%a %d %b}:</b> {', '.join(slot_texts)}\n\n"
+            f"Book now with /book {day.day}"
+        )
+    
+    async def _scrape_day(self, booking_date: date, background: bool = False):
+        """Scrape time slots for a date, sharing any scrape of the same date already in flight"""
+        return await self.lookups.do(booking_date, lambda: self._fetch_day(booking_date, background))
+    
+    async def _poll_day(self, booking_date: date):
+        """Background scrape for the watcher and cache revalidation, yielding to user lookups"""
+        return await self._scrape_day(booking_date, background=True)
+    
+    async def _fetch_day(self, booking_date: date, background: bool = False):
+        """Scrape time slots for a date with a pooled driver"""
+        if self.engine == "http":
+            return await self.http_client.get_time_slots(booking_date)
+        
+        # Taken from the reserve, so lookups never use up drivers admitted bookings count on
+        try:
+            await self.driver_reserve.acquire(background, timeout=30)
+        except asyncio.TimeoutError:
+            raise DriverPoolExhausted(f"All {self.driver_reserve.size} browser sessions kept for lookups are busy")
+        try:
+            driver = await self.driver_pool.acquire_async(timeout=30)
+            reusable = True
+            try:
+                service = await browser_stack.ready()
+                return await self.workers.run(service.get_squash_court_times, driver, booking_date.day, timeout=25)
+            except Exception:
+                reusable = False
+                raise
+            finally:
+                await self._release_driver(driver, reusable)
+        finally:
+            await self.driver_reserve.release(background)
+    
+    async def _show_time_slots(self, message: Message, state: FSMContext, preferred_day: int,
+                               time_slots: list, age: float = 0, session=None) -> bool:
+        """
+        Send the slot list and wait for the user's choice.
+        
+        Returns:
+            bool: True if there was at least one available slot to choose from
+        """
+        slots_text = f"\n🕐 <b>Available Time Slots for Day {preferred_day}:</b>\n"
+        available_slots = []
+        
+        for i, slot in enumerate(time_slots, 1):
+            text = slot.get('text', '').strip()
+            enabled = slot.get('is_enabled', False)
+            displayed = slot.get('is_displayed', False)
+            
+            if text and enabled and displayed:
+                available_slots.append((i, text, slot))
+                slots_text += f"{i}. {text} ✅\n"
+            else:
+                slots_text += f"{i}. {text or 'No text'} ❌\n"
+        
+        if not available_slots:
+            return False
+        
+        slots_text += f"\n🔄 Checked {format_age(age)}"
+        slots_text += f"\n📝 Please reply with the number (1-{len(available_slots)}) of your preferred time slot or 'cancel' to exit."
+        await message.answer(slots_text)
+        self._park_session(message, session)
+        
+        # Store booking data in FSM context and wait for user input
+        await state.update_data(
+            session=session,
+            time_slots=time_slots,
+            preferred_day=preferred_day,
+            available_slots=available_slots,
+            booking_id=current_trace_id(),
+            # Tells a pick still waiting for a browser whether this list was shown since
+            listed_at=time.monotonic()
+        )
+        await state.set_state(BookingStates.waiting_for_slot_selection)
+        return True
+    
+    async def _ask_confirmation(self, message: Message, state: FSMContext, preferred_day: int, selected_time_slot: dict):
+        """Show the booking summary and wait for 'confirm' or 'cancel'"""
+        confirmation_text = (
+            f"🎾 <b>BOOKING CONFIRMATION</b>\n\n"
+            f"📅 Date: Day {preferred_day} of current month\n"
+            f"⏰ Time Slot: {selected_time_slot.get('text', 'Unknown time')}\n"
+            f"🏟️ Court: Squash Court\n\n"
+            f"✅ Please type 'confirm' to proceed with booking or 'cancel' to cancel."
+        )
+        await message.answer(confirmation_text)
+        self._park_session(message, (await state.get_data()).get('session'))
+        
+        # Update state data and move to confirmation state
+        await state.update_data(selected_time_slot=selected_time_slot)
+        await state.set_state(BookingStates.waiting_for_confirmation)
+    
+    @staticmethod
+    def _format_search(search, window) -> str:
+        """Ranked /find results with a /book hint per slot"""
+        window_text = f", {window[0]:%H:%M}-{window[1]:%H:%M}" if window else ""
+        header = f"🔎 <b>Earliest free slots</b> ({search.start:%d %b} - {search.end:%d %b}{window_text})\n\n"
+        max_results = int(os.getenv("FIND_MAX_RESULTS", 5))
+        
+        if search.matches:
+            lines = [
+                f"{i}. {day:%a %d %b} {slot.get('text', '').strip()} - /book {day.day}"
+                for i, (day, _, slot) in enumerate(search.matches[:max_results], 1)
+            ]
+            text = header + "\n".join(lines)
+        elif search.partial:
+            text = header + "❌ No free slots found on the days that could be checked."
+        else:
+            text = header + "❌ No free slots found."
+        
+        text += f"\n\n🔄 Checked {search.checked_days} days ({search.cached_days} from cache) in {search.elapsed:.0f}s"
+        if search.missed_days:
+            missed = ", ".join(str(day.day) for day in search.missed_days)
+            text += f"\n⏳ Not checked in time: {missed}. Try again shortly for these days."
+        if search.failed_days:
+            failed = ", ".join(str(day.day) for day in search.failed_days)
+            text += f"\n⚠️ Could not check: {failed}. The search was partial; try /book for these days."
+        return text
+    
+    @staticmethod
+    def _find_slot_number(time_slots, slot_text: str):
+        """Find the 1-based number of an available slot by its text, or None"""
+        for i, slot in enumerate(time_slots or [], 1):
+            if (slot.get('text', '').strip() == slot_text
+                    and slot.get('is_enabled', False) and slot.get('is_displayed', False)):
+                return i
+        return None
+    
+    async def _release_driver(self, driver, reusable: bool = True):
+        """Return a driver to the pool on the browser workers without blocking the event loop"""
+        if driver is None:
+            return
+        try:
+            await self.workers.run_cleanup(self.driver_pool.release, driver, reusable)
+        except Exception as e:
+            logger.warning(f"Error releasing driver: {e}")
+    
+    async def _open_session(self, message: Message):
+        """
+        Wait for admission, then check out a driver for this chat's booking page session.
+        
+        Raises:
+            AdmissionRejected: If the user already has a booking or the queue is full
+        """
+        async def on_wait(position: int, eta: float):
+            await message.answer(f"⏳ <b>All browsers are busy.</b>\n\n"
+                               f"You are #{position} in the queue, about {max(1, round(eta / 60))} min to wait. "
+                               f"I will carry on automatically when it is your turn.")
+        
+        ticket = await self.admission.acquire(message.from_user.id, message.chat.id, on_wait)
+        try:
+            driver = await self.driver_pool.acquire_async(timeout=30)
+            session = (await browser_stack.ready()).BookingPageSession(driver)
+        except BaseException:
+            self.admission.release(ticket)
+            raise
+        self._tickets[id(session)] = ticket
+        return session
+    
+    async def _release_session(self, session, reusable: bool = True):
+        """Release the driver behind a booking page session, if any, and its admission"""
+        if session is not None:
+            self.sessions.unregister(session)
+            await self._release_driver(session.driver, reusable)
+            ticket = self._tickets.pop(id(session), None)
+            if ticket is not None:
+                self.admission.release(ticket)
+    
+    async def _abort_booking(self, message: Message, state: FSMContext, session, error: Exception,
+                             submitting: bool = False):
+        """Tell the user a browser step failed, then release its browser and clear the booking"""
+        busy = isinstance(error, (WorkerQueueFull, DriverPoolExhausted))
+        if busy:
+            await message.answer("⏳ <b>The bot is busy right now.</b>\n\n"
+                               "Your booking was cancelled. Please run /book again in a minute.")
+        elif submitting:
+            await message.answer("⚠️ <b>Could not confirm the submission.</b>\n\n"
+                               "The booking may or may not have gone through; please check your email "
+                               "before running /book again.")
+        else:
+            await message.answer(f"❌ <b>Booking Error:</b>\n\n"
+                               f"An error occurred during booking: {html.quote(str(error))}\n\n"
+                               f"Please run /book again.")
+        logger.warning(f"⚠️ Booking aborted: {error!r}")
+        # A job that never ran leaves the page usable; anything else leaves it in an unknown state
+        await self._release_session(session, reusable=busy)
+        await state.clear()
+    
+    def _park_session(self, message: Message, session):
+        """Track a session left in FSM state so it is reaped if the chat goes idle"""
+        if session is None:
+            return
+        chat_id, user_id = message.chat.id, message.from_user.id
+        
+        async def expire():
+            await self._expire_session(chat_id, user_id, session)
+        
+        self.sessions.register((chat_id, user_id), session, expire)
+    
+    async def _expire_session(self, chat_id: int, user_id: int, session):
+        """Quit an idle chat's browser, clear its booking state and tell the user"""
+        await self._release_session(session, reusable=False)
+        state = FSMContext(
+            storage=self.disp.storage,
+            key=StorageKey(bot_id=self.bot.id, chat_id=chat_id, user_id=user_id)
+        )
+        await state.clear()
+        minutes = int(self.sessions.idle_timeout // 60)
+        try:
+            await self.bot.send_message(
+                chat_id,
+                f"⌛ Your booking session expired after {minutes} min of inactivity.\n"
+                f"Use /book [day] to start again."
+            )
+        except Exception as e:
+            logger.warning(f"Error notifying chat {chat_id} about expired session: {e}")
+    
+    async def _track_in_flight(self, handler, event, data):
+        """Outer middleware counting updates that are still being handled"""
+        startup_timing.mark("first_update_received")
+        self._in_flight += 1
+        try:
+            return await handler(event, data)
+        finally:
+            self._in_flight -= 1
+            startup_timing.mark("first_update_processed")
+    
+    async def _track_polls(self, make_request, bot, method):
+        """Session middleware recording when a getUpdates long poll last succeeded"""
+        response = await make_request(bot, method)
+        if isinstance(method, GetUpdates):
+            self.last_poll_at = time.monotonic()
+        return response
+    
+    async def _trace_handler(self, handler, event: Message, data):
+        """Middleware running each handler in a span tagged with the chat's booking id"""
+        state = data.get('state')
+        booking_id = (await state.get_data()).get('booking_id') if state is not None else None
+        start_trace(booking_id)
+        with span(f"bot.{data['handler'].callback.__name__}", chat_id=event.chat.id):
+            return await handler(event, data)
+    
+    async def startup(self):
+        """Start the session reaper, availability watcher, driver pool warm-up and month prefetcher"""
+        self.sessions.start()
+        self.watcher.start()
+        # Import selenium and pre-launch browser sessions while the bot starts receiving updates
+        if self.engine == "selenium":
+            browser_stack.preload()
+            asyncio.get_running_loop().run_in_executor(None, self.driver_pool.warm)
+            if os.getenv("PREFETCH_ENABLED", "true").lower() == "true":
+                self.prefetcher.start()
+    
+    async def start_webhook(self, url: str, secret_token: str):
+        """
+        Register the webhook with Telegram; updates then arrive through feed_webhook_update.
+        
+        Args:
+            url: Public HTTPS URL of the webhook endpoint
+            secret_token: Value Telegram sends in X-Telegram-Bot-Api-Secret-Token
+        """
+        await self.bot.set_webhook(
+            url,
+            secret_token=secret_token,
+            allowed_updates=self.disp.resolve_used_update_types()
+        )
+        self.webhook_set = True
+        logger.info(f"Telegram webhook set to {url}")
+    
+    def feed_webhook_update(self, update: dict):
+        """
+        Process an update received on the webhook in the background.
+        
+        Telegram retries updates that are not acknowledged quickly, so the
+        endpoint answers immediately and the handlers run as a task on the
+        same event loop.
+        """
+        task = asyncio.get_running_loop().create_task(
+            self.disp.feed_webhook_update(self.bot, update)
+        )
+        self._webhook_tasks.add(task)
+        task.add_done_callback(self._webhook_tasks.discard)
+    
     async def start_polling(self):
-        """Start the Telegram bot polling"""
-        bot = Bot(token=self.token, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
-        print("Starting Telegram bot polling...")
-        await self.disp.start_polling(bot)
+        """Long-poll Telegram on the current event loop until stop_polling() is called"""
+        logger.info("Starting Telegram bot polling...")
+        await self.disp.start_polling(self.bot, handle_signals=False, close_bot_session=False)
+    
+    async def stop_polling(self):
+        """Stop long polling if it is running"""
+        try:
+            await self.disp.stop_polling()
+        except RuntimeError:
+            pass
+    
+    async def shutdown(self, drain_timeout: float = None):
+        """
+        Drain in-flight bookings and release every browser.
+        
+        Args:
+            drain_timeout: Seconds to wait for running handlers and browser jobs,
+                defaults to SHUTDOWN_DRAIN_SECONDS or 30
+        """
+        drain_timeout = drain_timeout if drain_timeout is not None else float(os.getenv("SHUTDOWN_DRAIN_SECONDS", 30))
+        await self.prefetcher.stop()
+        await self.finder.stop()
+        await self.watcher.stop()
+        for task, cancel, _ in list(self.snipes.values()):
+            cancel.set()
+            task.cancel()
+        self.admission.reject_waiting("🔄 The bot is restarting. Please try /book again in a minute.")
+        
+        # Let handlers and browser jobs that are already running finish
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + drain_timeout
+        while (self._in_flight or self._webhook_tasks or self.workers.pending) and loop.time() < deadline:
+            await asyncio.sleep(0.2)
+        if self._in_flight or self.workers.pending:
+            logger.warning(f"⚠️ Shutting down with {self._in_flight} updates and {self.workers.pending} browser jobs still running")
+        
+        await self.sessions.stop()
+        for session in self.sessions.sessions():
+            await self._release_session(session, reusable=False)
+        await self.workers.run_cleanup(self.driver_pool.close)
+        self.workers.shutdown(wait=False)
+        # Hit counts are saved lazily; keep this run's
+        selector_cache.save()
+        
+        if self.http_client is not None:
+            await self.http_client.close()
+        await self.bot.session.close()
+        logger.info("Telegram bot stopped")
@@ -0,0 +1,244 @@
+import fcntl
+import logging
+import os
+import shutil
+import threading
+import time
+from typing import Dict, List, Optional
+
+from metrics import profile_leases
+from procstats import format_bytes
+
+
+logger = logging.getLogger(__name__)
+
+
+# Files Chromium leaves behind to mark a profile as in use; stale after a crash
+_SINGLETON_FILES = ("SingletonLock", "SingletonSocket", "SingletonCookie")
+_LOCK_FILE = ".lease.lock"
+_CACHE_DIR = "cache"
+# Slots tried before giving up and starting the browser with a throwaway profile
+MAX_SLOTS = 32
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class ProfileLease:
+    """Exclusive use of one profile slot by one browser."""
+
+    def __init__(self, store: "ProfileStore", slot: int, path: str, lock_file, warm: bool):
+        self.store = store
+        self.slot = slot
+        self.path = path
+        self.warm = warm
+        self._lock_file = lock_file
+
+    @property
+    def cache_dir(self) -> str:
+        return os.path.join(self.path, _CACHE_DIR)
+
+    def chrome_arguments(self) -> List[str]:
+        """Command-line switches pointing Chromium at this slot."""
+        return [
+            f"--user-data-dir={self.path}",
+            f"--disk-cache-dir={self.cache_dir}",
+            f"--disk-cache-size={self.store.max_cache_bytes}",
+        ]
+
+    def release(self) -> None:
+        """Give the slot back. Call only after the browser using it has quit."""
+        if self._lock_file is None:
+            return
+        try:
+            # The lock file's mtime records when the slot was last used
+            os.utime(self._lock_file.fileno())
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+        except OSError:
+            pass
+        finally:
+            self._lock_file.close()
+            self._lock_file = None
+        self.store.cleanup_if_due()
+
+
+class ProfileStore:
+    """
+    Persistent Chromium profiles whose HTTP disk cache survives driver restarts.
+
+    Chromium refuses to share a user data directory between running
+    browsers, so the store keeps numbered profile slots under one root and
+    leases each to one browser at a time. A lease is an exclusive flock on
+    the slot's lock file, which also keeps several bot processes on the
+    same volume apart and is dropped by the kernel if the process dies.
+    Recycled drivers get a previously used slot back, so the booking page's
+    scripts and styles come from a warm cache instead of the network.
+
+    Chromium bounds each slot's cache with --disk-cache-size. Cleanup runs
+    at most every cleanup_interval seconds, when a lease is released: slots
+    unused for max_idle_days are deleted, and while the whole store is over
+    max_total_bytes the caches of the least recently used free slots are
+    dropped.
+    """
+
+    def __init__(self, root: Optional[str] = None, enabled: Optional[bool] = None,
+                 max_cache_mb: Optional[int] = None, max_total_mb: Optional[int] = None,
+                 max_idle_days: Optional[float] = None, cleanup_interval: float = 600):
+        """
+        Args:
+            root: Directory holding the slots, defaults to BROWSER_PROFILE_DIR
+                or ~/.cache/squash-bot/chromium-profiles
+            enabled: Whether drivers get persistent profiles, defaults to BROWSER_PROFILES (on)
+            max_cache_mb: Disk cache limit per slot, defaults to BROWSER_CACHE_MAX_MB or 64
+            max_total_mb: Limit for all slots together, defaults to BROWSER_PROFILE_MAX_MB or 512
+            max_idle_days: Days before an unused slot is deleted, defaults to BROWSER_PROFILE_MAX_IDLE_DAYS or 7
+            cleanup_interval: Minimum seconds between cleanups
+        """
+        self.root = root or os.getenv("BROWSER_PROFILE_DIR") or os.path.join(
+            os.path.expanduser("~"), ".cache", "squash-bot", "chromium-profiles"
+        )
+        self.enabled = enabled if enabled is not None else os.getenv("BROWSER_PROFILES", "on").lower() != "off"
+        self.max_cache_bytes = (max_cache_mb or int(os.getenv("BROWSER_CACHE_MAX_MB", 64))) * 1024 * 1024
+        self.max_total_bytes = (max_total_mb or int(os.getenv("BROWSER_PROFILE_MAX_MB", 512))) * 1024 * 1024
+        self.max_idle = (max_idle_days or float(os.getenv("BROWSER_PROFILE_MAX_IDLE_DAYS", 7))) * 86400
+        self.cleanup_interval = cleanup_interval
+
+        self._lock = threading.Lock()
+        self._last_cleanup = 0.0
+        self.warm_leases = 0
+        self.cold_leases = 0
+
+    def slot_path(self, slot: int) -> str:
+        return os.path.join(self.root, f"slot-{slot}")
+
+    def acquire(self) -> Optional[ProfileLease]:
+        """
+        Lease the first free slot, creating one if every existing slot is in use.
+
+        Returns:
+            ProfileLease: The leased slot, or None if profiles are disabled or
+                no slot could be leased; the browser then uses a throwaway profile
+        """
+        if not self.enabled:
+            return None
+        for slot in range(MAX_SLOTS):
+            path = self.slot_path(slot)
+            lock_file = self._try_lock(path)
+            if lock_file is None:
+                continue
+            # Nothing of ours runs on this slot, so Chromium's markers are left over from a crash
+            for name in _SINGLETON_FILES:
+                try:
+                    os.unlink(os.path.join(path, name))
+                except OSError:
+                    pass
+            cache_dir = os.path.join(path, _CACHE_DIR)
+            warm = os.path.isdir(cache_dir) and bool(os.listdir(cache_dir))
+            with self._lock:
+                if warm:
+                    self.warm_leases += 1
+                else:
+                    self.cold_leases += 1
+            profile_leases.inc(cache="warm" if warm else "cold")
+            logger.debug(f"Leased browser profile slot {slot} ({'warm' if warm else 'cold'} cache)")
+            return ProfileLease(self, slot, path, lock_file, warm)
+        logger.warning(f"⚠️ All {MAX_SLOTS} browser profile slots are in use, starting with a throwaway profile")
+        return None
+
+    @staticmethod
+    def _try_lock(path: str):
+        """Open and exclusively lock a slot's lock file, or return None if the slot is taken."""
+        try:
+            os.makedirs(path, exist_ok=True)
+            lock_file = open(os.path.join(path, _LOCK_FILE), "a")
+        except OSError as e:
+            logger.warning(f"⚠️ Cannot use browser profile directory {path}: {e}")
+            return None
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return None
+        return lock_file
+
+    def _slots(self) -> List[str]:
+        try:
+            names = os.listdir(self.root)
+        except OSError:
+            return []
+        return [os.path.join(self.root, name) for name in names if name.startswith("slot-")]
+
+    def cleanup_if_due(self) -> None:
+        with self._lock:
+            if time.monotonic() - self._last_cleanup < self.cleanup_interval:
+                return
+            self._last_cleanup = time.monotonic()
+        try:
+            self.cleanup()
+        except Exception as e:
+            logger.warning(f"⚠️ Browser profile cleanup failed: {e}")
+
+    def cleanup(self) -> Dict[str, int]:
+        """
+        Delete idle slots and trim free slots' caches down to the total size limit.
+
+        Slots leased by a running browser are never touched.
+
+        Returns:
+            Dict[str, int]: Slots deleted, caches dropped and bytes in use afterwards
+        """
+        result = {'slots_deleted': 0, 'caches_dropped': 0, 'bytes': 0}
+        free = []
+        total = 0
+        for path in self._slots():
+            lock_file = self._try_lock(path)
+            if lock_file is None:
+                total += _dir_size(path)
+                continue
+            try:
+                last_used = os.fstat(lock_file.fileno()).st_mtime
+                if time.time() - last_used > self.max_idle:
+                    shutil.rmtree(path, ignore_errors=True)
+                    result['slots_deleted'] += 1
+                    continue
+                size = _dir_size(path)
+                total += size
+                free.append((last_used, path, size))
+            finally:
+                lock_file.close()
+
+        # Least recently used first; the lease lock is taken again for the deletion
+        for last_used, path, size in sorted(free):
+            if total <= self.max_total_bytes:
+                break
+            lock_file = self._try_lock(path)
+            if lock_file is None:
+                continue
+            try:
+                cache_dir = os.path.join(path, _CACHE_DIR)
+                cache_size = _dir_size(cache_dir)
+                shutil.rmtree(cache_dir, ignore_errors=True)
+                total -= cache_size
+                result['caches_dropped'] += 1
+            finally:
+                lock_file.close()
+
+        result['bytes'] = total
+        if result['slots_deleted'] or result['caches_dropped']:
+            logger.info(f"🧹 Browser profiles: deleted {result['slots_deleted']} idle slots, dropped "
+                        f"{result['caches_dropped']} caches, {format_bytes(total)} in use")
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'warm_leases': self.warm_leases,
+            'cold_leases': self.cold_leases,
+        }
@@ -0,0 +1,62 @@
+import asyncio
+import importlib
+import logging
+import sys
+import threading
+import time
+
+import startup_timing
+
+
+logger = logging.getLogger(__name__)
+
+
+# Set once selenium and the service module are imported
+_loaded = threading.Event()
+
+
+def load():
+    """
+    Import the selenium booking stack. Blocking; call it from a worker thread.
+
+    Selenium and service are not needed to answer health checks or receive
+    updates, so the bot imports them after it is up instead of at start-up.
+    Concurrent callers wait on Python's import lock for the same import.
+
+    Returns:
+        module: The service module
+    """
+    if _loaded.is_set():
+        return sys.modules["service"]
+    started = time.perf_counter()
+    service = importlib.import_module("service")
+    importlib.import_module("sniper")
+    if not _loaded.is_set():
+        _loaded.set()
+        startup_timing.mark("browser_stack_loaded")
+        logger.info(f"Browser stack imported in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return service
+
+
+def preload() -> None:
+    """Start importing the browser stack on a background thread."""
+    threading.Thread(target=_preload, name="browser-stack-import", daemon=True).start()
+
+
+def _preload() -> None:
+    try:
+        load()
+    except Exception as e:
+        logger.error(f"❌ Failed to import the browser stack: {e}")
+
+
+async def ready():
+    """
+    The service module, importing it off the event loop if it is not loaded yet.
+
+    Returns:
+        module: The service module
+    """
+    if _loaded.is_set():
+        return sys.modules["service"]
+    return await asyncio.to_thread(load)
@@ -0,0 +1,418 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import browser_stack
+from browser_profile import ProfileStore
+
+
+logger = logging.getLogger(__name__)
+
+
+class DriverPoolExhausted(Exception):
+    """Raised when no driver could be checked out before the timeout."""
+
+
+def container_memory_limit() -> Optional[int]:
+    """
+    Read the container memory limit from cgroups.
+
+    Returns:
+        int: Memory limit in bytes, or None if unlimited/unknown
+    """
+    candidates = [
+        "/sys/fs/cgroup/memory.max",                    # cgroup v2
+        "/sys/fs/cgroup/memory/memory.limit_in_bytes",  # cgroup v1
+    ]
+    for path in candidates:
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+        except OSError:
+            continue
+        if value == "max":
+            return None
+        try:
+            limit = int(value)
+        except ValueError:
+            continue
+        # cgroup v1 reports a huge number when there is no limit
+        if limit < 1 << 50:
+            return limit
+    return None
+
+
+def default_pool_size() -> int:
+    """
+    Size the pool from DRIVER_POOL_MAX_SIZE or the container's memory limit.
+
+    Each headless Chromium session costs roughly DRIVER_MEMORY_MB of RSS,
+    and the Python process itself needs some headroom.
+    """
+    configured = os.getenv("DRIVER_POOL_MAX_SIZE")
+    if configured:
+        return max(1, int(configured))
+
+    limit = container_memory_limit()
+    if limit is None:
+        return 3
+
+    per_driver = int(os.getenv("DRIVER_MEMORY_MB", 180)) * 1024 * 1024
+    reserved = int(os.getenv("DRIVER_RESERVED_MB", 150)) * 1024 * 1024
+    return max(1, (limit - reserved) // per_driver)
+
+
+def launch_chromium(profile=None):
+    """Default driver factory; selenium is imported on the calling worker thread if needed."""
+    return browser_stack.load().initialize_driver(headless=True, profile=profile)
+
+
+class _PooledDriver:
+    """Bookkeeping for a driver owned by the pool."""
+
+    def __init__(self, driver, profile=None):
+        self.driver = driver
+        # ProfileLease held until the browser has quit
+        self.profile = profile
+        self.created_at = time.monotonic()
+        self.uses = 0
+
+    def age(self) -> float:
+        return time.monotonic() - self.created_at
+
+
+class DriverPool:
+    """
+    Bounded pool of warm Chromium sessions built around initialize_driver.
+
+    Drivers are pre-launched up to min_idle, handed out with acquire() and
+    given back with release(). A driver is probed before checkout and is
+    recycled after max_uses checkouts or max_age seconds. The total number
+    of live drivers never exceeds max_size, so the pool cannot push the
+    container past its memory limit. Every driver runs on a persistent
+    profile slot from the ProfileStore, so a recycled driver's successor
+    starts with a warm disk cache. All methods except acquire_async are
+    blocking; acquire() waits for a driver, so the event loop calls it
+    through acquire_async rather than on a browser worker thread.
+    """
+
+    def __init__(self,
+                 min_idle: Optional[int] = None,
+                 max_size: Optional[int] = None,
+                 max_uses: Optional[int] = None,
+                 max_age: Optional[float] = None,
+                 factory: Callable = None,
+                 profiles: Optional[ProfileStore] = None):
+        """
+        Args:
+            min_idle: Warm drivers to keep ready, defaults to DRIVER_POOL_MIN_IDLE or 1
+            max_size: Hard cap on live drivers, defaults to default_pool_size()
+            max_uses: Checkouts before a driver is recycled, defaults to DRIVER_MAX_USES or 20
+            max_age: Seconds before a driver is recycled, defaults to DRIVER_MAX_AGE_MINUTES (30) * 60
+            factory: Callable creating a driver on a ProfileLease (or None),
+                defaults to launch_chromium
+            profiles: Store the profile slots are leased from, defaults to ProfileStore()
+        """
+        self.max_size = max_size or default_pool_size()
+        self.min_idle = min(
+            min_idle if min_idle is not None else int(os.getenv("DRIVER_POOL_MIN_IDLE", 1)),
+            self.max_size
+        )
+        self.max_uses = max_uses or int(os.getenv("DRIVER_MAX_USES", 20))
+        self.max_age = max_age or float(os.getenv("DRIVER_MAX_AGE_MINUTES", 30)) * 60
+        self.factory = factory or launch_chromium
+        self.profiles = profiles or ProfileStore()
+
+        self._cond = threading.Condition()
+        self._idle: List[_PooledDriver] = []
+        self._in_use: Dict[int, _PooledDriver] = {}
+        self._launching = 0
+        # Drivers out of both lists while they are probed, reset or quit
+        self._checking = 0
+        self._closed = False
+
+        self.cold_starts = 0
+        self.warm_checkouts = 0
+        self.recycled = 0
+        self.launch_failures = 0
+        # Launches that failed since the last one that worked, and why the last one failed
+        self.consecutive_launch_failures = 0
+        self.last_launch_error: Optional[str] = None
+
+    @property
+    def size(self) -> int:
+        """Number of live drivers, including ones being launched, probed or reset."""
+        return len(self._idle) + len(self._in_use) + self._launching + self._checking
+
+    def drivers(self) -> list:
+        """Snapshot of every live driver owned by the pool."""
+        with self._cond:
+            return [p.driver for p in self._idle] + [p.driver for p in self._in_use.values()]
+
+    def warm(self) -> None:
+        """Launch drivers until min_idle warm sessions are ready."""
+        while True:
+            with self._cond:
+                if self._closed or len(self._idle) + self._launching >= self.min_idle or self.size >= self.max_size:
+                    return
+                self._launching += 1
+            pooled = self._launch()
+            with self._cond:
+                self._launching -= 1
+                if pooled is None:
+                    return
+                if self._closed:
+                    self._quit(pooled)
+                    return
+                self._idle.append(pooled)
+                self._cond.notify()
+
+    def acquire(self, timeout: float = 30):
+        """
+        Check out a live driver, cold-starting one only if none are idle.
+
+        Args:
+            timeout: Seconds to wait for a driver when the pool is at max_size
+
+        Returns:
+            webdriver.Chrome: A driver that passed the liveness probe
+
+        Raises:
+            DriverPoolExhausted: If no driver became available in time
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise DriverPoolExhausted("Driver pool is closed")
+
+                pooled = self._idle.pop() if self._idle else None
+                if pooled is not None:
+                    # Still counted towards max_size while it is probed outside the lock
+                    self._checking += 1
+                elif self.size < self.max_size:
+                    self._launching += 1
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise DriverPoolExhausted(
+                            f"All {self.max_size} browser sessions are busy"
+                        )
+                    self._cond.wait(remaining)
+                    continue
+
+            if pooled is None:
+                # Pool is empty but below the cap: cold start
+                pooled = self._launch()
+                with self._cond:
+                    self._launching -= 1
+                    if pooled is None:
+                        self._cond.notify()
+                        raise DriverPoolExhausted("Failed to launch a browser session")
+                    placed = self._place(pooled)
+                    if placed:
+                        self.cold_starts += 1
+            else:
+                if self._expired(pooled) or not self._is_alive(pooled.driver):
+                    self._retire(pooled)
+                    continue
+                with self._cond:
+                    self._checking -= 1
+                    placed = self._place(pooled)
+                    if placed:
+                        self.warm_checkouts += 1
+
+            if not placed:
+                # The pool was closed while this driver was being launched or probed
+                self._quit(pooled)
+                raise DriverPoolExhausted("Driver pool is closed")
+            self._replenish()
+            return pooled.driver
+
+    async def acquire_async(self, timeout: float = 30):
+        """
+        acquire() on a thread of its own, for the event loop.
+
+        Waiting for a free driver must not occupy a browser worker, since
+        those workers run the jobs that finish and release drivers. A driver
+        checked out after the caller was cancelled goes straight back.
+        """
+        checkout = asyncio.ensure_future(asyncio.to_thread(self.acquire, timeout))
+        try:
+            return await asyncio.shield(checkout)
+        except asyncio.CancelledError:
+            checkout.add_done_callback(self._release_abandoned)
+            raise
+
+    def release(self, driver, reusable: bool = True) -> None:
+        """
+        Return a driver to the pool.
+
+        Args:
+            driver: Driver previously returned by acquire()
+            reusable: False if the session is in an unknown state and must be discarded
+        """
+        with self._cond:
+            pooled = self._in_use.pop(id(driver), None)
+            if pooled is not None:
+                self._checking += 1
+        if pooled is None:
+            # Not ours (or already released) - just make sure it goes away
+            try:
+                driver.quit()
+            except Exception:
+                pass
+            return
+
+        if not reusable or self._closed or self._expired(pooled) or not self._reset(driver):
+            self._retire(pooled)
+            self._replenish()
+            return
+
+        with self._cond:
+            self._checking -= 1
+            if not self._closed:
+                self._idle.append(pooled)
+                self._cond.notify()
+                return
+        self._quit(pooled)
+
+    def discard(self, driver) -> None:
+        """Quit a checked-out driver instead of returning it to the pool."""
+        self.release(driver, reusable=False)
+
+    def stats(self) -> Dict[str, int]:
+        """Pool counters for logging and health endpoints."""
+        with self._cond:
+            return {
+                'idle': len(self._idle),
+                'in_use': len(self._in_use),
+                'launching': self._launching,
+                'checking': self._checking,
+                'max_size': self.max_size,
+                'cold_starts': self.cold_starts,
+                'warm_checkouts': self.warm_checkouts,
+                'recycled': self.recycled,
+                'launch_failures': self.launch_failures,
+                **self.profiles.stats(),
+            }
+
+    def probe_idle(self) -> Optional[bool]:
+        """
+        Liveness-probe the least recently used idle driver in place, without checking it out.
+
+        The probe does not count as a use and never launches a browser. A dead
+        driver is retired and replaced in the background.
+
+        Returns:
+            bool: Whether the driver answered, or None if no driver is idle
+        """
+        with self._cond:
+            if self._closed or not self._idle:
+                return None
+            pooled = self._idle.pop(0)
+            self._checking += 1
+        if not self._is_alive(pooled.driver):
+            self._retire(pooled)
+            self._replenish()
+            return False
+        with self._cond:
+            self._checking -= 1
+            if not self._closed:
+                # Back where it was: acquire() hands out the most recently used driver first
+                self._idle.insert(0, pooled)
+                self._cond.notify()
+                return True
+        self._quit(pooled)
+        return True
+
+    def close(self) -> None:
+        """Quit every idle and checked-out driver."""
+        with self._cond:
+            self._closed = True
+            pooled = self._idle + list(self._in_use.values())
+            self._idle = []
+            self._in_use = {}
+            self._cond.notify_all()
+        for p in pooled:
+            self._quit(p)
+
+    def _launch(self) -> Optional[_PooledDriver]:
+        profile = self.profiles.acquire()
+        try:
+            pooled = _PooledDriver(self.factory(profile), profile)
+        except Exception as e:
+            if profile is not None:
+                profile.release()
+            logger.error(f"❌ Driver pool failed to launch Chromium: {e}")
+            with self._cond:
+                self.launch_failures += 1
+                self.consecutive_launch_failures += 1
+                self.last_launch_error = str(e)
+            return None
+        with self._cond:
+            self.consecutive_launch_failures = 0
+        return pooled
+
+    def _replenish(self) -> None:
+        """Top the pool back up to min_idle in the background."""
+        with self._cond:
+            needed = len(self._idle) + self._launching < self.min_idle and self.size < self.max_size
+        if needed and not self._closed:
+            threading.Thread(target=self.warm, name="driver-pool-warm", daemon=True).start()
+
+    def _expired(self, pooled: _PooledDriver) -> bool:
+        return pooled.uses >= self.max_uses or pooled.age() >= self.max_age
+
+    def _place(self, pooled: _PooledDriver) -> bool:
+        """Hand a driver out; False if the pool has closed. Call with the lock held."""
+        if self._closed:
+            return False
+        pooled.uses += 1
+        self._in_use[id(pooled.driver)] = pooled
+        return True
+
+    def _retire(self, pooled: _PooledDriver) -> None:
+        """Quit a driver that is being probed or reset, freeing its place in the pool."""
+        self._quit(pooled)
+        with self._cond:
+            self._checking -= 1
+            self.recycled += 1
+            self._cond.notify()
+
+    def _release_abandoned(self, checkout: asyncio.Future) -> None:
+        if checkout.cancelled() or checkout.exception() is not None:
+            return
+        threading.Thread(target=self.release, args=(checkout.result(),),
+                         name="driver-pool-release", daemon=True).start()
+
+    @staticmethod
+    def _is_alive(driver) -> bool:
+        """Liveness probe: a round trip to the browser must succeed."""
+        try:
+            return driver.execute_script("return 1;") == 1
+        except Exception:
+            return False
+
+    @staticmethod
+    def _reset(driver) -> bool:
+        """Bring a used session back to a neutral page with no cookies."""
+        try:
+            driver.delete_all_cookies()
+            driver.get("about:blank")
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _quit(pooled: _PooledDriver) -> None:
+        try:
+            pooled.driver.quit()
+        except Exception:
+            pass
+        # quit() waits for the browser to exit, so the slot is free for the next driver
+        if pooled.profile is not None:
+            pooled.profile.release()
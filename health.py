@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+
+class HealthCheck:
+    """
+    Liveness and readiness of a running bot, for the platform's probes.
+
+    Live means restarting would not help: the bot started and, in polling
+    mode, its polling task is still running. Ready means the instance can
+    book: Chromium can be launched, Telegram updates are arriving and the
+    browser queue has room.
+
+    The browser check reads the driver pool's state rather than checking a
+    driver out, which would cold-launch Chromium, use up DRIVER_MAX_USES and
+    compete with bookings. Every driver being in use is busy, not unready.
+    An idle driver is liveness-probed in place at most every
+    driver_check_interval seconds, on its own thread rather than the browser
+    workers, and concurrent probes share one check.
+    """
+
+    def __init__(self, bot, polling_task: Optional[asyncio.Task] = None,
+                 driver_timeout: Optional[float] = None, driver_check_interval: Optional[float] = None,
+                 poll_staleness: Optional[float] = None, max_queued: Optional[int] = None,
+                 max_launch_failures: Optional[int] = None):
+        """
+        Args:
+            bot: Started TelegramBot
+            polling_task: Task running bot.start_polling(), None in webhook mode
+            driver_timeout: Seconds the idle driver probe may take, defaults to READY_DRIVER_TIMEOUT_SECONDS or 15
+            driver_check_interval: Seconds an idle driver probe result is reused,
+                defaults to READY_DRIVER_CHECK_INTERVAL_SECONDS or 30
+            poll_staleness: Seconds without a successful getUpdates before the dispatcher
+                counts as stalled, defaults to READY_POLL_STALE_SECONDS or 90
+            max_queued: Browser jobs allowed to wait for a worker, defaults to
+                READY_MAX_QUEUED or half of the worker queue
+            max_launch_failures: Chromium launches in a row that may fail before the instance
+                is not ready, defaults to READY_MAX_LAUNCH_FAILURES or 3
+        """
+        self.bot = bot
+        self.polling_task = polling_task
+        self.driver_timeout = driver_timeout or float(os.getenv("READY_DRIVER_TIMEOUT_SECONDS", 15))
+        self.driver_check_interval = driver_check_interval or float(os.getenv("READY_DRIVER_CHECK_INTERVAL_SECONDS", 30))
+        self.poll_staleness = poll_staleness or float(os.getenv("READY_POLL_STALE_SECONDS", 90))
+        self.max_queued = max_queued if max_queued is not None else int(
+            os.getenv("READY_MAX_QUEUED", bot.workers.max_queue // 2)
+        )
+        self.max_launch_failures = max_launch_failures or int(os.getenv("READY_MAX_LAUNCH_FAILURES", 3))
+        self.started_at = time.monotonic()
+
+        self._probe: Optional[asyncio.Future] = None
+        self._probe_result: Optional[str] = None
+        self._probed_at = 0.0
+
+    def live(self) -> Tuple[bool, Dict[str, Dict]]:
+        """
+        Returns:
+            Tuple of whether the bot is alive and the individual checks
+        """
+        checks = {}
+        if self.polling_task is not None:
+            if self.polling_task.done():
+                checks['polling'] = {'ok': False, 'detail': "polling task has stopped"}
+            else:
+                checks['polling'] = {'ok': True}
+        return all(check['ok'] for check in checks.values()), checks
+
+    async def ready(self) -> Tuple[bool, Dict[str, Dict]]:
+        """
+        Returns:
+            Tuple of whether the bot can take bookings and the individual checks
+        """
+        checks = {
+            'dispatcher': self._check_dispatcher(),
+            'queue': self._check_queue(),
+            'browser': await self._check_browser(),
+        }
+        return all(check['ok'] for check in checks.values()), checks
+
+    def _check_dispatcher(self) -> Dict:
+        if self.polling_task is None:
+            if self.bot.webhook_set:
+                return {'ok': True, 'mode': "webhook"}
+            return {'ok': False, 'mode': "webhook", 'detail': "webhook is not registered"}
+
+        if self.polling_task.done():
+            return {'ok': False, 'mode': "polling", 'detail': "polling task has stopped"}
+        # Until the first poll returns, give it as long as a stalled poll would get
+        last = self.bot.last_poll_at if self.bot.last_poll_at is not None else self.started_at
+        age = time.monotonic() - last
+        if age > self.poll_staleness:
+            return {'ok': False, 'mode': "polling", 'detail': f"no successful poll for {age:.0f}s"}
+        return {'ok': True, 'mode': "polling", 'last_poll_seconds': round(age, 1)}
+
+    def _check_queue(self) -> Dict:
+        queued = self.bot.workers.queued
+        return {'ok': queued <= self.max_queued, 'queued': queued, 'max_queued': self.max_queued}
+
+    async def _check_browser(self) -> Dict:
+        if self.bot.engine != "selenium":
+            return {'ok': True, 'detail': f"not used by the {self.bot.engine} engine"}
+        pool = self.bot.driver_pool
+        idle_probe = await self._probe_idle()
+        stats = pool.stats()
+        result = {
+            'idle': stats['idle'],
+            'in_use': stats['in_use'],
+            'max_size': stats['max_size'],
+            'idle_probe': idle_probe,
+        }
+        if pool.consecutive_launch_failures >= self.max_launch_failures:
+            return {'ok': False, **result,
+                    'detail': f"last {pool.consecutive_launch_failures} Chromium launches failed: "
+                              f"{pool.last_launch_error}"}
+        return {'ok': True, **result}
+
+    async def _probe_idle(self) -> str:
+        """Liveness of an idle driver, probed in place: "alive", "replaced", "none idle" or "timed out"."""
+        if self._probe_result is not None and time.monotonic() - self._probed_at < self.driver_check_interval:
+            return self._probe_result
+        if self._probe is None or self._probe.done():
+            self._probe = asyncio.ensure_future(asyncio.to_thread(self.bot.driver_pool.probe_idle))
+        try:
+            # The probe keeps going in the background if this check gives up on it
+            alive = await asyncio.wait_for(asyncio.shield(self._probe), self.driver_timeout)
+        except asyncio.TimeoutError:
+            # Not cached: the next check waits for the same probe
+            return "timed out"
+        except Exception as e:
+            logger.warning(f"⚠️ Readiness driver probe failed: {e}")
+            alive = False
+        # A dead idle driver is retired and relaunched; repeated launch failures are what fail readiness
+        self._probe_result = {True: "alive", False: "replaced", None: "none idle"}[alive]
+        self._probed_at = time.monotonic()
+        return self._probe_result
@@ -1,34 +1,189 @@
 import asyncio
+import hmac
+import importlib
 import logging
 import sys
 import os
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 import uvicorn
-import threading
-from bot import TelegramBot
+import startup_timing
+from health import HealthCheck
+from metrics import registry
+from procstats import drivers_rss
+from tracing import configure_logging
 
-# FastAPI app for Render.com health checks
-app = FastAPI(title="Telegram Bot", description="Squash Court Booking Bot")
+logger = logging.getLogger(__name__)
+startup_timing.mark("imports")
+
+# Webhook mode is enabled by setting WEBHOOK_URL (public base URL of this service)
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "").rstrip("/")
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/telegram/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+
+# Shared with the routes; lives on the same event loop as the server
+telegram_bot = None
+health = None
+startup_task = None
+
+async def start_bot():
+    """
+    Import, build and start the bot once the server is up.
+
+    Importing aiogram alone takes seconds, so it happens on a thread while
+    the event loop already answers health checks.
+
+    Returns:
+        Tuple of the bot and its polling task (None in webhook mode)
+    """
+    global telegram_bot, health
+    bot_module = await asyncio.to_thread(importlib.import_module, "bot")
+    startup_timing.mark("bot_imported")
+
+    bot = bot_module.TelegramBot()
+    register_bot_gauges(bot)
+    await bot.startup()
+
+    polling_task = None
+    if WEBHOOK_URL:
+        await bot.start_webhook(WEBHOOK_URL + WEBHOOK_PATH, WEBHOOK_SECRET)
+    else:
+        polling_task = asyncio.create_task(bot.start_polling())
+    telegram_bot = bot
+    health = HealthCheck(bot, polling_task)
+    startup_timing.mark("dispatcher_ready")
+    logger.info(f"Bot started {startup_timing.elapsed('dispatcher_ready'):.2f}s after process start")
+    return bot, polling_task
+
+def log_startup_failure(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Bot failed to start: {task.exception()}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the bot in the background of the server and drain it before the process exits"""
+    global telegram_bot, health, startup_task
+    if WEBHOOK_URL and not WEBHOOK_SECRET:
+        logger.error("Error: WEBHOOK_SECRET environment variable is required in webhook mode")
+        sys.exit(1)
+
+    startup_task = asyncio.create_task(start_bot())
+    startup_task.add_done_callback(log_startup_failure)
+    try:
+        yield
+    finally:
+        # Stop taking new updates first, then drain what is in flight
+        telegram_bot = None
+        health = None
+        if not startup_task.done():
+            startup_task.cancel()
+        try:
+            bot, polling_task = await startup_task
+        except asyncio.CancelledError:
+            return
+        except Exception:
+            return
+        if polling_task is not None:
+            await bot.stop_polling()
+            try:
+                await polling_task
+            except Exception as e:
+                logger.warning(f"Polling stopped with an error: {e}")
+        await bot.shutdown()
+
+def register_bot_gauges(bot):
+    """Expose live browser and queue state of the bot on /metrics"""
+    registry.gauge("browser_drivers_live", "Chromium sessions owned by the driver pool",
+                   lambda: bot.driver_pool.size)
+    registry.gauge("browser_drivers_in_use", "Chromium sessions checked out of the pool",
+                   lambda: bot.driver_pool.stats()['in_use'])
+    registry.gauge("browser_chromium_rss_bytes", "Resident memory of chromedriver and Chromium processes",
+                   lambda: drivers_rss(bot.driver_pool.drivers()))
+    registry.gauge("browser_worker_jobs_pending", "Browser jobs queued or running on the worker pool",
+                   lambda: bot.workers.pending)
+    registry.gauge("booking_sessions_parked", "Browser sessions parked in FSM state",
+                   lambda: len(bot.sessions))
+    registry.gauge("booking_admissions_active", "Bookings admitted to hold a browser",
+                   lambda: bot.admission.active)
+    registry.gauge("booking_admissions_queued", "Bookings waiting for admission",
+                   lambda: bot.admission.queued)
+    registry.gauge("availability_watch_subscriptions", "Chats waiting for a slot to free up",
+                   lambda: bot.watcher.stats()['subscriptions'])
+    registry.gauge("availability_watch_dates", "Dates polled by the availability watcher",
+                   lambda: bot.watcher.stats()['watched_dates'])
+
+# FastAPI app for Render.com health checks, hosting the bot on the same event loop
+app = FastAPI(title="Telegram Bot", description="Squash Court Booking Bot", lifespan=lifespan)
+startup_timing.register_gauges(registry)
 
 @app.get("/")
 async def root():
     return {"message": "Telegram bot is running!", "status": "healthy"}
 
-def run_fastapi():
-    """Run FastAPI server in a separate thread"""
-    port = int(os.getenv("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port, log_level="info")
+@app.get("/health/live")
+async def liveness():
+    """Fails only when restarting would help: the bot failed to start or polling died"""
+    if startup_task is not None and startup_task.done() and not startup_task.cancelled() \
+            and startup_task.exception() is not None:
+        return JSONResponse({"status": "dead", "detail": f"bot failed to start: {startup_task.exception()}"},
+                            status_code=503)
+    if health is None:
+        return {"status": "starting"}
+    alive, checks = health.live()
+    return JSONResponse({"status": "alive" if alive else "dead", "checks": checks},
+                        status_code=200 if alive else 503)
+
+@app.get("/health/ready")
+async def readiness():
+    """Succeeds only when this instance can book: browser, Telegram updates and queue room"""
+    if health is None:
+        return JSONResponse({"status": "starting"}, status_code=503)
+    ready, checks = await health.ready()
+    return JSONResponse({"status": "ready" if ready else "not_ready", "checks": checks},
+                        status_code=200 if ready else 503)
+
+@app.get("/metrics")
+async def metrics():
+    """Per-stage booking latency, fallback hits and live browser state in Prometheus format"""
+    # The Chromium memory gauge walks /proc for every browser: keep it off the event loop
+    body = await asyncio.to_thread(registry.render)
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+@app.post(WEBHOOK_PATH)
+async def telegram_webhook(request: Request):
+    """Receive Telegram updates and feed them to the dispatcher on this event loop"""
+    if not WEBHOOK_URL:
+        raise HTTPException(status_code=404, detail="Webhook mode is not enabled")
+    if telegram_bot is None:
+        raise HTTPException(status_code=503, detail="Bot is not running")
+
+    secret = request.headers.get("X-Telegram-Bot-Api-Secret-Token", "")
+    # compare_digest raises TypeError on non-ASCII str, so compare bytes
+    if not hmac.compare_digest(secret.encode(), WEBHOOK_SECRET.encode()):
+        raise HTTPException(status_code=403, detail="Invalid secret token")
+
+    telegram_bot.feed_webhook_update(await request.json())
+    return {"ok": True}
 
 async def main() -> None:
-    # Start FastAPI server in a separate thread for Render.com
-    fastapi_thread = threading.Thread(target=run_fastapi, daemon=True)
-    fastapi_thread.start()
-    print(f"FastAPI server starting on port {os.getenv('PORT', 8000)}")
-    
-    # Initialize and start Telegram bot
-    telegram_bot = TelegramBot()
-    await telegram_bot.start_polling()
+    # One event loop hosts uvicorn and the Telegram bot; the lifespan starts and stops the bot
+    port = int(os.getenv("PORT", 8000))
+    server = uvicorn.Server(uvicorn.Config(app, host="0.0.0.0", port=port, log_level="info", log_config=None))
+    mode = "webhook" if WEBHOOK_URL else "polling"
+    logger.info(f"FastAPI server starting on port {port} ({mode} mode)")
+    watch_task = asyncio.create_task(mark_health_ready(server))
+    try:
+        await server.serve()
+    finally:
+        watch_task.cancel()
+
+async def mark_health_ready(server: uvicorn.Server) -> None:
+    """Record when uvicorn starts accepting connections"""
+    while not server.started:
+        await asyncio.sleep(0.01)
+    startup_timing.mark("health_ready")
 
 if __name__ == "__main__":
-    logging.basicConfig(level=logging.INFO, stream=sys.stdout)
-    asyncio.run(main())
\ No newline at end of file
+    configure_logging()
+    asyncio.run(main())
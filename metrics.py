@@ -0,0 +1,226 @@
+import functools
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+
+# Booking stages take from milliseconds (script calls) to tens of seconds (page loads)
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 3, 5, 8, 13, 21, 34, 60)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values))
+    if extra is not None:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        return self._values.get(key, 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative histogram of observed durations, with optional labels."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts, then sum and count
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (bucket_counts, total, count) in sorted(self._series.items()):
+                for bound, bucket_count in zip(self.buckets, bucket_counts):
+                    labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                    lines.append(f"{self.name}_bucket{labels} {bucket_count}")
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Gauge:
+    """Gauge whose value is read from a callback at scrape time."""
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], float]):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        try:
+            value = self.callback()
+        except Exception:
+            return lines
+        if value is not None:
+            lines.append(f"{self.name} {_format_value(value)}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def gauge(self, name: str, documentation: str, callback: Callable[[], float]) -> Gauge:
+        """Register (or replace) a callback gauge."""
+        return self.register(Gauge(name, documentation, callback))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+stage_seconds = registry.register(Histogram(
+    "booking_stage_seconds",
+    "Wall time of each booking pipeline stage",
+    labelnames=("stage",)
+))
+stage_total = registry.register(Counter(
+    "booking_stage_total",
+    "Booking pipeline stage runs by outcome",
+    labelnames=("stage", "outcome")
+))
+fallback_hits = registry.register(Counter(
+    "booking_fallback_selector_total",
+    "Times a fallback selector had to be used",
+    labelnames=("stage", "selector")
+))
+webdriver_round_trips = registry.register(Counter(
+    "booking_slot_extraction_round_trips_total",
+    "WebDriver round trips spent extracting time slots",
+    labelnames=("path",)
+))
+single_flight_calls = registry.register(Counter(
+    "single_flight_calls_total",
+    "Coalesced lookups by whether they ran or shared an in-flight call",
+    labelnames=("name", "result")
+))
+page_load_requests = registry.register(Counter(
+    "booking_page_requests_total",
+    "Network requests of booking page loads by outcome; blocked_unsized are blocked requests "
+    "whose size was never measured in audit mode",
+    labelnames=("outcome",)
+))
+page_load_bytes = registry.register(Counter(
+    "booking_page_bytes_total",
+    "Bytes of booking page loads: loaded, saved by blocking, or blockable in audit mode",
+    labelnames=("outcome",)
+))
+profile_leases = registry.register(Counter(
+    "browser_profile_leases_total",
+    "Browser profile slots handed to new drivers, by whether their disk cache was warm",
+    labelnames=("cache",)
+))
+booking_admissions = registry.register(Counter(
+    "booking_admissions_total",
+    "Booking sessions admitted immediately, queued, or rejected by admission control",
+    labelnames=("result",)
+))
+selector_lookups = registry.register(Counter(
+    "selector_cache_lookups_total",
+    "Fallback-chain steps by whether the first locator tried (the cached winner) worked",
+    labelnames=("step", "result")
+))
+
+
+def record_fallback(stage: str, selector: str) -> None:
+    """Count a hit on a fallback selector of a stage."""
+    fallback_hits.inc(stage=stage, selector=selector)
+
+
+def instrument_stage(stage: str, check_result: bool = True):
+    """
+    Decorator timing a booking stage and counting its outcome.
+
+    A stage fails if it raises or, when check_result is set, returns a falsy
+    value (False, None or an empty list), which is how the service functions
+    report failure.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.monotonic()
+            outcome = "failure"
+            try:
+                result = func(*args, **kwargs)
+                if result or not check_result:
+                    outcome = "success"
+                return result
+            except Exception:
+                outcome = "error"
+                raise
+            finally:
+                stage_seconds.observe(time.monotonic() - start, stage=stage)
+                stage_total.inc(stage=stage, outcome=outcome)
+        return wrapper
+    return decorator
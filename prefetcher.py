@@ -0,0 +1,115 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import date
+from typing import Optional
+
+import browser_stack
+from admission import DriverReserve
+from tracing import span, start_trace
+
+
+logger = logging.getLogger(__name__)
+
+
+class MonthPrefetcher:
+    """
+    Background sweep that fills the availability cache for the whole month.
+
+    One page load covers every day the date picker marks as available, so
+    /book for any of those days is answered from memory instead of a
+    separate browser session per request.
+    """
+
+    def __init__(self, workers, driver_pool, cache, interval: Optional[float] = None,
+                 reserve: Optional[DriverReserve] = None):
+        """
+        Args:
+            workers: BrowserWorkerPool running the blocking sweep
+            driver_pool: DriverPool providing the browser session
+            cache: AvailabilityCache used as the date -> slots index
+            interval: Seconds between sweeps, defaults to PREFETCH_INTERVAL_SECONDS or 300
+            reserve: Drivers kept back from bookings; the sweep takes one as background work
+        """
+        self.workers = workers
+        self.driver_pool = driver_pool
+        self.cache = cache
+        self.interval = interval or float(os.getenv("PREFETCH_INTERVAL_SECONDS", 300))
+        self.reserve = reserve or DriverReserve(1)
+
+        self._task: Optional[asyncio.Task] = None
+        self.sweeps = 0
+        self.last_sweep_at: Optional[float] = None
+        self.last_sweep_seconds: Optional[float] = None
+        self.last_sweep_days = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start sweeping in the background on the running event loop."""
+        if not self.running:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Cancel the background sweep loop."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                # Each sweep is its own trace, separate from any booking
+                start_trace()
+                with span("prefetcher.sweep"):
+                    await self.sweep()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ Month prefetch failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def sweep(self) -> int:
+        """
+        Scrape every available day of the month in one page session.
+
+        Returns:
+            int: Number of days stored in the cache
+        """
+        started = time.monotonic()
+        # Background work: lookups for users go first and are never all held up by a sweep
+        async with self.reserve.hold(background=True):
+            driver = await self.driver_pool.acquire_async(timeout=30)
+            reusable = True
+            try:
+                service = await browser_stack.ready()
+                availability = await self.workers.run(service.get_month_availability, driver, timeout=25)
+            except Exception:
+                reusable = False
+                raise
+            finally:
+                await self.workers.run_cleanup(self.driver_pool.release, driver, reusable)
+
+        if availability is None:
+            return 0
+
+        today = date.today()
+        for day, time_slots in availability.items():
+            try:
+                self.cache.put(today.replace(day=day), time_slots)
+            except ValueError:
+                continue
+
+        self.sweeps += 1
+        self.last_sweep_at = time.time()
+        self.last_sweep_seconds = time.monotonic() - started
+        self.last_sweep_days = len(availability)
+        logger.info(f"🗓️ Prefetched {self.last_sweep_days} days in {self.last_sweep_seconds:.1f}s")
+        return self.last_sweep_days
@@ -0,0 +1,101 @@
+import os
+from typing import Dict, Iterable, List, Optional
+
+
+def _read_ppid_and_rss(pid: int):
+    """Return (parent pid, RSS bytes) of a process from /proc, or None if it is gone."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            stat = f.read()
+        # The command name may contain spaces, so split after the closing parenthesis
+        fields = stat[stat.rindex(")") + 2:].split()
+        ppid = int(fields[1])
+        rss_pages = int(fields[21])
+    except (OSError, ValueError, IndexError):
+        return None
+    return ppid, rss_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def process_age() -> float:
+    """Seconds since this process started, from /proc (0.0 where unavailable)."""
+    try:
+        with open("/proc/self/stat") as f:
+            stat = f.read()
+        start_ticks = int(stat[stat.rindex(")") + 2:].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return 0.0
+    return max(0.0, uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+
+
+def _process_table() -> Dict[int, tuple]:
+    table = {}
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return table
+    for entry in entries:
+        if entry.isdigit():
+            info = _read_ppid_and_rss(int(entry))
+            if info is not None:
+                table[int(entry)] = info
+    return table
+
+
+def process_tree_rss(root_pids: Iterable[int], table: Optional[Dict[int, tuple]] = None) -> int:
+    """
+    Sum the RSS of the given processes and all of their descendants.
+
+    Args:
+        root_pids: Process ids to start from, e.g. chromedriver pids
+        table: Pre-read process table, to avoid re-scanning /proc for several calls
+
+    Returns:
+        int: Total resident memory in bytes (0 where /proc is unavailable)
+    """
+    table = table if table is not None else _process_table()
+    children: Dict[int, List[int]] = {}
+    for pid, (ppid, _) in table.items():
+        children.setdefault(ppid, []).append(pid)
+
+    total = 0
+    seen = set()
+    stack = [pid for pid in root_pids if pid in table]
+    while stack:
+        pid = stack.pop()
+        if pid in seen:
+            continue
+        seen.add(pid)
+        total += table[pid][1]
+        stack.extend(children.get(pid, []))
+    return total
+
+
+def driver_pid(driver) -> Optional[int]:
+    """Process id of the chromedriver behind a Selenium driver, if known."""
+    try:
+        return driver.service.process.pid
+    except AttributeError:
+        return None
+
+
+def drivers_rss(drivers: Iterable) -> int:
+    """
+    Resident memory held by chromedriver and its Chromium processes.
+
+    Args:
+        drivers: Selenium drivers
+
+    Returns:
+        int: Total RSS in bytes
+    """
+    pids = [pid for pid in (driver_pid(d) for d in drivers) if pid is not None]
+    if not pids:
+        return 0
+    return process_tree_rss(pids)
+
+
+def format_bytes(value: int) -> str:
+    """Human readable size, e.g. "182.4 MB"."""
+    return f"{value / (1024 * 1024):.1f} MB"
@@ -0,0 +1,221 @@
+import json
+import logging
+import os
+import re
+import threading
+from typing import Dict, List, Optional
+
+from metrics import page_load_bytes, page_load_requests
+from procstats import format_bytes
+
+
+logger = logging.getLogger(__name__)
+
+
+# URL patterns the booking flow never needs, tuned to the office365 Bookings page.
+# Chromium matches them with "*" wildcards against the full request URL.
+DEFAULT_BLOCKLIST = [
+    # Images and icons; the flow only reads text and aria-labels
+    "*.png", "*.png?*", "*.jpg", "*.jpg?*", "*.jpeg", "*.jpeg?*", "*.gif", "*.gif?*",
+    "*.webp", "*.webp?*", "*.ico", "*.ico?*", "*.svg", "*.svg?*",
+    # Web fonts, including the Fabric/Fluent icon fonts served from the Office CDN
+    "*.woff", "*.woff?*", "*.woff2", "*.woff2?*", "*.ttf", "*.ttf?*", "*.otf", "*.eot",
+    "*/fabric/assets/fonts/*", "*/fabric-cdn-prod*/fonts/*",
+    # Media
+    "*.mp4", "*.webm", "*.mp3",
+    # Microsoft telemetry (1DS/Aria, Application Insights) and third-party analytics
+    "*.events.data.microsoft.com/*", "*browser.pipe.aria.microsoft.com/*",
+    "*js.monitor.azure.com/*", "*dc.services.visualstudio.com/*",
+    "*.applicationinsights.azure.com/*", "*c.s-microsoft.com/*", "*c.bing.com/*",
+    "*bat.bing.com/*", "*clarity.ms/*", "*google-analytics.com/*", "*googletagmanager.com/*",
+]
+
+# Most request sizes kept from audit mode
+MAX_OBSERVED_SIZES = 500
+
+# Sizes of requests seen in audit mode, by URL without its query, used to estimate
+# what blocking them saves. Persisted so "on" mode can use them after a restart.
+_observed_sizes: Optional[Dict[str, int]] = None
+_sizes_lock = threading.Lock()
+
+
+def mode() -> str:
+    """
+    RESOURCE_BLOCKING: "on" (default) blocks the blocklist, "audit" only reports
+    what would be blocked and its size, "off" leaves the page untouched.
+    """
+    value = os.getenv("RESOURCE_BLOCKING", "on").lower()
+    return value if value in ("on", "audit", "off") else "on"
+
+
+def blocklist() -> List[str]:
+    """The default blocklist plus comma-separated RESOURCE_BLOCKLIST_EXTRA patterns."""
+    extra = [p.strip() for p in os.getenv("RESOURCE_BLOCKLIST_EXTRA", "").split(",") if p.strip()]
+    return DEFAULT_BLOCKLIST + extra
+
+
+def _pattern_regex(patterns: List[str]):
+    """Regex equivalent of Chromium's "*" wildcard URL patterns."""
+    parts = [re.escape(pattern).replace(r"\*", ".*") for pattern in patterns]
+    return re.compile("|".join(f"(?:{part})" for part in parts))
+
+
+def _size_key(url: str) -> str:
+    return url.split("?", 1)[0]
+
+
+def _sizes_path() -> str:
+    """RESOURCE_SIZES_PATH or ~/.cache/squash-bot/resource-sizes.json; "off" keeps sizes in memory only."""
+    return os.getenv("RESOURCE_SIZES_PATH") or os.path.join(
+        os.path.expanduser("~"), ".cache", "squash-bot", "resource-sizes.json"
+    )
+
+
+def _load_sizes() -> Dict[str, int]:
+    """The audit sizes, read from disk on first use. Call with _sizes_lock held."""
+    global _observed_sizes
+    if _observed_sizes is not None:
+        return _observed_sizes
+    _observed_sizes = {}
+    path = _sizes_path()
+    if path == "off":
+        return _observed_sizes
+    try:
+        with open(path) as f:
+            sizes = json.load(f).get('sizes', {})
+        _observed_sizes.update({url: int(size) for url, size in sizes.items()})
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError, TypeError, AttributeError) as e:
+        logger.warning(f"⚠️ Ignoring unreadable request sizes {path}: {e}")
+    return _observed_sizes
+
+
+def _record_sizes(measured: Dict[str, int]) -> None:
+    """Remember sizes measured in audit mode and write them to disk atomically."""
+    with _sizes_lock:
+        sizes = _load_sizes()
+        for url, size in measured.items():
+            # Most recently seen last, so the oldest are dropped first
+            sizes.pop(url, None)
+            sizes[url] = size
+        while len(sizes) > MAX_OBSERVED_SIZES:
+            del sizes[next(iter(sizes))]
+        payload = json.dumps({'sizes': sizes}, indent=2)
+    path = _sizes_path()
+    if path == "off":
+        return
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(temp_path, "w") as f:
+            f.write(payload + "\n")
+        os.replace(temp_path, path)
+    except OSError as e:
+        logger.warning(f"⚠️ Could not save request sizes to {path}: {e}")
+
+
+def configure_options(chrome_options) -> None:
+    """
+    Add the browser options the policy needs before the driver starts.
+
+    Images are also blocked by content setting, which catches images whose
+    URLs have no telling extension. Chromium ignores --disable-images.
+    """
+    if mode() == "on":
+        chrome_options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+        })
+    if mode() != "off":
+        # Network events from the DevTools protocol, read back after each page load
+        chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        chrome_options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
+
+
+def apply(driver) -> None:
+    """Install the URL blocklist on a freshly started driver."""
+    if mode() != "on":
+        return
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": blocklist()})
+    except Exception as e:
+        logger.warning(f"⚠️ Could not install the request blocklist: {e}")
+
+
+def page_load_report(driver) -> Optional[Dict[str, int]]:
+    """
+    Summarize the network activity since the last report and record it on /metrics.
+
+    Blocked requests never download, so what blocking saved is estimated from
+    the sizes the same URLs had in audit mode, persisted across restarts.
+    Blocked requests never seen in audit mode are counted as of unknown size
+    rather than as 0 bytes.
+
+    Returns:
+        Dict[str, int]: requests and bytes loaded, requests blocked, the bytes
+            blocking saved (measured in audit mode, estimated from audit sizes
+            otherwise) and blocked requests of unknown size, or None if network
+            events are not being collected
+    """
+    if mode() == "off":
+        return None
+    try:
+        entries = driver.get_log("performance")
+    except Exception:
+        return None
+
+    matcher = _pattern_regex(blocklist())
+    urls: Dict[str, str] = {}
+    report = {'requests': 0, 'bytes': 0, 'blocked_requests': 0, 'bytes_saved': 0, 'unsized_blocked': 0}
+    measured: Dict[str, int] = {}
+    with _sizes_lock:
+        known_sizes = dict(_load_sizes())
+    for entry in entries:
+        try:
+            message = json.loads(entry["message"])["message"]
+        except (KeyError, ValueError, TypeError):
+            continue
+        method, params = message.get("method"), message.get("params", {})
+        if method == "Network.requestWillBeSent":
+            urls[params.get("requestId")] = params.get("request", {}).get("url", "")
+        elif method == "Network.loadingFinished":
+            url = urls.get(params.get("requestId"), "")
+            size = int(params.get("encodedDataLength", 0))
+            report['requests'] += 1
+            report['bytes'] += size
+            if mode() == "audit" and url and matcher.fullmatch(url):
+                # Would have been blocked
+                measured[_size_key(url)] = size
+                report['blocked_requests'] += 1
+                report['bytes_saved'] += size
+        elif method == "Network.loadingFailed":
+            if params.get("blockedReason") or "ERR_BLOCKED_BY_CLIENT" in params.get("errorText", ""):
+                url = urls.get(params.get("requestId"), "")
+                report['blocked_requests'] += 1
+                size = known_sizes.get(_size_key(url))
+                if size is None:
+                    report['unsized_blocked'] += 1
+                else:
+                    report['bytes_saved'] += size
+    if measured:
+        _record_sizes(measured)
+
+    page_load_requests.inc(report['requests'], outcome="loaded")
+    page_load_requests.inc(report['blocked_requests'], outcome="blocked" if mode() == "on" else "blockable")
+    page_load_requests.inc(report['unsized_blocked'], outcome="blocked_unsized")
+    page_load_bytes.inc(report['bytes'], outcome="loaded")
+    page_load_bytes.inc(report['bytes_saved'], outcome="saved" if mode() == "on" else "blockable")
+
+    if mode() == "on" and report['unsized_blocked'] == report['blocked_requests'] > 0:
+        saved = (f"{report['blocked_requests']} blocked (bytes saved unknown: "
+                 f"run RESOURCE_BLOCKING=audit once to measure them)")
+    elif mode() == "on" and report['unsized_blocked']:
+        saved = (f"{report['blocked_requests']} blocked (~{format_bytes(report['bytes_saved'])} saved, "
+                 f"{report['unsized_blocked']} of unknown size)")
+    elif mode() == "on":
+        saved = f"{report['blocked_requests']} blocked (~{format_bytes(report['bytes_saved'])} saved)"
+    else:
+        saved = f"{report['blocked_requests']} blockable ({format_bytes(report['bytes_saved'])} would be saved)"
+    logger.info(f"🧱 Page load: {report['requests']} requests, {format_bytes(report['bytes'])} loaded, {saved}")
+    return report
@@ -0,0 +1,128 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from metrics import selector_lookups
+
+
+logger = logging.getLogger(__name__)
+
+
+class SelectorCache:
+    """
+    Remembers which locator of a fallback chain worked last, per booking step.
+
+    Steps such as the Squash Court click try a list of locators in order,
+    and fallbacks further down the list wait seconds each before giving up.
+    After a page redesign every booking would pay for the dead locators
+    again, so the chain is reordered to try the last winner first. Winners
+    and hit counts are persisted to a small JSON file, so a restart does not
+    have to relearn them. A hit is a step whose first locator tried worked.
+    """
+
+    def __init__(self, path: Optional[str] = None, save_interval: float = 60):
+        """
+        Args:
+            path: JSON file the cache is persisted to, defaults to SELECTOR_CACHE_PATH
+                or ~/.cache/squash-bot/selectors.json; "off" keeps it in memory only
+            save_interval: Minimum seconds between saves that only update hit counts
+        """
+        self.path = path or os.getenv("SELECTOR_CACHE_PATH") or os.path.join(
+            os.path.expanduser("~"), ".cache", "squash-bot", "selectors.json"
+        )
+        self.save_interval = save_interval
+
+        self._lock = threading.Lock()
+        self._steps: Optional[Dict[str, Dict]] = None
+        self._last_save = 0.0
+
+    def _load(self) -> Dict[str, Dict]:
+        """Read the persisted steps on first use. Call with the lock held."""
+        if self._steps is not None:
+            return self._steps
+        self._steps = {}
+        if self.path == "off":
+            return self._steps
+        try:
+            with open(self.path) as f:
+                steps = json.load(f).get('steps', {})
+        except FileNotFoundError:
+            return self._steps
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"⚠️ Ignoring unreadable selector cache {self.path}: {e}")
+            return self._steps
+        for step, entry in steps.items():
+            if isinstance(entry, dict) and isinstance(entry.get('winner'), str):
+                self._steps[step] = {
+                    'winner': entry['winner'],
+                    'hits': int(entry.get('hits', 0)),
+                    'misses': int(entry.get('misses', 0)),
+                }
+        logger.debug(f"Loaded selector cache with {len(self._steps)} steps from {self.path}")
+        return self._steps
+
+    def order(self, step: str, locators: List[str]) -> List[str]:
+        """
+        The locator names of a step, last winner first and the rest in their original order.
+
+        A winner that is no longer in the list (the code changed) is ignored.
+        """
+        with self._lock:
+            entry = self._load().get(step)
+        if entry is None or entry['winner'] not in locators or entry['winner'] == locators[0]:
+            return list(locators)
+        return [entry['winner']] + [locator for locator in locators if locator != entry['winner']]
+
+    def record(self, step: str, locator: str, tried_first: bool) -> None:
+        """
+        Record the locator that worked for a step.
+
+        Args:
+            step: Booking step, e.g. "squash_court_click"
+            locator: Name of the locator that found the element, e.g. "div_text"
+            tried_first: Whether it was the first locator tried, i.e. a hit
+        """
+        with self._lock:
+            steps = self._load()
+            entry = steps.setdefault(step, {'winner': locator, 'hits': 0, 'misses': 0})
+            entry['hits' if tried_first else 'misses'] += 1
+            changed = entry['winner'] != locator
+            entry['winner'] = locator
+            due = changed or time.monotonic() - self._last_save >= self.save_interval
+        selector_lookups.inc(step=step, result="hit" if tried_first else "miss")
+        if changed:
+            logger.info(f"🧭 {step}: trying {locator} first from now on")
+        if due:
+            self.save()
+
+    def save(self) -> None:
+        """Write the cache to disk atomically, if anything was loaded or learned."""
+        if self.path == "off" or self._steps is None:
+            return
+        with self._lock:
+            payload = json.dumps({'steps': self._steps}, indent=2)
+            self._last_save = time.monotonic()
+        temp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(temp_path, "w") as f:
+                f.write(payload + "\n")
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            logger.warning(f"⚠️ Could not save the selector cache to {self.path}: {e}")
+
+    def stats(self) -> Dict[str, Dict]:
+        """Winner, hits, misses and hit rate per step."""
+        with self._lock:
+            steps = {step: dict(entry) for step, entry in self._load().items()}
+        for entry in steps.values():
+            total = entry['hits'] + entry['misses']
+            entry['hit_rate'] = round(entry['hits'] / total, 3) if total else None
+        return steps
+
+
+# Shared by every driver thread
+selector_cache = SelectorCache()
@@ -1,3 +1,5 @@
+import logging
+import os
 import time
 import sys
 from selenium import webdriver
@@ -7,24 +9,173 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from typing import List, Dict, Optional
+import resource_policy
+from metrics import instrument_stage, record_fallback, webdriver_round_trips
+from booking_details import default_user_data
+from selector_cache import selector_cache
+from tracing import traced
+from waits import (
+    wait_for,
+    reset_stage_waits,
+    format_stage_waits,
+    date_picker_ready,
+    time_picker_populated,
+    time_picker_refreshed,
+    mark_time_picker_stale,
+    booking_form_visible,
+    slot_selected
+)
 
 
-# Default user data for form filling
-default_user_data = {
-    'first_and_surname': 'Oleksii Matiunin',
-    'email': 'matalexnin@gmail.com',
-    'address': '78 Curzon street, Reading, UK',
-    'phone_number': '07423624106',
-    'special_requests': 'Automated booking via Telegram bot',
-    'membership_number': '8060',
-    'opponent_name': '-'
+logger = logging.getLogger(__name__)
+
+# Booking form fields: user_data key, name for logs, and XPath locators in order
+# of preference with the fallback name recorded when that locator is the one used
+FORM_FIELDS = [
+    ('first_and_surname', "first and surname", [("//input[@placeholder='First and surname']", None)]),
+    ('email', "email", [("//input[@type='email'][@placeholder='Email']", None)]),
+    ('address', "address", [("//input[@placeholder='Address']", None)]),
+    ('phone_number', "phone number", [("//input[@type='tel'][@placeholder='Add your phone number']", None)]),
+    ('special_requests', "special requests", [("//textarea[@placeholder='Add any special requests']", None)]),
+    ('membership_number', "membership number", [
+        ("//input[@aria-labelledby='TextFieldLabel69']", None),
+        ("//label[contains(text(), 'Membership Number')]/following-sibling::div//input", "membership_label"),
+    ]),
+    ('opponent_name', "opponent's name", [
+        ("//input[@aria-labelledby='TextFieldLabel74']", None),
+        ("//label[contains(text(), 'Opponent')]/following-sibling::div//input", "opponent_label"),
+    ]),
+]
+CONSENT_LOCATORS = [
+    ("//*[@id='consentCheckBox']", None),
+    ("//input[@type='checkBox'][@id='consentCheckBox']", "consent_xpath"),
+]
+
+# Fills every field in one WebDriver round trip. Values go through the native
+# value setter and input/change events so the page's framework sees them, and
+# each field is read back in the same call.
+FILL_FORM_SCRIPT = """
+function find(xpaths) {
+    for (let i = 0; i < xpaths.length; i++) {
+        const node = document.evaluate(xpaths[i], document, null,
+            XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        if (node) { return [node, i]; }
+    }
+    return [null, -1];
 }
+const results = {};
+arguments[0].forEach(function (field) {
+    const found = find(field.xpaths);
+    const el = found[0];
+    if (!el) {
+        results[field.key] = {ok: false, locator: -1, error: 'not found'};
+        return;
+    }
+    try {
+        if (field.checkbox) {
+            if (!el.checked) { el.click(); }
+            results[field.key] = {ok: el.checked === true, locator: found[1]};
+            return;
+        }
+        const proto = el instanceof HTMLTextAreaElement ? HTMLTextAreaElement.prototype : HTMLInputElement.prototype;
+        el.focus();
+        Object.getOwnPropertyDescriptor(proto, 'value').set.call(el, field.value);
+        el.dispatchEvent(new Event('input', {bubbles: true}));
+        el.dispatchEvent(new Event('change', {bubbles: true}));
+        el.blur();
+        results[field.key] = {ok: el.value === field.value, locator: found[1]};
+    } catch (e) {
+        results[field.key] = {ok: false, locator: found[1], error: String(e)};
+    }
+});
+return results;
+"""
+
+
+def _fill_form_with_script(driver, user_data: Dict[str, str]) -> List[str]:
+    """
+    Fill and verify every form field with a single execute_script call.
+    
+    Returns:
+        List[str]: Keys of the fields that were not filled (every field if the script failed)
+    """
+    fields = [
+        {'key': key, 'xpaths': [xpath for xpath, _ in locators], 'value': user_data.get(key, '')}
+        for key, _, locators in FORM_FIELDS
+    ]
+    fields.append({'key': 'consent', 'xpaths': [xpath for xpath, _ in CONSENT_LOCATORS], 'checkbox': True})
+    all_keys = [field['key'] for field in fields]
+    
+    try:
+        results = driver.execute_script(FILL_FORM_SCRIPT, fields)
+    except Exception as e:
+        logger.warning(f"⚠️ Scripted form fill failed: {e}")
+        return all_keys
+    if not isinstance(results, dict):
+        return all_keys
+    
+    locators_by_key = {key: locators for key, _, locators in FORM_FIELDS}
+    locators_by_key['consent'] = CONSENT_LOCATORS
+    failed = []
+    for key in all_keys:
+        result = results.get(key) or {}
+        if not result.get('ok'):
+            logger.debug(f"Scripted fill missed {key}: {result.get('error', 'value not set')}")
+            failed.append(key)
+            continue
+        locator = result.get('locator', 0)
+        if locator > 0:
+            record_fallback("form_fill", locators_by_key[key][locator][1])
+    return failed
 
 
+def _fill_field(driver, label: str, locators, value: str) -> bool:
+    """Fill one field with WebDriver calls, trying its locators in order."""
+    errors = []
+    for xpath, fallback in locators:
+        try:
+            field = driver.find_element(By.XPATH, xpath)
+            if fallback:
+                record_fallback("form_fill", fallback)
+            field.clear()
+            field.send_keys(value)
+            logger.debug(f"✅ Filled {label}: {value}")
+            return True
+        except Exception as e:
+            errors.append(str(e))
+    logger.warning(f"❌ Error filling {label}: {', '.join(errors)}")
+    return False
+
+
+def _check_consent(driver) -> bool:
+    """Tick the data privacy consent checkbox with WebDriver calls."""
+    errors = []
+    for xpath, fallback in CONSENT_LOCATORS:
+        try:
+            consent_checkbox = driver.find_element(By.XPATH, xpath)
+            if fallback:
+                record_fallback("form_fill", fallback)
+            if not consent_checkbox.is_selected():
+                consent_checkbox.click()
+                logger.debug("✅ Checked consent checkbox for data privacy policy")
+            else:
+                logger.debug("✅ Consent checkbox was already checked")
+            return True
+        except Exception as e:
+            errors.append(str(e))
+    logger.warning(f"❌ Error checking consent checkbox: {', '.join(errors)}")
+    return False
+
+
+@traced()
+@instrument_stage("form_fill")
 def fill_booking_form(driver, user_data: Dict[str, str] = None) -> bool:
     """
     Fill out the booking form with user details after time slot selection.
     
+    Every field is filled and verified in one script call; only fields the
+    script could not fill go through the slower per-field WebDriver path.
+    
     Args:
         driver: Selenium WebDriver instance
         user_data: Dictionary containing user details, defaults to default_user_data
@@ -36,119 +187,33 @@ def fill_booking_form(driver, user_data: Dict[str, str] = None) -> bool:
         user_data = default_user_data
     
     try:
-        print("Filling out booking form...")
+        logger.debug("Filling out booking form...")
         
         # Wait for the form to be visible
         form_heading = WebDriverWait(driver, 10).until(
             EC.presence_of_element_located((By.XPATH, "//span[contains(text(), 'Add your details')]"))
         )
-        print("Form found, filling fields...")
-        
-        # Fill First and surname
-        try:
-            first_name_field = driver.find_element(By.XPATH, "//input[@placeholder='First and surname']")
-            first_name_field.clear()
-            first_name_field.send_keys(user_data.get('first_and_surname', ''))
-            print(f"✅ Filled first and surname: {user_data.get('first_and_surname', '')}")
-        except Exception as e:
-            print(f"❌ Error filling first and surname: {e}")
-        
-        # Fill Email
-        try:
-            email_field = driver.find_element(By.XPATH, "//input[@type='email'][@placeholder='Email']")
-            email_field.clear()
-            email_field.send_keys(user_data.get('email', ''))
-            print(f"✅ Filled email: {user_data.get('email', '')}")
-        except Exception as e:
-            print(f"❌ Error filling email: {e}")
-        
-        # Fill Address (optional)
-        try:
-            address_field = driver.find_element(By.XPATH, "//input[@placeholder='Address']")
-            address_field.clear()
-            address_field.send_keys(user_data.get('address', ''))
-            print(f"✅ Filled address: {user_data.get('address', '')}")
-        except Exception as e:
-            print(f"❌ Error filling address: {e}")
+        logger.debug("Form found, filling fields...")
         
-        # Fill Phone number
-        try:
-            phone_field = driver.find_element(By.XPATH, "//input[@type='tel'][@placeholder='Add your phone number']")
-            phone_field.clear()
-            phone_field.send_keys(user_data.get('phone_number', ''))
-            print(f"✅ Filled phone number: {user_data.get('phone_number', '')}")
-        except Exception as e:
-            print(f"❌ Error filling phone number: {e}")
-        
-        # Fill Special requests (optional)
-        try:
-            notes_field = driver.find_element(By.XPATH, "//textarea[@placeholder='Add any special requests']")
-            notes_field.clear()
-            notes_field.send_keys(user_data.get('special_requests', ''))
-            print(f"✅ Filled special requests: {user_data.get('special_requests', '')}")
-        except Exception as e:
-            print(f"❌ Error filling special requests: {e}")
-        
-        # Fill Membership Number
-        try:
-            membership_field = driver.find_element(By.XPATH, "//input[@aria-labelledby='TextFieldLabel69']")
-            membership_field.clear()
-            membership_field.send_keys(user_data.get('membership_number', ''))
-            print(f"✅ Filled membership number: {user_data.get('membership_number', '')}")
-        except Exception as e:
-            # Try alternative selector based on label text
-            try:
-                membership_field = driver.find_element(By.XPATH, "//label[contains(text(), 'Membership Number')]/following-sibling::div//input")
-                membership_field.clear()
-                membership_field.send_keys(user_data.get('membership_number', ''))
-                print(f"✅ Filled membership number: {user_data.get('membership_number', '')}")
-            except Exception as e2:
-                print(f"❌ Error filling membership number: {e}, {e2}")
+        failed = _fill_form_with_script(driver, user_data)
+        if failed:
+            logger.debug(f"Falling back to per-field filling for: {', '.join(failed)}")
+        for key, label, locators in FORM_FIELDS:
+            if key in failed:
+                record_fallback("form_fill", f"per_field_{key}")
+                _fill_field(driver, label, locators, user_data.get(key, ''))
+        if 'consent' in failed:
+            record_fallback("form_fill", "per_field_consent")
+            _check_consent(driver)
         
-        # Fill Opponent's Name
-        try:
-            opponent_field = driver.find_element(By.XPATH, "//input[@aria-labelledby='TextFieldLabel74']")
-            opponent_field.clear()
-            opponent_field.send_keys(user_data.get('opponent_name', ''))
-            print(f"✅ Filled opponent's name: {user_data.get('opponent_name', '')}")
-        except Exception as e:
-            # Try alternative selector based on label text
-            try:
-                opponent_field = driver.find_element(By.XPATH, "//label[contains(text(), 'Opponent')]/following-sibling::div//input")
-                opponent_field.clear()
-                opponent_field.send_keys(user_data.get('opponent_name', ''))
-                print(f"✅ Filled opponent's name: {user_data.get('opponent_name', '')}")
-            except Exception as e2:
-                print(f"❌ Error filling opponent's name: {e}, {e2}")
-        
-        # Check the consent checkbox
-        try:
-            consent_checkbox = driver.find_element(By.ID, "consentCheckBox")
-            if not consent_checkbox.is_selected():
-                consent_checkbox.click()
-                print("✅ Checked consent checkbox for data privacy policy")
-            else:
-                print("✅ Consent checkbox was already checked")
-        except Exception as e:
-            # Try alternative selector
-            try:
-                consent_checkbox = driver.find_element(By.XPATH, "//input[@type='checkBox'][@id='consentCheckBox']")
-                if not consent_checkbox.is_selected():
-                    consent_checkbox.click()
-                    print("✅ Checked consent checkbox for data privacy policy")
-                else:
-                    print("✅ Consent checkbox was already checked")
-            except Exception as e2:
-                print(f"❌ Error checking consent checkbox: {e}, {e2}")
-        
-        print("✅ Form filling completed successfully!")
+        logger.info("✅ Form filling completed successfully!")
         return True
         
     except TimeoutException:
-        print("❌ Timeout waiting for booking form to appear")
+        logger.warning("❌ Timeout waiting for booking form to appear")
         return False
     except Exception as e:
-        print(f"❌ Error filling booking form: {e}")
+        logger.error(f"❌ Error filling booking form: {e}")
         return False
 
 
@@ -206,28 +271,31 @@ def confirm_booking(preferred_day: int, selected_time_slot: Dict[str, str], user
             print("Invalid input. Please type 'yes' to confirm or 'no' to cancel.")
 
 
-def submit_booking_form(driver) -> bool:
+@traced()
+@instrument_stage("form_submit")
+def submit_booking_form(driver, settle_seconds: float = 3) -> bool:
     """
     Submit the booking form by clicking the Book button.
     
     Args:
         driver: Selenium WebDriver instance
+        settle_seconds (float): Time to wait after the click for the page to send the booking
     
     Returns:
         bool: True if form was successfully submitted, False otherwise
     """
     try:
-        print("Submitting booking form...")
+        logger.debug("Submitting booking form...")
         
         # Click the Book button to submit the form
         try:
             book_button = driver.find_element(By.XPATH, "//button[@type='submit'][@aria-label='Book']")
             book_button.click()
-            print("✅ Clicked 'Book' button to submit the booking!")
+            logger.debug("✅ Clicked 'Book' button to submit the booking!")
             
             # Wait a moment to see any confirmation or next page
-            time.sleep(3)
-            print("✅ Booking submission completed!")
+            time.sleep(settle_seconds)
+            logger.info("✅ Booking submission completed!")
             return True
             
         except Exception as e:
@@ -235,34 +303,39 @@ def submit_booking_form(driver) -> bool:
             try:
                 book_button = driver.find_element(By.CLASS_NAME, "i9DXY")
                 book_button.click()
-                print("✅ Clicked 'Book' button to submit the booking!")
-                time.sleep(3)
-                print("✅ Booking submission completed!")
+                record_fallback("form_submit", "class_name")
+                logger.debug("✅ Clicked 'Book' button to submit the booking!")
+                time.sleep(settle_seconds)
+                logger.info("✅ Booking submission completed!")
                 return True
             except Exception as e2:
                 try:
                     book_button = driver.find_element(By.XPATH, "//button[contains(text(), 'Book')]")
                     book_button.click()
-                    print("✅ Clicked 'Book' button to submit the booking!")
-                    time.sleep(3)
-                    print("✅ Booking submission completed!")
+                    record_fallback("form_submit", "button_text")
+                    logger.debug("✅ Clicked 'Book' button to submit the booking!")
+                    time.sleep(settle_seconds)
+                    logger.info("✅ Booking submission completed!")
                     return True
                 except Exception as e3:
-                    print(f"❌ Error clicking Book button: {e}, {e2}, {e3}")
-                    print("⚠️ Form was filled but booking submission may have failed")
+                    logger.warning(f"❌ Error clicking Book button: {e}, {e2}, {e3}")
+                    logger.warning("⚠️ Form was filled but booking submission may have failed")
                     return False
                     
     except Exception as e:
-        print(f"❌ Error submitting booking form: {e}")
+        logger.error(f"❌ Error submitting booking form: {e}")
         return False
 
 
-def initialize_driver(headless: bool = True):
+@traced()
+def initialize_driver(headless: bool = True, profile=None):
     """
     Initialize and configure Chromium WebDriver with balanced speed and functionality.
     
     Args:
         headless (bool): Whether to run browser in headless mode
+        profile (ProfileLease): Persistent profile slot whose disk cache the browser reuses;
+            a throwaway profile is used when None
     
     Returns:
         webdriver.Chrome: Configured Chromium WebDriver instance optimized for speed
@@ -283,7 +356,6 @@ def initialize_driver(headless: bool = True):
     # Safe speed optimizations (don't disable JS/CSS as they're needed)
     chrome_options.add_argument("--disable-extensions")
     chrome_options.add_argument("--disable-plugins")
-    chrome_options.add_argument("--disable-images")  # Keep this - images not needed for forms
     chrome_options.add_argument("--disable-web-security")
     chrome_options.add_argument("--disable-features=VizDisplayCompositor")
     
@@ -308,6 +380,14 @@ def initialize_driver(headless: bool = True):
     # Keep normal user agent for compatibility
     chrome_options.add_argument("--user-agent=Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
     
+    # Images, fonts and telemetry are blocked by the resource policy instead of --disable-images
+    resource_policy.configure_options(chrome_options)
+    
+    # Persistent profile, so the booking page's scripts and styles come from a warm disk cache
+    if profile is not None:
+        for argument in profile.chrome_arguments():
+            chrome_options.add_argument(argument)
+    
     # Set Chromium binary location
     chrome_options.binary_location = "/usr/bin/chromium"
     
@@ -319,233 +399,600 @@ def initialize_driver(headless: bool = True):
         driver.implicitly_wait(2)  # Slightly longer implicit wait
         driver.set_page_load_timeout(20)  # More generous page load timeout
         driver.set_script_timeout(10)   # Reasonable script timeout
+        resource_policy.apply(driver)
         
         return driver
     except Exception as e:
-        print(f"Error initializing Chromium driver: {e}")
-        print("Make sure Chromium and ChromeDriver are properly installed")
+        logger.error(f"Error initializing Chromium driver: {e}")
+        logger.error("Make sure Chromium and ChromeDriver are properly installed")
         raise
 
 
-def get_squash_court_times(driver, preferred_day: int, timeout: int = 25):
+# Reads every matching slot's properties in a single WebDriver round trip.
+# Mirrors what element.text / tag_name / is_enabled() / is_displayed() return.
+BATCH_EXTRACT_SLOTS_SCRIPT = """
+const elements = document.querySelectorAll(arguments[0]);
+return Array.from(elements).map(function (el) {
+    const style = window.getComputedStyle(el);
+    const rect = el.getBoundingClientRect();
+    const displayed = style.display !== 'none'
+        && style.visibility !== 'hidden'
+        && parseFloat(style.opacity || '1') > 0
+        && (rect.width > 0 || rect.height > 0);
+    return {
+        text: (el.innerText || '').trim(),
+        tag_name: el.tagName.toLowerCase(),
+        is_enabled: !(el.disabled === true || el.closest('fieldset[disabled]')),
+        is_displayed: displayed
+    };
+});
+"""
+
+def _record_round_trips(round_trips: int, batched: bool) -> None:
+    """WebDriver round trips spent on slot extraction, for spotting slow paths on /metrics."""
+    webdriver_round_trips.inc(round_trips, path='batched' if batched else 'per_element')
+    if not batched:
+        record_fallback("slot_extraction", "per_element")
+
+
+def _extract_time_slots_batched(driver, selector: str) -> Optional[List[Dict]]:
     """
-    Navigate to the Caversam Park booking page, click on "Squash Court", 
-    select the preferred date, and return all available time slots.
+    Collect every slot's properties with one execute_script call.
+    
+    Returns:
+        List of raw slot dicts (including ones without text), or None if the script failed
+    """
+    try:
+        raw_slots = driver.execute_script(BATCH_EXTRACT_SLOTS_SCRIPT, selector)
+    except Exception as e:
+        logger.warning(f"⚠️ Batched slot extraction failed: {e}")
+        return None
+    
+    if not isinstance(raw_slots, list):
+        return None
+    return raw_slots
+
+
+def _extract_time_slots_per_element(driver, selector: str):
+    """
+    Collect slot properties element by element (up to four round trips per slot).
+    
+    Returns:
+        Tuple[List[Dict], int]: Raw slot dicts and the WebDriver round trips spent
+    """
+    elements = driver.find_elements(By.CSS_SELECTOR, selector)
+    round_trips = 1
+    raw_slots = []
+    for element in elements:
+        text = element.text.strip()
+        round_trips += 1
+        if not text:
+            raw_slots.append({'text': ''})
+            continue
+        raw_slots.append({
+            'text': text,
+            'tag_name': element.tag_name,
+            'is_enabled': element.is_enabled(),
+            'is_displayed': element.is_displayed()
+        })
+        round_trips += 3
+    return raw_slots, round_trips
+
+
+@traced()
+def extract_time_slots(driver, selector: str):
+    """
+    Extract time slots matching a CSS selector, using a single script round trip
+    when possible and falling back to per-element WebDriver calls.
     
     Args:
-        driver: Pre-initialized Selenium WebDriver instance
-        preferred_day (int): Day of the month (1-31) for booking
-        timeout (int): Maximum time to wait for elements (seconds)
+        driver: Selenium WebDriver instance
+        selector (str): CSS selector for the slot elements
     
     Returns:
-        List[Dict[str, str]]: List of time slots with their properties, or None if failed
+        Tuple[List[Dict], int]: Slots with text, and the number of matched elements
     """
-    try:
-        print("🚀 Loading booking page...")
-        url = "https://outlook.office365.com/book/CaversamParkVillageAssociationMilestoneCentre@cpva.org.uk/?ismsaljsauthenabled=true"
-        driver.get(url)
-        
-        # Wait for page to load with reasonable timeout
-        WebDriverWait(driver, 15).until(
-            EC.any_of(
-                EC.element_to_be_clickable((By.XPATH, "//div[contains(text(), 'Squash Court')]")),
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
+    raw_slots = _extract_time_slots_batched(driver, selector)
+    if raw_slots is not None:
+        round_trips = 1
+        _record_round_trips(round_trips, batched=True)
+    else:
+        raw_slots, round_trips = _extract_time_slots_per_element(driver, selector)
+        _record_round_trips(round_trips, batched=False)
+    
+    if raw_slots:
+        logger.debug(f"⚡ Extracted {len(raw_slots)} elements in {round_trips} WebDriver round trip(s)")
+    
+    time_slots = []
+    for raw_slot in raw_slots:
+        text = (raw_slot.get('text') or '').strip()
+        if text:
+            time_slots.append({
+                'text': text,
+                'tag_name': raw_slot.get('tag_name', ''),
+                'is_enabled': bool(raw_slot.get('is_enabled')),
+                'is_displayed': bool(raw_slot.get('is_displayed')),
+                'attributes': {}
+            })
+    return time_slots, len(raw_slots)
+
+
+# Public Microsoft Bookings page of the Caversham Park Village Association.
+# Override BOOKING_URL to point the selenium engine at the offline replica used by benchmark.py.
+BOOKING_URL = os.getenv(
+    "BOOKING_URL",
+    "https://outlook.office365.com/book/CaversamParkVillageAssociationMilestoneCentre@cpva.org.uk/?ismsaljsauthenabled=true"
+)
+
+# Fallback chains of the page steps, in order of preference, keyed by a short
+# name. selector_cache reorders the names so the locator that worked last is
+# tried first; the names, not the XPaths, label metrics and the cache file.
+SQUASH_COURT_LOCATORS = {
+    "div_text": "//div[contains(text(), 'Squash Court')]",
+    "button_text": "//button[contains(text(), 'Squash Court')]",
+    "link_text": "//a[contains(text(), 'Squash Court')]",
+    "span_text": "//span[contains(text(), 'Squash Court')]",
+}
+# {day} is the day of the month
+DATE_XPATH_PATTERNS = {
+    "picker_button": '//div[@aria-label="Date picker."]//div[@role="button" and text()="{day}"]',
+    "picker_like_button": '//div[contains(@aria-label, "Date picker")]//div[@role="button" and text()="{day}"]',
+    "picker_like_div": '//div[contains(@aria-label, "Date picker")]//div[text()="{day}"]',
+}
+# {slot} is the slot text, e.g. "6:00 pm"
+SLOT_XPATH_PATTERNS = {
+    "label_span": "//div[contains(@aria-label, 'Time picker')]//ul//li//label//span[text()='{slot}']",
+    "item_label_span": "//div[contains(@aria-label, 'Time picker')]//ul//li[.//label//span[text()='{slot}']]",
+    "label_span_contains": "//div[contains(@aria-label, 'Time picker')]//ul//li//label//span[contains(text(), '{slot}')]",
+    "item_span": "//div[contains(@aria-label, 'Time picker')]//ul//li[.//span[text()='{slot}']]",
+    "item_label": "//div[contains(@aria-label, 'Time picker')]//ul//li[.//label[text()='{slot}']]",
+    "item_any": "//div[contains(@aria-label, 'Time picker')]//ul//li[.//*[text()='{slot}']]",
+}
+
+
+@traced()
+def load_booking_page(driver) -> None:
+    """
+    Open the booking page, wait for it to render and report its network activity.
+    
+    Args:
+        driver: Selenium WebDriver instance
+    """
+    _open_booking_page(driver)
+    # Reading the performance log is a round trip of its own: keep it out of the page_load stage
+    resource_policy.page_load_report(driver)
+
+
+@instrument_stage("page_load", check_result=False)
+def _open_booking_page(driver) -> None:
+    """Navigate to the booking page and wait for it to render."""
+    logger.info("🚀 Loading booking page...")
+    driver.get(BOOKING_URL)
+    
+    # Wait for page to load with reasonable timeout
+    WebDriverWait(driver, 15).until(
+        EC.any_of(
+            EC.element_to_be_clickable((By.XPATH, SQUASH_COURT_LOCATORS["div_text"])),
+            EC.presence_of_element_located((By.TAG_NAME, "body"))
         )
-        
-        print("Looking for Squash Court element...")
-        # Try immediate click first, then fallback with wait
-        squash_court_element = None
-        try:
-            # Quick attempt
-            squash_court_element = driver.find_element(By.XPATH, "//div[contains(text(), 'Squash Court')]")
-            if squash_court_element.is_displayed():
-                driver.execute_script("arguments[0].click();", squash_court_element)
-                print("✅ Quick Squash Court click")
-            else:
-                raise Exception("Not visible")
-        except:
-            # Fallback with wait
+    )
+
+
+@traced()
+@instrument_stage("squash_court_click")
+def click_squash_court(driver) -> bool:
+    """
+    Click the "Squash Court" service and wait for the date picker.
+    
+    Args:
+        driver: Selenium WebDriver instance on the booking page
+    
+    Returns:
+        bool: True if the service was clicked, False otherwise
+    """
+    logger.debug("Looking for Squash Court element...")
+    # Last successful locator first; only the first one gets the long wait
+    locators = selector_cache.order("squash_court_click", list(SQUASH_COURT_LOCATORS))
+    clicked = None
+    try:
+        # Quick attempt
+        squash_court_element = driver.find_element(By.XPATH, SQUASH_COURT_LOCATORS[locators[0]])
+        if squash_court_element.is_displayed():
+            driver.execute_script("arguments[0].click();", squash_court_element)
+            clicked = locators[0]
+            logger.debug("✅ Quick Squash Court click")
+    except:
+        pass
+    
+    if clicked is None:
+        # Fallback with wait
+        for i, locator in enumerate(locators):
             try:
-                squash_court_element = WebDriverWait(driver, 10).until(
-                    EC.element_to_be_clickable((By.XPATH, "//div[contains(text(), 'Squash Court')]"))
+                squash_court_element = WebDriverWait(driver, 10 if i == 0 else 3).until(
+                    EC.element_to_be_clickable((By.XPATH, SQUASH_COURT_LOCATORS[locator]))
                 )
                 driver.execute_script("arguments[0].click();", squash_court_element)
-                print("✅ Fallback Squash Court click")
+                clicked = locator
+                record_fallback("squash_court_click", "wait_clickable" if locator == "div_text" else locator)
+                logger.debug(f"✅ Fallback Squash Court click with {locator}")
+                break
             except:
-                # Try alternative selectors
-                fallback_selectors = [
-                    "//button[contains(text(), 'Squash Court')]",
-                    "//a[contains(text(), 'Squash Court')]",
-                    "//span[contains(text(), 'Squash Court')]"
-                ]
-                
-                for selector in fallback_selectors:
-                    try:
-                        squash_court_element = WebDriverWait(driver, 3).until(
-                            EC.element_to_be_clickable((By.XPATH, selector))
-                        )
-                        driver.execute_script("arguments[0].click();", squash_court_element)
-                        print("✅ Alternative selector Squash Court click")
-                        break
-                    except:
-                        continue
-                else:
-                    print("❌ Could not find Squash Court element")
-                    return None
-        
-        # Brief wait after clicking
-        time.sleep(1)
+                continue
+        else:
+            logger.warning("❌ Could not find Squash Court element")
+            return False
+    selector_cache.record("squash_court_click", clicked, tried_first=clicked == locators[0])
+    
+    # Wait until the date picker has rendered after clicking
+    wait_for(driver, date_picker_ready, "date_picker_ready", timeout=5)
+    return True
+
+
+@traced()
+@instrument_stage("date_selection")
+def select_date(driver, preferred_day: int) -> bool:
+    """
+    Click a day in the date picker.
+    
+    Args:
+        driver: Selenium WebDriver instance showing the date picker
+        preferred_day (int): Day of the month (1-31)
+    
+    Returns:
+        bool: True if the day was clicked, False if it is not available
+    """
+    logger.debug(f"🎯 Selecting date: {preferred_day}")
+    # Last successful pattern first
+    patterns = selector_cache.order("date_selection", list(DATE_XPATH_PATTERNS))
+    date_element = None
+    clicked = None
+    try:
+        # Try immediate date selection
+        date_elements = driver.find_elements(By.XPATH, DATE_XPATH_PATTERNS[patterns[0]].replace("{day}", str(preferred_day)))
         
-        print(f"🎯 Selecting date: {preferred_day}")
-        # Date selection with increased timeout
-        date_element = None
+        for element in date_elements:
+            if element.is_displayed() and element.is_enabled():
+                aria_label = element.get_attribute('aria-label') or ''
+                if 'Times available' in aria_label:
+                    date_element = element
+                    break
+                    
+        if date_element:
+            driver.execute_script("arguments[0].click();", date_element)
+            clicked = patterns[0]
+            logger.debug("✅ Quick date selection")
+        else:
+            raise Exception("Date not immediately available")
+            
+    except:
+        # Fallback with proper wait for date picker
         try:
-            # Try immediate date selection
-            date_elements = driver.find_elements(
-                By.XPATH, 
-                f'//div[@aria-label="Date picker."]//div[@role="button" and text()="{preferred_day}"]'
+            logger.debug("Waiting for date picker...")
+            WebDriverWait(driver, 8).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, 'div[aria-label="Date picker."]'))
             )
             
-            for element in date_elements:
-                if element.is_displayed() and element.is_enabled():
-                    aria_label = element.get_attribute('aria-label') or ''
-                    if 'Times available' in aria_label:
-                        date_element = element
+            # Try multiple XPath patterns for date selection
+            for pattern in patterns:
+                try:
+                    date_elements = driver.find_elements(By.XPATH, DATE_XPATH_PATTERNS[pattern].replace("{day}", str(preferred_day)))
+                    for element in date_elements:
+                        aria_label = element.get_attribute('aria-label') or ''
+                        if 'Times available' in aria_label or element.is_enabled():
+                            driver.execute_script("arguments[0].click();", element)
+                            record_fallback("date_selection", pattern)
+                            logger.debug("✅ Fallback date selection")
+                            date_element = element
+                            clicked = pattern
+                            break
+                    if date_element:
                         break
-                        
-            if date_element:
-                driver.execute_script("arguments[0].click();", date_element)
-                print("✅ Quick date selection")
+                except:
+                    continue
+                    
+            if not date_element:
+                logger.warning(f"❌ Day {preferred_day} not available")
+                return False
+        except:
+            logger.warning("❌ Date picker not found")
+            return False
+    
+    selector_cache.record("date_selection", clicked, tried_first=clicked == patterns[0])
+    return True
+
+
+@traced()
+@instrument_stage("slot_extraction")
+def read_time_slots(driver, switched_date: bool = False) -> Optional[List[Dict]]:
+    """
+    Wait for the time picker of the selected date and extract its slots.
+    
+    Args:
+        driver: Selenium WebDriver instance with a date selected
+        switched_date (bool): True if another date was shown before and its items
+            were tagged with mark_time_picker_stale
+    
+    Returns:
+        List[Dict[str, str]]: List of time slots with their properties, or None if none were found
+    """
+    # Wait until the time picker is populated for the selected date
+    if switched_date:
+        # The page may update the old list in place, so fall back to a plain populated check
+        if not wait_for(driver, time_picker_refreshed, "time_picker_refreshed", timeout=3):
+            wait_for(driver, time_picker_populated, "time_picker_populated", timeout=5)
+    else:
+        wait_for(driver, time_picker_populated, "time_picker_populated", timeout=10)
+    
+    logger.debug("⚡ Extracting time slots...")
+    # Time slot extraction with multiple attempts
+    time_slots = []
+    max_attempts = 5  # Increased attempts
+    
+    for attempt in range(max_attempts):
+        try:
+            # Try to extract time slots
+            slots_found, element_count = extract_time_slots(driver, 'div[aria-label*="Time picker"] li')
+            
+            if element_count:
+                logger.debug(f"✅ Found {element_count} slots on attempt {attempt + 1}")
+                time_slots.extend(slots_found)
+                break
             else:
-                raise Exception("Date not immediately available")
+                # Wait for slots to appear, up to an increasing limit per attempt
+                wait_time = 1 + (attempt * 0.5)
+                wait_for(driver, time_picker_populated, f"time_picker_retry_{attempt + 1}", timeout=wait_time)
+                    
+        except Exception as e:
+            if attempt < max_attempts - 1:
+                wait_time = 1 + (attempt * 0.5)
+                wait_for(driver, time_picker_populated, f"time_picker_retry_{attempt + 1}", timeout=wait_time)
+            else:
+                logger.warning(f"❌ Time slot extraction failed after {max_attempts} attempts: {e}")
                 
+    # Fallback selector if primary failed
+    if not time_slots:
+        try:
+            logger.debug("Trying fallback selectors...")
+            fallback_selectors = [
+                'div[aria-label*="Time picker"] button',
+                'div[aria-label*="Time picker"] div[role="option"]'
+            ]
+            
+            for selector in fallback_selectors:
+                slots_found, element_count = extract_time_slots(driver, selector)
+                if element_count:
+                    record_fallback("slot_extraction", selector)
+                    time_slots.extend(slots_found)
+                    break
         except:
-            # Fallback with proper wait for date picker
-            try:
-                print("Waiting for date picker...")
-                WebDriverWait(driver, 8).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, 'div[aria-label="Date picker."]'))
-                )
-                
-                # Try multiple XPath patterns for date selection
-                date_xpath_patterns = [
-                    f'//div[@aria-label="Date picker."]//div[@role="button" and text()="{preferred_day}"]',
-                    f'//div[contains(@aria-label, "Date picker")]//div[@role="button" and text()="{preferred_day}"]',
-                    f'//div[contains(@aria-label, "Date picker")]//div[text()="{preferred_day}"]'
-                ]
-                
-                for xpath in date_xpath_patterns:
-                    try:
-                        date_elements = driver.find_elements(By.XPATH, xpath)
-                        for element in date_elements:
-                            aria_label = element.get_attribute('aria-label') or ''
-                            if 'Times available' in aria_label or element.is_enabled():
-                                driver.execute_script("arguments[0].click();", element)
-                                print("✅ Fallback date selection")
-                                date_element = element
-                                break
-                        if date_element:
-                            break
-                    except:
-                        continue
-                        
-                if not date_element:
-                    print(f"❌ Day {preferred_day} not available")
-                    return None
-            except:
-                print("❌ Date picker not found")
-                return None
+            pass
+    
+    if time_slots:
+        logger.info(f"🎉 Successfully extracted {len(time_slots)} time slots")
+        return time_slots
+    else:
+        logger.warning("❌ No time slots found")
+        return None
+
+
+@traced()
+def get_squash_court_times(driver, preferred_day: int, timeout: int = 25):
+    """
+    Navigate to the Caversam Park booking page, click on "Squash Court", 
+    select the preferred date, and return all available time slots.
+    
+    Args:
+        driver: Pre-initialized Selenium WebDriver instance
+        preferred_day (int): Day of the month (1-31) for booking
+        timeout (int): Maximum time to wait for elements (seconds)
+    
+    Returns:
+        List[Dict[str, str]]: List of time slots with their properties, an empty list if
+            the day has no times available, or None if failed
+    """
+    try:
+        reset_stage_waits()
+        load_booking_page(driver)
+        
+        if not click_squash_court(driver):
+            return None
+        
+        if day_fully_booked(driver, preferred_day):
+            return []
+        
+        if not select_date(driver, preferred_day):
+            return None
+        
+        time_slots = read_time_slots(driver)
+        logger.info(f"⏱️ Stage waits: {format_stage_waits()}")
+        return time_slots
+        
+    except Exception as e:
+        logger.error(f"❌ Function failed: {e}")
+        return None
+
+
+@traced()
+def list_available_days(driver) -> List[int]:
+    """
+    Read which days the date picker marks with "Times available".
+    
+    Args:
+        driver: Selenium WebDriver instance showing the date picker
+    
+    Returns:
+        List[int]: Days of the month that have bookable times, in calendar order
+    """
+    days = driver.execute_script(
+        """
+        const buttons = document.querySelectorAll('div[aria-label*="Date picker"] div[role="button"]');
+        return Array.from(buttons)
+            .filter(function (el) { return (el.getAttribute('aria-label') || '').indexOf('Times available') !== -1; })
+            .map(function (el) { return (el.textContent || '').trim(); });
+        """
+    ) or []
+    return [int(day) for day in days if str(day).isdigit()]
+
+
+def day_fully_booked(driver, preferred_day: int) -> bool:
+    """
+    Whether the date picker marks other days with "Times available" but not this one.
+    
+    A picker with no marked days at all proves nothing (the label may have changed),
+    so that case is left to select_date and its fallbacks.
+    
+    Args:
+        driver: Selenium WebDriver instance showing the date picker
+        preferred_day (int): Day of the month (1-31)
+    """
+    try:
+        available = list_available_days(driver)
+    except Exception:
+        return False
+    if available and preferred_day not in available:
+        logger.info(f"📅 Day {preferred_day} has no times available")
+        return True
+    return False
+
+
+@traced()
+def get_month_availability(driver, timeout: int = 25) -> Optional[Dict[int, List[Dict]]]:
+    """
+    Load the booking page once and walk every available day in the date picker.
+    
+    Args:
+        driver: Pre-initialized Selenium WebDriver instance
+        timeout (int): Maximum time to wait for elements (seconds)
+    
+    Returns:
+        Dict[int, List[Dict]]: Time slots per day of the month, or None if the page could not be opened
+    """
+    try:
+        reset_stage_waits()
+        load_booking_page(driver)
         
-        # Wait a bit for date selection to process
-        time.sleep(2)
+        if not click_squash_court(driver):
+            return None
         
-        print("⚡ Extracting time slots...")
-        # Time slot extraction with multiple attempts
-        time_slots = []
-        max_attempts = 5  # Increased attempts
+        days = list_available_days(driver)
+        logger.debug(f"📅 Days with times available: {days}")
         
-        for attempt in range(max_attempts):
+        availability = {}
+        for index, day in enumerate(days):
             try:
-                # Wait for time picker if this is first attempt
-                if attempt == 0:
-                    try:
-                        WebDriverWait(driver, 8).until(
-                            EC.presence_of_element_located((By.CSS_SELECTOR, 'div[aria-label*="Time picker"]'))
-                        )
-                        # Additional wait for list items
-                        WebDriverWait(driver, 5).until(
-                            EC.presence_of_element_located((By.CSS_SELECTOR, 'div[aria-label*="Time picker"] li'))
-                        )
-                    except:
-                        pass
-                
-                # Try to extract time slots
-                elements = driver.find_elements(By.CSS_SELECTOR, 'div[aria-label*="Time picker"] li')
-                
-                if elements:
-                    print(f"✅ Found {len(elements)} slots on attempt {attempt + 1}")
-                    for element in elements:
-                        text = element.text.strip()
-                        if text:
-                            time_slots.append({
-                                'text': text,
-                                'tag_name': element.tag_name,
-                                'is_enabled': element.is_enabled(),
-                                'is_displayed': element.is_displayed(),
-                                'attributes': {}
-                            })
-                    break
-                else:
-                    # Wait longer between attempts
-                    wait_time = 1 + (attempt * 0.5)  # Increasing wait time
-                    time.sleep(wait_time)
-                        
+                if index > 0:
+                    mark_time_picker_stale(driver)
+                if not select_date(driver, day):
+                    continue
+                time_slots = read_time_slots(driver, switched_date=index > 0)
+                if time_slots:
+                    availability[day] = time_slots
             except Exception as e:
-                if attempt < max_attempts - 1:
-                    wait_time = 1 + (attempt * 0.5)
-                    time.sleep(wait_time)
-                else:
-                    print(f"❌ Time slot extraction failed after {max_attempts} attempts: {e}")
-                    
-        # Fallback selector if primary failed
-        if not time_slots:
-            try:
-                print("Trying fallback selectors...")
-                fallback_selectors = [
-                    'div[aria-label*="Time picker"] button',
-                    'div[aria-label*="Time picker"] div[role="option"]'
-                ]
-                
-                for selector in fallback_selectors:
-                    elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                    if elements:
-                        for element in elements:
-                            text = element.text.strip()
-                            if text:
-                                time_slots.append({
-                                    'text': text,
-                                    'tag_name': element.tag_name,
-                                    'is_enabled': element.is_enabled(),
-                                    'is_displayed': element.is_displayed(),
-                                    'attributes': {}
-                                })
-                        break
-            except:
-                pass
+                logger.warning(f"⚠️ Failed to read day {day}: {e}")
         
-        if time_slots:
-            print(f"🎉 Successfully extracted {len(time_slots)} time slots")
-            return time_slots
-        else:
-            print("❌ No time slots found")
-            return None
+        logger.info(f"🎉 Month sweep read {len(availability)} of {len(days)} days")
+        return availability
         
     except Exception as e:
-        print(f"❌ Function failed: {e}")
+        logger.error(f"❌ Month sweep failed: {e}")
         return None
 
 
+class BookingPageSession:
+    """
+    A driver together with what the booking page is currently showing.
+    
+    The first get_times() call loads the booking page and clicks Squash Court.
+    Later calls, for another day or to go back after a failed slot click,
+    click within the date picker that is already on screen instead of
+    reloading the page.
+    """
+    
+    def __init__(self, driver):
+        """
+        Args:
+            driver: Pre-initialized Selenium WebDriver instance
+        """
+        self.driver = driver
+        self.on_date_picker = False
+        self.current_day: Optional[int] = None
+        self.page_loads = 0
+        self.in_page_switches = 0
+    
+    @traced()
+    def open(self) -> bool:
+        """
+        Load the booking page and click Squash Court.
+        
+        Returns:
+            bool: True if the date picker is on screen
+        """
+        self.on_date_picker = False
+        self.current_day = None
+        load_booking_page(self.driver)
+        self.page_loads += 1
+        self.on_date_picker = click_squash_court(self.driver)
+        return self.on_date_picker
+    
+    def _date_picker_present(self) -> bool:
+        try:
+            return bool(date_picker_ready(self.driver))
+        except Exception:
+            return False
+    
+    @traced()
+    def get_times(self, preferred_day: int, timeout: int = 25) -> Optional[List[Dict]]:
+        """
+        Show a day in the date picker and return its time slots, reloading
+        the page only when the date picker is not already on screen.
+        
+        Args:
+            preferred_day (int): Day of the month (1-31) for booking
+            timeout (int): Maximum time to wait for elements (seconds)
+        
+        Returns:
+            List[Dict[str, str]]: List of time slots with their properties, an empty list if
+                the day has no times available, or None if failed
+        """
+        try:
+            reset_stage_waits()
+            switched_date = False
+            if self.on_date_picker and self._date_picker_present():
+                logger.debug(f"🔁 Switching to day {preferred_day} without reloading")
+                if self.current_day is not None:
+                    mark_time_picker_stale(self.driver)
+                    switched_date = True
+                self.in_page_switches += 1
+            elif not self.open():
+                return None
+            
+            if day_fully_booked(self.driver, preferred_day):
+                self.current_day = None
+                return []
+            
+            if not select_date(self.driver, preferred_day):
+                self.current_day = None
+                return None
+            self.current_day = preferred_day
+            
+            time_slots = read_time_slots(self.driver, switched_date=switched_date)
+            logger.info(f"⏱️ Stage waits: {format_stage_waits()}")
+            return time_slots
+            
+        except Exception as e:
+            logger.error(f"❌ Session failed to get times for day {preferred_day}: {e}")
+            self.on_date_picker = False
+            self.current_day = None
+            return None
+    
+    @traced()
+    def select_slot(self, time_slots: List[Dict[str, str]], slot_number: int, timeout: int = 30) -> bool:
+        """Click a slot of the current day, see select_and_click_timeslot."""
+        return bool(select_and_click_timeslot(self.driver, time_slots, slot_number, timeout=timeout))
+
+
+@traced()
+@instrument_stage("slot_validation")
 def validate_slot_selection(driver, element) -> bool:
     """
     Validate that a time slot was successfully selected by checking for the selection style.
@@ -558,8 +1005,8 @@ def validate_slot_selection(driver, element) -> bool:
         bool: True if element shows selection styling, False otherwise
     """
     try:
-        # Wait a bit more for selection styles to apply
-        time.sleep(0.5)
+        # Wait for selection styles to apply
+        wait_for(driver, slot_selected(element), "slot_selected", timeout=1.5)
         
         # The selection color is #008273 which in RGB is rgb(0, 130, 115)
         selection_colors = [
@@ -572,20 +1019,20 @@ def validate_slot_selection(driver, element) -> bool:
         
         # Check the clicked element itself
         background_color = element.value_of_css_property('background-color')
-        print(f"Element background color: {background_color}")
+        logger.debug(f"Element background color: {background_color}")
         
         if background_color and any(color.lower() in background_color.lower() for color in selection_colors):
-            print("✅ Time slot selection confirmed by element background color")
+            logger.debug("✅ Time slot selection confirmed by element background color")
             return True
         
         # Check parent elements (sometimes selection style is applied to parent)
         try:
             parent = element.find_element(By.XPATH, "..")
             parent_bg = parent.value_of_css_property('background-color')
-            print(f"Parent element background color: {parent_bg}")
+            logger.debug(f"Parent element background color: {parent_bg}")
             
             if parent_bg and any(color.lower() in parent_bg.lower() for color in selection_colors):
-                print("✅ Time slot selection confirmed by parent background color")
+                logger.debug("✅ Time slot selection confirmed by parent background color")
                 return True
         except:
             pass
@@ -596,7 +1043,7 @@ def validate_slot_selection(driver, element) -> bool:
             for child in children:
                 child_bg = child.value_of_css_property('background-color')
                 if child_bg and any(color.lower() in child_bg.lower() for color in selection_colors):
-                    print(f"✅ Time slot selection confirmed by child element background color: {child_bg}")
+                    logger.debug(f"✅ Time slot selection confirmed by child element background color: {child_bg}")
                     return True
         except:
             pass
@@ -604,19 +1051,19 @@ def validate_slot_selection(driver, element) -> bool:
         # Check for border changes (sometimes selection is indicated by border)
         border_color = element.value_of_css_property('border-color')
         border_style = element.value_of_css_property('border-style')
-        print(f"Element border: {border_style} {border_color}")
+        logger.debug(f"Element border: {border_style} {border_color}")
         
         if border_color and any(color.lower() in border_color.lower() for color in selection_colors):
-            print("✅ Time slot selection confirmed by border color")
+            logger.debug("✅ Time slot selection confirmed by border color")
             return True
         
         # Check for outline changes
         outline_color = element.value_of_css_property('outline-color')
         outline_style = element.value_of_css_property('outline-style')
         if outline_color and outline_style != 'none':
-            print(f"Element outline: {outline_style} {outline_color}")
+            logger.debug(f"Element outline: {outline_style} {outline_color}")
             if any(color.lower() in outline_color.lower() for color in selection_colors):
-                print("✅ Time slot selection confirmed by outline color")
+                logger.debug("✅ Time slot selection confirmed by outline color")
                 return True
         
         # Check for CSS classes indicating selection
@@ -628,16 +1075,16 @@ def validate_slot_selection(driver, element) -> bool:
         except:
             pass
         
-        print(f"Element classes: '{element_class}'")
+        logger.debug(f"Element classes: '{element_class}'")
         if parent_class:
-            print(f"Parent classes: '{parent_class}'")
+            logger.debug(f"Parent classes: '{parent_class}'")
         
         selection_keywords = ['selected', 'active', 'current', 'chosen', 'picked']
         all_classes = f"{element_class} {parent_class}".lower()
         
         for keyword in selection_keywords:
             if keyword in all_classes:
-                print(f"✅ Time slot selection confirmed by CSS class containing '{keyword}'")
+                logger.debug(f"✅ Time slot selection confirmed by CSS class containing '{keyword}'")
                 return True
         
         # Check for aria attributes indicating selection
@@ -646,23 +1093,23 @@ def validate_slot_selection(driver, element) -> bool:
         aria_current = element.get_attribute('aria-current')
         
         if aria_selected and aria_selected.lower() == 'true':
-            print("✅ Time slot selection confirmed by aria-selected='true'")
+            logger.debug("✅ Time slot selection confirmed by aria-selected='true'")
             return True
         if aria_pressed and aria_pressed.lower() == 'true':
-            print("✅ Time slot selection confirmed by aria-pressed='true'")
+            logger.debug("✅ Time slot selection confirmed by aria-pressed='true'")
             return True
         if aria_current:
-            print(f"✅ Time slot selection confirmed by aria-current='{aria_current}'")
+            logger.debug(f"✅ Time slot selection confirmed by aria-current='{aria_current}'")
             return True
         
         # Check if the element now has focus
         active_element = driver.switch_to.active_element
         if active_element == element:
-            print("✅ Time slot selection confirmed by element having focus")
+            logger.debug("✅ Time slot selection confirmed by element having focus")
             return True
         
         # Final check: look for any visual change by comparing before/after screenshots (conceptual)
-        print("⚠️ No clear selection indicator found in standard properties")
+        logger.warning("⚠️ No clear selection indicator found in standard properties")
         
         # Let's also check if there are any data attributes that changed
         data_attrs = {}
@@ -671,18 +1118,18 @@ def validate_slot_selection(driver, element) -> bool:
                 data_attrs[attr_name.name] = element.get_attribute(attr_name.name)
         
         if data_attrs:
-            print(f"Data attributes: {data_attrs}")
+            logger.debug(f"Data attributes: {data_attrs}")
             # Look for common selection indicators in data attributes
             selection_indicators = ['selected', 'active', 'current', 'true', '1']
             for attr_name, attr_value in data_attrs.items():
                 if attr_value and any(indicator in str(attr_value).lower() for indicator in selection_indicators):
-                    print(f"✅ Time slot selection potentially confirmed by {attr_name}='{attr_value}'")
+                    logger.debug(f"✅ Time slot selection potentially confirmed by {attr_name}='{attr_value}'")
                     return True
         
         return False
         
     except Exception as e:
-        print(f"Error validating selection: {e}")
+        logger.error(f"Error validating selection: {e}")
         return False
 
 
@@ -746,6 +1193,8 @@ def validate_time_slot_choice(user_input: str, time_slots: List[Dict[str, str]])
         return None
 
 
+@traced()
+@instrument_stage("slot_click")
 def select_and_click_timeslot(driver, time_slots: List[Dict[str, str]], slot_number: int, timeout: int = 30) -> Optional[bool]:
     """
     Click on the specified time slot.
@@ -762,43 +1211,40 @@ def select_and_click_timeslot(driver, time_slots: List[Dict[str, str]], slot_num
     try:
         # Validate slot number
         if not (1 <= slot_number <= len(time_slots)):
-            print(f"Invalid slot number {slot_number}. Must be between 1 and {len(time_slots)}.")
+            logger.warning(f"Invalid slot number {slot_number}. Must be between 1 and {len(time_slots)}.")
             return False
         
         selected_slot = time_slots[slot_number - 1]
-        print(f"Attempting to click on slot #{slot_number}: {selected_slot.get('text', 'No text')}")
+        logger.debug(f"Attempting to click on slot #{slot_number}: {selected_slot.get('text', 'No text')}")
         
         # Check if the selected slot is available for booking
         if not (selected_slot.get('is_enabled', False) and selected_slot.get('is_displayed', False)):
-            print(f"Selected time slot is not available for booking.")
+            logger.warning(f"Selected time slot is not available for booking.")
             return False
         
         # Find the actual element in the browser and click it
-        print(f"Attempting to click on time slot: {selected_slot.get('text', 'Unknown')}")
+        logger.debug(f"Attempting to click on time slot: {selected_slot.get('text', 'Unknown')}")
         
         # Strategy 1: Find by exact text match
         element_found = False
         try:
             slot_text = selected_slot.get('text', '').strip()
             if slot_text:
-                # XPath to look for exact match: div[aria-label*="Time picker"] > ul > li > label > span[text()=slot_text]
-                xpath_patterns = [
-                    f"//div[contains(@aria-label, 'Time picker')]//ul//li//label//span[text()='{slot_text}']",
-                    f"//div[contains(@aria-label, 'Time picker')]//ul//li[.//label//span[text()='{slot_text}']]",
-                    f"//div[contains(@aria-label, 'Time picker')]//ul//li//label//span[contains(text(), '{slot_text}')]",
-                    f"//div[contains(@aria-label, 'Time picker')]//ul//li[.//span[text()='{slot_text}']]",
-                    f"//div[contains(@aria-label, 'Time picker')]//ul//li[.//label[text()='{slot_text}']]",
-                    f"//div[contains(@aria-label, 'Time picker')]//ul//li[.//*[text()='{slot_text}']]"
-                ]
+                # Last successful pattern first
+                patterns = selector_cache.order("slot_click", list(SLOT_XPATH_PATTERNS))
                 
                 element = None
                 successful_xpath = None
                 
-                for xpath in xpath_patterns:
+                for pattern in patterns:
                     try:
+                        xpath = SLOT_XPATH_PATTERNS[pattern].replace("{slot}", slot_text)
                         element = driver.find_element(By.XPATH, xpath)
                         if element.is_displayed() and element.is_enabled():
                             successful_xpath = xpath
+                            if pattern != "label_span":
+                                record_fallback("slot_click", pattern)
+                            selector_cache.record("slot_click", pattern, tried_first=pattern == patterns[0])
                             break
                     except:
                         continue
@@ -810,33 +1256,32 @@ def select_and_click_timeslot(driver, time_slots: List[Dict[str, str]], slot_num
                         label_element = element.find_element(By.XPATH, "./ancestor::label[1]")
                         driver.execute_script("arguments[0].click();", label_element)
                         element = label_element  # Update element reference for validation
-                        print(f"Found span element, clicked on parent label instead")
+                        logger.debug(f"Found span element, clicked on parent label instead")
                     
-                    print(f"Successfully clicked on time slot: {slot_text} using XPath: {successful_xpath}")
+                    logger.debug(f"Successfully clicked on time slot: {slot_text} using XPath: {successful_xpath}")
                     
                     # Validate selection by checking background color
-                    time.sleep(1)  # Wait for style to apply
                     if validate_slot_selection(driver, element):
                         element_found = True
                     else:
-                        print("Click registered but slot selection not confirmed")
+                        logger.debug("Click registered but slot selection not confirmed")
                         element_found = True  # Still consider it successful
                 else:
-                    print("Element not found or not clickable")
+                    logger.debug("Element not found or not clickable")
         except Exception as e:
-            print(f"Strategy 1 (text match) failed: {e}")
+            logger.warning(f"Strategy 1 (text match) failed: {e}")
         
         if element_found:
-            # Wait a moment to see if any changes occur
-            time.sleep(2)
-            print("Time slot selection completed!")
+            # Wait for the booking form to appear after the slot click
+            wait_for(driver, booking_form_visible, "booking_form_visible", timeout=2)
+            logger.info("Time slot selection completed!")
             return True
         else:
-            print("Failed to click on the selected time slot.")
+            logger.warning("Failed to click on the selected time slot.")
             return False
             
     except Exception as e:
-        print(f"Error in select_and_click_timeslot: {e}")
+        logger.error(f"Error in select_and_click_timeslot: {e}")
         return False
 
 
@@ -0,0 +1,138 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from procstats import drivers_rss, format_bytes
+
+
+logger = logging.getLogger(__name__)
+
+
+class _RegisteredSession:
+    def __init__(self, session, on_expire: Callable[[], Awaitable[None]], idle_timeout: float):
+        self.session = session
+        self.on_expire = on_expire
+        self.idle_timeout = idle_timeout
+        self.deadline = time.monotonic() + idle_timeout
+
+    def touch(self) -> None:
+        self.deadline = time.monotonic() + self.idle_timeout
+
+
+class SessionRegistry:
+    """
+    Tracks browser sessions parked in FSM state while a chat picks a slot.
+
+    Every registered session has an idle deadline that is pushed back on
+    activity. A background reaper calls the session's on_expire callback
+    once the deadline passes, so abandoned chats cannot keep Chromium
+    processes alive forever.
+    """
+
+    def __init__(self, idle_timeout: Optional[float] = None, check_interval: Optional[float] = None):
+        """
+        Args:
+            idle_timeout: Seconds of inactivity before a session is reaped,
+                defaults to SESSION_IDLE_TIMEOUT_SECONDS or 300
+            check_interval: Seconds between reaper passes, defaults to 15
+        """
+        self.idle_timeout = idle_timeout or float(os.getenv("SESSION_IDLE_TIMEOUT_SECONDS", 300))
+        self.check_interval = check_interval or min(15.0, self.idle_timeout)
+
+        self._sessions: Dict[Any, _RegisteredSession] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.reaped = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def register(self, key, session, on_expire: Callable[[], Awaitable[None]]) -> None:
+        """
+        Track a session, or push back its deadline if it is already tracked.
+
+        Args:
+            key: Owner of the session, e.g. (chat_id, user_id)
+            session: BookingPageSession parked in FSM state
+            on_expire: Coroutine function called when the session idles out
+        """
+        entry = self._sessions.get(key)
+        if entry is not None and entry.session is session:
+            entry.on_expire = on_expire
+            entry.touch()
+        else:
+            self._sessions[key] = _RegisteredSession(session, on_expire, self.idle_timeout)
+
+    def touch(self, key) -> None:
+        """Record activity for a key's session."""
+        entry = self._sessions.get(key)
+        if entry is not None:
+            entry.touch()
+
+    def unregister(self, session) -> None:
+        """Stop tracking a session that was released normally."""
+        for key, entry in list(self._sessions.items()):
+            if entry.session is session:
+                del self._sessions[key]
+
+    def sessions(self) -> list:
+        """Every session currently tracked."""
+        return [entry.session for entry in self._sessions.values()]
+
+    def start(self) -> None:
+        """Start the reaper on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Cancel the reaper."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval)
+            await self.reap()
+
+    async def reap(self) -> int:
+        """
+        Expire every session whose idle deadline has passed.
+
+        Returns:
+            int: Number of sessions reaped
+        """
+        now = time.monotonic()
+        expired = [(key, entry) for key, entry in self._sessions.items() if entry.deadline <= now]
+        for key, entry in expired:
+            if self._sessions.get(key) is entry:
+                del self._sessions[key]
+            try:
+                await entry.on_expire()
+            except Exception as e:
+                logger.warning(f"⚠️ Failed to expire session {key}: {e}")
+        self.reaped += len(expired)
+
+        if expired or self._sessions:
+            # Scanning /proc is blocking, so it runs off the event loop
+            rss = await asyncio.to_thread(drivers_rss, self._drivers())
+            logger.info(f"🧹 Sessions: {len(self._sessions)} live, {len(expired)} reaped, "
+                        f"{format_bytes(rss)} held by parked browsers")
+        return len(expired)
+
+    def _drivers(self) -> list:
+        return [entry.session.driver for entry in self._sessions.values()
+                if getattr(entry.session, 'driver', None) is not None]
+
+    def stats(self) -> Dict[str, int]:
+        """Live parked browsers and the memory they hold. Blocking: scans /proc."""
+        return {
+            'live_sessions': len(self._sessions),
+            'browser_rss_bytes': drivers_rss(self._drivers()),
+            'reaped': self.reaped,
+        }
@@ -0,0 +1,79 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+
+from metrics import single_flight_calls
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one in-flight call.
+
+    The first caller for a key starts the call; callers arriving while it is
+    in flight wait for and share its result or exception instead of
+    starting their own. The call runs as a task of its own, so a caller
+    that gives up or is cancelled, the first one included, does not cancel
+    it for the others. Nothing is kept once the call finishes, so this
+    complements the availability cache rather than replacing it.
+
+    Only calls whose outcome is the same for every caller belong here: a
+    per-user step such as waiting for admission would hand one user's
+    queue position and errors to everyone sharing the call.
+    """
+
+    def __init__(self, name: str):
+        """
+        Args:
+            name: Label of the coalesced call on /metrics, e.g. "availability"
+        """
+        self.name = name
+        self._calls: Dict[Any, asyncio.Task] = {}
+        # Callers that shared an in-flight call, and calls actually made
+        self.hits = 0
+        self.misses = 0
+
+    def in_flight(self, key) -> bool:
+        return key in self._calls
+
+    async def do(self, key, call: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run call for key, or wait for the call already running for it.
+
+        Args:
+            key: What is being looked up, e.g. a booking date
+            call: Coroutine function making the call
+
+        Returns:
+            The call's result; its exception is raised to every waiting caller
+        """
+        task = self._calls.get(key)
+        if task is not None:
+            self.hits += 1
+            single_flight_calls.inc(name=self.name, result="shared")
+        else:
+            self.misses += 1
+            single_flight_calls.inc(name=self.name, result="executed")
+            task = asyncio.ensure_future(call())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        # A caller giving up must not cancel the call for everyone else
+        return await asyncio.shield(task)
+
+    def _finished(self, key, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Retrieved here so a call every caller gave up on does not log "never retrieved"
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'in_flight': len(self._calls),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
@@ -0,0 +1,223 @@
+import asyncio
+import logging
+import os
+import re
+import time
+from datetime import date, time as dtime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+
+# Named time windows accepted by /find
+NAMED_WINDOWS = {
+    'morning': (dtime(6, 0), dtime(12, 0)),
+    'afternoon': (dtime(12, 0), dtime(17, 0)),
+    'evening': (dtime(17, 0), dtime(23, 59)),
+}
+
+_TIME_PATTERN = re.compile(r"^\s*(\d{1,2})(?::(\d{2}))?\s*([ap]\.?m\.?)?\s*$", re.IGNORECASE)
+
+
+def parse_slot_time(text: str) -> Optional[dtime]:
+    """
+    Parse a slot label such as "18:00", "6:00 pm" or "6 PM".
+
+    Returns:
+        time: Start time of the slot, or None if the text is not a time
+    """
+    # Labels like "6:00 pm - 6:45 pm" start with the slot's start time
+    match = _TIME_PATTERN.match(re.split(r"\s+[-–]\s+", text or "")[0])
+    if not match:
+        return None
+    hour, minute = int(match.group(1)), int(match.group(2) or 0)
+    meridiem = (match.group(3) or "").lower().replace(".", "")
+    if meridiem == "pm" and hour < 12:
+        hour += 12
+    elif meridiem == "am" and hour == 12:
+        hour = 0
+    if hour > 23 or minute > 59:
+        return None
+    return dtime(hour, minute)
+
+
+def parse_time_window(text: str) -> Tuple[dtime, dtime]:
+    """
+    Parse "evening" or "18:00-21:00" into an inclusive (start, end) window.
+
+    Raises:
+        ValueError: If the text is neither a named window nor a valid range
+    """
+    named = NAMED_WINDOWS.get(text.strip().lower())
+    if named:
+        return named
+    parts = text.split("-")
+    if len(parts) != 2:
+        raise ValueError(f"Invalid time window: {text}")
+    start, end = parse_slot_time(parts[0]), parse_slot_time(parts[1])
+    if start is None or end is None or end < start:
+        raise ValueError(f"Invalid time window: {text}")
+    return start, end
+
+
+def matching_slots(time_slots: Optional[List[Dict]],
+                   window: Optional[Tuple[dtime, dtime]] = None) -> List[Tuple[dtime, Dict]]:
+    """
+    Available slots whose start time falls within a window.
+
+    Args:
+        time_slots: Slot dicts as returned by the scrapers
+        window: Optional inclusive (start, end) time of day
+
+    Returns:
+        List of (start time, slot) pairs, earliest first
+    """
+    matches = []
+    for slot in time_slots or []:
+        if not (slot.get('is_enabled', False) and slot.get('is_displayed', False)):
+            continue
+        slot_time = parse_slot_time(slot.get('text', ''))
+        if slot_time is None:
+            continue
+        if window and not (window[0] <= slot_time <= window[1]):
+            continue
+        matches.append((slot_time, slot))
+    matches.sort(key=lambda match: match[0])
+    return matches
+
+
+class SlotSearch:
+    """Outcome of one /find search."""
+
+    def __init__(self, start: date, end: date):
+        self.start = start
+        self.end = end
+        # (date, time, slot) of every matching slot, earliest first
+        self.matches: List[Tuple[date, dtime, Dict]] = []
+        self.checked_days = 0
+        self.cached_days = 0
+        # Days still being looked up at the deadline, and days whose lookup failed
+        self.missed_days: List[date] = []
+        self.failed_days: List[date] = []
+        self.elapsed = 0.0
+
+    @property
+    def partial(self) -> bool:
+        """Whether some days were not actually checked."""
+        return bool(self.missed_days or self.failed_days)
+
+
+class SlotFinder:
+    """
+    Earliest-free-slot search over a range of days.
+
+    Days already in the availability cache are answered from memory. The
+    rest are looked up concurrently, a bounded number at a time, and the
+    search returns whatever has arrived when the deadline passes. Lookups
+    that are still running keep going in the background and fill the cache
+    for the next search.
+    """
+
+    def __init__(self, lookup: Callable[[date], Awaitable[Optional[List[Dict]]]], cache,
+                 concurrency: int, deadline: Optional[float] = None):
+        """
+        Args:
+            lookup: Coroutine function scraping one date's time slots, returning an empty
+                list for a day without times and None (or raising) if the scrape failed
+            cache: AvailabilityCache consulted first and filled with lookup results
+            concurrency: Lookups allowed to run at once, e.g. the number of browser sessions
+            deadline: Seconds before the search answers with what it has,
+                defaults to FIND_DEADLINE_SECONDS or 20
+        """
+        self.lookup = lookup
+        self.cache = cache
+        self.concurrency = max(1, concurrency)
+        self.deadline = deadline or float(os.getenv("FIND_DEADLINE_SECONDS", 20))
+        self._background = set()
+
+    async def find(self, start: date, end: date,
+                   window: Optional[Tuple[dtime, dtime]] = None) -> SlotSearch:
+        """
+        Search every day from start to end (inclusive) for available slots.
+
+        Args:
+            start: First day to search
+            end: Last day to search
+            window: Optional (start, end) time of day a slot must start within
+
+        Returns:
+            SlotSearch: Matching slots ordered by date and time
+        """
+        search = SlotSearch(start, end)
+        started = time.monotonic()
+        days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+
+        found: Dict[date, List[Dict]] = {}
+        to_scrape = []
+        for day in days:
+            cached = self.cache.get(day)
+            if cached:
+                found[day] = cached[0]
+                search.cached_days += 1
+            else:
+                to_scrape.append(day)
+
+        if to_scrape:
+            semaphore = asyncio.Semaphore(self.concurrency)
+            expired = False
+
+            async def scrape(day: date):
+                async with semaphore:
+                    # Days still queued at the deadline are not worth a browser session
+                    if expired:
+                        return None
+                    slots = await self.lookup(day)
+                    self.cache.put(day, slots)
+                    return slots
+
+            tasks = {asyncio.ensure_future(scrape(day)): day for day in to_scrape}
+            done, pending = await asyncio.wait(tasks, timeout=self.deadline)
+            expired = True
+
+            for task in done:
+                day = tasks[task]
+                try:
+                    slots = task.result()
+                except Exception as e:
+                    logger.warning(f"⚠️ Lookup for {day} failed: {e}")
+                    slots = None
+                if slots is None:
+                    search.failed_days.append(day)
+                else:
+                    found[day] = slots
+            for task in pending:
+                search.missed_days.append(tasks[task])
+                self._background.add(task)
+                task.add_done_callback(self._forget)
+
+        for day, slots in found.items():
+            search.matches.extend((day, slot_time, slot) for slot_time, slot in matching_slots(slots, window))
+        search.matches.sort(key=lambda match: (match[0], match[1]))
+
+        search.checked_days = len(found)
+        search.missed_days.sort()
+        search.failed_days.sort()
+        search.elapsed = time.monotonic() - started
+        logger.info(f"🔎 Searched {start} to {end}: {len(search.matches)} matches from "
+                    f"{search.checked_days} days ({search.cached_days} cached), "
+                    f"{len(search.missed_days)} missed, {len(search.failed_days)} failed, "
+                    f"in {search.elapsed:.1f}s")
+        return search
+
+    def _forget(self, task: asyncio.Task) -> None:
+        self._background.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"⚠️ Background lookup failed: {task.exception()}")
+
+    async def stop(self) -> None:
+        """Cancel lookups left running by searches that hit their deadline."""
+        for task in list(self._background):
+            task.cancel()
+        await asyncio.gather(*self._background, return_exceptions=True)
+        self._background.clear()
@@ -0,0 +1,184 @@
+import logging
+import os
+import threading
+import time
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+from service import (
+    BookingPageSession,
+    list_available_days,
+    fill_booking_form,
+    submit_booking_form,
+    default_user_data
+)
+from slot_finder import parse_slot_time
+from tracing import span
+
+
+logger = logging.getLogger(__name__)
+
+
+def find_slot(time_slots: Optional[List[Dict]], slot_text: str) -> Optional[int]:
+    """
+    Find the 1-based number of an available slot by its text or start time.
+
+    "18:00" matches a slot shown as "6:00 pm", so users can type either form.
+    """
+    wanted = parse_slot_time(slot_text)
+    for i, slot in enumerate(time_slots or [], 1):
+        if not (slot.get('is_enabled', False) and slot.get('is_displayed', False)):
+            continue
+        text = slot.get('text', '').strip()
+        if text == slot_text or (wanted is not None and parse_slot_time(text) == wanted):
+            return i
+    return None
+
+
+class SnipeJob:
+    """
+    Books a slot the moment it is released.
+
+    Shortly before the release time the job checks out a driver, loads the
+    booking page and leaves the date picker on screen, so the cold Chromium
+    start and page load are paid in advance. At the release time it clicks
+    the day in the date picker (reloading only if the slot is not there yet),
+    clicks the slot, fills the form and submits, recording a timestamp for
+    every step.
+    """
+
+    def __init__(self, driver_pool, booking_date: date, slot_text: str, release_at: datetime,
+                 user_data: Optional[Dict[str, str]] = None, retry_window: Optional[float] = None):
+        """
+        Args:
+            driver_pool: DriverPool the pre-warmed driver is checked out from
+            booking_date: Date to book, fixed when the job is armed
+            slot_text: Slot to book, e.g. "18:00" or "6:00 pm"
+            release_at: Local time the slot is released
+            user_data: Form details, defaults to default_user_data
+            retry_window: Seconds after release to keep looking for the slot,
+                defaults to SNIPER_RETRY_SECONDS or 20
+        """
+        self.driver_pool = driver_pool
+        self.booking_date = booking_date
+        # The date picker is clicked by day of the month
+        self.preferred_day = booking_date.day
+        self.slot_text = slot_text
+        self.release_at = release_at
+        self.user_data = user_data or default_user_data
+        self.retry_window = retry_window or float(os.getenv("SNIPER_RETRY_SECONDS", 20))
+
+        # Wall-clock time of each step, in the order the steps happened
+        self.timestamps: Dict[str, float] = {}
+        self.outcome = "pending"
+
+    def _mark(self, step: str) -> None:
+        self.timestamps[step] = time.time()
+
+    @staticmethod
+    def _sleep_until(deadline: float, cancel: threading.Event) -> bool:
+        """
+        Sleep until a wall-clock time, spinning for the last few milliseconds.
+
+        Returns:
+            bool: False if the job was cancelled while waiting
+        """
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0.02:
+                break
+            if cancel.wait(min(remaining - 0.02, 1.0)):
+                return False
+        while time.time() < deadline:
+            pass
+        return not cancel.is_set()
+
+    def run(self, cancel: threading.Event) -> bool:
+        """
+        Warm up, wait for the release time and book. Blocking; run it on a thread.
+
+        Args:
+            cancel: Event that aborts the job while it is waiting
+
+        Returns:
+            bool: True if the booking form was submitted
+        """
+        self._mark("warmup_start")
+        driver = self.driver_pool.acquire(timeout=30)
+        reusable = True
+        try:
+            with span("sniper.run", day=self.preferred_day, slot=self.slot_text):
+                return self._run(driver, cancel)
+        except Exception:
+            reusable = False
+            self.outcome = "error"
+            raise
+        finally:
+            self.driver_pool.release(driver, reusable)
+            logger.info(f"🎯 Snipe for day {self.preferred_day} {self.slot_text}: {self.outcome}; "
+                        f"{self.format_timeline()}")
+
+    def _run(self, driver, cancel: threading.Event) -> bool:
+        session = BookingPageSession(driver)
+        if session.open():
+            # The day is left unselected: clicking it at release time is what loads its fresh times
+            self._mark("page_ready")
+            if self.preferred_day in list_available_days(driver):
+                logger.debug(f"Day {self.preferred_day} already has times before the release")
+        else:
+            logger.warning("⚠️ Sniper could not open the booking page during warm-up, will reload at release")
+
+        if not self._sleep_until(self.release_at.timestamp(), cancel):
+            self.outcome = "cancelled"
+            return False
+        self._mark("release")
+
+        # Refresh in-page first; reload the page only if the slot has not appeared yet
+        deadline = time.monotonic() + self.retry_window
+        slot_number = None
+        time_slots = None
+        attempt = 0
+        while slot_number is None and time.monotonic() < deadline and not cancel.is_set():
+            attempt += 1
+            if attempt > 1 or not session.on_date_picker:
+                session.open()
+            time_slots = session.get_times(self.preferred_day)
+            slot_number = find_slot(time_slots, self.slot_text)
+            if slot_number is None:
+                cancel.wait(0.5)
+        self._mark("refreshed")
+
+        if slot_number is None:
+            self.outcome = "slot_not_found"
+            return False
+        if not session.select_slot(time_slots, slot_number):
+            self.outcome = "slot_click_failed"
+            return False
+        self._mark("slot_clicked")
+
+        if not fill_booking_form(driver, self.user_data):
+            self.outcome = "form_fill_failed"
+            return False
+        self._mark("form_filled")
+
+        submitted = submit_booking_form(driver, settle_seconds=0)
+        self._mark("submit_clicked")
+        self.outcome = "submitted" if submitted else "submit_failed"
+        # Give the page time to send the booking before the driver is reset
+        time.sleep(3)
+        return submitted
+
+    def step_offsets(self) -> Dict[str, int]:
+        """Milliseconds of every step relative to the release time."""
+        release = self.release_at.timestamp()
+        return {step: round((stamp - release) * 1000) for step, stamp in self.timestamps.items()}
+
+    def click_to_submit_ms(self) -> Optional[int]:
+        """Milliseconds from the release time to the Book button click."""
+        if "release" in self.timestamps and "submit_clicked" in self.timestamps:
+            return round((self.timestamps["submit_clicked"] - self.timestamps["release"]) * 1000)
+        return None
+
+    def format_timeline(self) -> str:
+        """e.g. "warmup_start=-180012ms, release=+0ms, refreshed=+412ms, ..."."""
+        return ", ".join(f"{step}={offset:+d}ms" for step, offset in self.step_offsets().items())
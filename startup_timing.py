@@ -0,0 +1,51 @@
+import logging
+import time
+from typing import Dict, Optional
+
+from procstats import process_age
+
+
+logger = logging.getLogger(__name__)
+
+
+# Cold start milestones, in the order they normally happen
+PHASES = (
+    "imports",                  # main.py and the web server imported
+    "health_ready",             # health endpoint accepting connections
+    "bot_imported",             # aiogram and the bot module imported
+    "dispatcher_ready",         # polling started or webhook registered
+    "browser_stack_loaded",     # selenium and the service module imported
+    "first_update_received",
+    "first_update_processed",
+)
+
+# Monotonic time the process started, so marks include interpreter start-up
+_origin = time.monotonic() - process_age()
+_marks: Dict[str, float] = {}
+
+
+def mark(phase: str) -> None:
+    """Record the first time a startup phase is reached, in seconds since process start."""
+    if phase in _marks:
+        return
+    _marks[phase] = time.monotonic() - _origin
+    logger.debug(f"Startup phase {phase} reached at {_marks[phase]:.2f}s")
+    if phase == "first_update_processed":
+        logger.info(f"🚀 Startup timeline: {report()}")
+
+
+def elapsed(phase: str) -> Optional[float]:
+    """Seconds from process start to a phase, or None if it was not reached yet."""
+    return _marks.get(phase)
+
+
+def report() -> str:
+    """e.g. "health_ready=0.71s, bot_imported=3.02s, ...", in the order phases were reached."""
+    return ", ".join(f"{phase}={seconds:.2f}s" for phase, seconds in sorted(_marks.items(), key=lambda m: m[1]))
+
+
+def register_gauges(registry) -> None:
+    """Expose every phase on /metrics as startup_<phase>_seconds once it is reached."""
+    for phase in PHASES:
+        registry.gauge(f"startup_{phase}_seconds", f"Seconds from process start to {phase.replace('_', ' ')}",
+                       lambda phase=phase: _marks.get(phase))
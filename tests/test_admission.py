@@ -0,0 +1,165 @@
+import asyncio
+
+import pytest
+
+from admission import AdmissionRejected, AdmissionWithdrawn, BookingScheduler, DriverReserve
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_chats_take_turns_in_the_queue():
+    async def scenario():
+        scheduler = BookingScheduler(max_active=1, max_queue=10)
+        first = await scheduler.acquire("holder", chat_id=0)
+
+        admitted = []
+
+        async def book(user_id, chat_id):
+            ticket = await scheduler.acquire(user_id, chat_id)
+            admitted.append(user_id)
+            return ticket
+
+        # A busy group chat queues three bookings before a second chat queues one
+        tasks = [asyncio.ensure_future(book(user, chat)) for user, chat in
+                 [("a1", 1), ("a2", 1), ("a3", 1), ("b1", 2)]]
+        await settle()
+        assert [t.user_id for t in scheduler.queue_order()] == ["a1", "b1", "a2", "a3"]
+
+        ticket = first
+        for _ in range(4):
+            scheduler.release(ticket)
+            await settle()
+            ticket = scheduler._active[admitted[-1]]
+        await asyncio.gather(*tasks)
+        return admitted
+
+    assert asyncio.run(scenario()) == ["a1", "b1", "a2", "a3"]
+
+
+def test_one_booking_per_user():
+    async def scenario():
+        scheduler = BookingScheduler(max_active=2, max_queue=10)
+        await scheduler.acquire("alice", chat_id=1)
+        with pytest.raises(AdmissionRejected):
+            await scheduler.acquire("alice", chat_id=1)
+        return scheduler.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats['active'] == 1 and stats['rejected'] == 1
+
+
+def test_full_queue_rejects_straight_away():
+    async def scenario():
+        scheduler = BookingScheduler(max_active=1, max_queue=1)
+        await scheduler.acquire("holder", chat_id=0)
+        waiting = asyncio.ensure_future(scheduler.acquire("queued", chat_id=1))
+        await settle()
+        with pytest.raises(AdmissionRejected):
+            await scheduler.acquire("late", chat_id=2)
+        waiting.cancel()
+        await settle()
+        return scheduler.queued
+
+    assert asyncio.run(scenario()) == 0
+
+
+def test_release_admits_the_next_booking_and_reports_positions():
+    async def scenario():
+        scheduler = BookingScheduler(max_active=1, max_queue=10)
+        holder = await scheduler.acquire("holder", chat_id=0)
+        positions = []
+
+        async def on_wait(position, eta):
+            positions.append(position)
+
+        waiting = asyncio.ensure_future(scheduler.acquire("next", chat_id=1, on_wait=on_wait))
+        await settle()
+        assert not waiting.done()
+
+        scheduler.release(holder)
+        ticket = await asyncio.wait_for(waiting, 1)
+        return positions, ticket, scheduler
+
+    positions, ticket, scheduler = asyncio.run(scenario())
+    assert positions == [1]
+    assert ticket.admitted_at is not None
+    assert scheduler.active == 1 and scheduler.queued == 0
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        scheduler = BookingScheduler(max_active=1, max_queue=10)
+        holder = await scheduler.acquire("holder", chat_id=0)
+        gone = asyncio.ensure_future(scheduler.acquire("gone", chat_id=1))
+        stays = asyncio.ensure_future(scheduler.acquire("stays", chat_id=2))
+        await settle()
+
+        gone.cancel()
+        await settle()
+        scheduler.release(holder)
+        ticket = await asyncio.wait_for(stays, 1)
+        return ticket.user_id, scheduler.queued
+
+    assert asyncio.run(scenario()) == ("stays", 0)
+
+
+def test_withdrawn_booking_leaves_the_queue_and_is_not_admitted():
+    async def scenario():
+        scheduler = BookingScheduler(max_active=1, max_queue=10)
+        holder = await scheduler.acquire("holder", chat_id=0)
+        withdrawn = asyncio.ensure_future(scheduler.acquire("cancelled", chat_id=1))
+        stays = asyncio.ensure_future(scheduler.acquire("stays", chat_id=2))
+        await settle()
+
+        assert scheduler.withdraw("cancelled")
+        assert not scheduler.withdraw("cancelled")
+        with pytest.raises(AdmissionWithdrawn):
+            await asyncio.wait_for(withdrawn, 1)
+
+        scheduler.release(holder)
+        ticket = await asyncio.wait_for(stays, 1)
+        # An admitted booking is its owner's to release
+        assert not scheduler.withdraw("stays")
+        return ticket.user_id, scheduler.queued
+
+    assert asyncio.run(scenario()) == ("stays", 0)
+
+
+def test_reserve_serves_interactive_lookups_before_background_work():
+    async def scenario():
+        reserve = DriverReserve(2)
+        order = []
+
+        async def lookup(name, background):
+            async with reserve.hold(background):
+                order.append(name)
+                await asyncio.sleep(0.01)
+
+        # A sweep holds one slot; background work never takes the other one
+        async with reserve.hold(background=True):
+            poll = asyncio.ensure_future(lookup("watch poll", True))
+            await settle()
+            assert order == []
+            await asyncio.wait_for(lookup("/book", False), 1)
+        await asyncio.wait_for(poll, 1)
+        return order, reserve.stats()
+
+    order, stats = asyncio.run(scenario())
+    assert order == ["/book", "watch poll"]
+    assert stats['held'] == 0 and stats['background_held'] == 0
+
+
+def test_reserve_times_out_when_every_slot_is_held():
+    async def scenario():
+        reserve = DriverReserve(1)
+        async with reserve.hold():
+            with pytest.raises(asyncio.TimeoutError):
+                await reserve.acquire(timeout=0.05)
+        # The timed-out lookup no longer holds back background work
+        await asyncio.wait_for(reserve.acquire(background=True), 1)
+        return reserve.stats()
+
+    assert asyncio.run(scenario())['interactive_waiting'] == 0
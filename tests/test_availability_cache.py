@@ -0,0 +1,100 @@
+import asyncio
+
+import availability_cache
+from availability_cache import AvailabilityCache
+
+SLOTS = [{'text': "6:00 pm", 'is_enabled': True, 'is_displayed': True}]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def make_cache(monkeypatch, fetch=None, **kwargs):
+    clock = Clock()
+    monkeypatch.setattr(availability_cache.time, "monotonic", clock.monotonic)
+
+    async def no_fetch(key):
+        raise AssertionError("unexpected revalidation")
+
+    return AvailabilityCache(fetch or no_fetch, ttl=60, max_stale=300, **kwargs), clock
+
+
+def test_fresh_entry_is_a_hit(monkeypatch):
+    cache, clock = make_cache(monkeypatch)
+    cache.put("day", SLOTS)
+    clock.now += 30
+    assert cache.get("day") == (SLOTS, 30)
+    assert cache.stats()['hits'] == 1
+
+
+def test_stale_entry_is_served_while_revalidating(monkeypatch):
+    fetched = []
+
+    async def fetch(key):
+        fetched.append(key)
+        return [{'text': "7:00 pm"}]
+
+    async def scenario():
+        cache, clock = make_cache(monkeypatch, fetch)
+        cache.put("day", SLOTS)
+        clock.now += 120
+        # Served immediately, and only one refresh runs however often it is read
+        assert cache.get("day") == (SLOTS, 120)
+        assert cache.get("day") == (SLOTS, 120)
+        assert cache.stats()['revalidating'] == 1
+        await asyncio.gather(*cache._tasks)
+        return cache
+
+    cache = asyncio.run(scenario())
+    assert fetched == ["day"]
+    assert cache.get("day") == ([{'text': "7:00 pm"}], 0)
+    assert cache.stats()['stale_hits'] == 2
+
+
+def test_failed_revalidation_keeps_the_stale_entry(monkeypatch):
+    async def fetch(key):
+        raise RuntimeError("scrape failed")
+
+    async def scenario():
+        cache, clock = make_cache(monkeypatch, fetch)
+        cache.put("day", SLOTS)
+        clock.now += 120
+        cache.get("day")
+        await asyncio.gather(*cache._tasks)
+        assert cache.stats()['revalidating'] == 0
+        return cache.get("day")
+
+    assert asyncio.run(scenario()) == (SLOTS, 120)
+
+
+def test_entry_past_max_stale_is_a_miss(monkeypatch):
+    cache, clock = make_cache(monkeypatch)
+    cache.put("day", SLOTS)
+    clock.now += 301
+    assert cache.get("day") is None
+    assert len(cache) == 0
+    assert cache.stats()['misses'] == 1
+
+
+def test_least_recently_used_date_is_evicted(monkeypatch):
+    cache, clock = make_cache(monkeypatch, max_entries=2)
+    cache.put("a", SLOTS)
+    cache.put("b", SLOTS)
+    cache.get("a")
+    cache.put("c", SLOTS)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+
+def test_empty_results_and_invalidated_dates_are_not_served(monkeypatch):
+    cache, clock = make_cache(monkeypatch)
+    cache.put("empty", [])
+    cache.put("booked", SLOTS)
+    cache.invalidate("booked")
+    assert cache.get("empty") is None
+    assert cache.get("booked") is None
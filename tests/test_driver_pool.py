@@ -0,0 +1,191 @@
+import threading
+import time
+
+import pytest
+
+from browser_profile import ProfileStore
+from driver_pool import DriverPool, DriverPoolExhausted
+
+
+class FakeDriver:
+    """Stands in for webdriver.Chrome; tracks how many are running."""
+
+    live = 0
+    lock = threading.Lock()
+
+    def __init__(self):
+        self.alive = True
+        self.quit_called = False
+        with FakeDriver.lock:
+            FakeDriver.live += 1
+
+    def execute_script(self, script):
+        if not self.alive:
+            raise RuntimeError("browser has gone away")
+        return 1
+
+    def delete_all_cookies(self):
+        pass
+
+    def get(self, url):
+        pass
+
+    def quit(self):
+        with FakeDriver.lock:
+            if not self.quit_called:
+                FakeDriver.live -= 1
+            self.quit_called = True
+
+
+@pytest.fixture(autouse=True)
+def reset_live():
+    FakeDriver.live = 0
+
+
+def make_pool(**kwargs):
+    kwargs.setdefault('min_idle', 0)
+    kwargs.setdefault('max_size', 2)
+    return DriverPool(factory=lambda profile: FakeDriver(), profiles=ProfileStore(enabled=False), **kwargs)
+
+
+def test_never_exceeds_max_size_under_concurrency():
+    pool = make_pool(max_size=3)
+    peak = 0
+    errors = []
+
+    def book():
+        nonlocal peak
+        try:
+            driver = pool.acquire(timeout=5)
+        except DriverPoolExhausted as e:
+            errors.append(e)
+            return
+        with FakeDriver.lock:
+            peak = max(peak, FakeDriver.live)
+        time.sleep(0.01)
+        pool.release(driver)
+
+    threads = [threading.Thread(target=book) for _ in range(24)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert peak <= 3
+    assert pool.size <= 3
+    stats = pool.stats()
+    assert stats['in_use'] == 0 and stats['checking'] == 0 and stats['launching'] == 0
+
+
+def test_acquire_times_out_when_every_driver_is_busy():
+    pool = make_pool(max_size=1)
+    pool.acquire()
+    with pytest.raises(DriverPoolExhausted):
+        pool.acquire(timeout=0.05)
+
+
+def test_driver_being_reset_still_counts_towards_max_size():
+    pool = make_pool(max_size=1)
+    driver = pool.acquire()
+    resetting = threading.Event()
+    proceed = threading.Event()
+
+    def slow_reset(driver):
+        resetting.set()
+        proceed.wait(5)
+        return True
+
+    pool._reset = slow_reset
+    releaser = threading.Thread(target=pool.release, args=(driver,))
+    releaser.start()
+    assert resetting.wait(5)
+    assert pool.stats()['checking'] == 1
+    assert pool.size == 1
+    # No second browser is launched while the first one is out of both lists
+    with pytest.raises(DriverPoolExhausted):
+        pool.acquire(timeout=0.05)
+    assert FakeDriver.live == 1
+
+    proceed.set()
+    releaser.join()
+    assert pool.acquire(timeout=1) is driver
+    assert pool.stats()['warm_checkouts'] == 1
+
+
+def test_dead_idle_driver_is_replaced_on_checkout():
+    pool = make_pool()
+    driver = pool.acquire()
+    pool.release(driver)
+    driver.alive = False
+
+    replacement = pool.acquire()
+    assert replacement is not driver
+    stats = pool.stats()
+    assert stats['recycled'] == 1
+    assert stats['cold_starts'] == 2
+    assert stats['checking'] == 0
+    assert FakeDriver.live == 1
+
+
+def test_driver_is_recycled_after_max_uses():
+    pool = make_pool(max_uses=2)
+    first = pool.acquire()
+    pool.release(first)
+    assert pool.acquire() is first
+    pool.release(first)
+    assert pool.acquire() is not first
+    assert pool.stats()['recycled'] == 1
+
+
+def test_close_quits_idle_and_checked_out_drivers():
+    pool = make_pool()
+    idle = pool.acquire()
+    busy = pool.acquire()
+    pool.release(idle)
+
+    pool.close()
+    assert FakeDriver.live == 0
+    # A driver released after close is quit rather than kept
+    pool.release(busy)
+    assert FakeDriver.live == 0
+    with pytest.raises(DriverPoolExhausted):
+        pool.acquire()
+
+
+def test_probe_idle_checks_in_place_without_a_checkout():
+    pool = make_pool()
+    assert pool.probe_idle() is None
+
+    driver = pool.acquire()
+    pool.release(driver)
+    assert pool.probe_idle() is True
+    stats = pool.stats()
+    assert stats['idle'] == 1 and stats['warm_checkouts'] == 0 and stats['cold_starts'] == 1
+
+    driver.alive = False
+    assert pool.probe_idle() is False
+    assert pool.stats()['recycled'] == 1
+    assert FakeDriver.live == 0
+
+
+def test_launch_failures_are_counted_until_a_launch_works():
+    attempts = []
+
+    def factory(profile):
+        attempts.append(profile)
+        if len(attempts) <= 2:
+            raise RuntimeError("chromedriver crashed")
+        return FakeDriver()
+
+    pool = DriverPool(min_idle=0, max_size=1, factory=factory, profiles=ProfileStore(enabled=False))
+    for _ in range(2):
+        with pytest.raises(DriverPoolExhausted):
+            pool.acquire()
+    assert pool.consecutive_launch_failures == 2
+    assert pool.last_launch_error == "chromedriver crashed"
+    assert pool.size == 0
+
+    pool.acquire()
+    assert pool.consecutive_launch_failures == 0
+    assert pool.stats()['launch_failures'] == 2
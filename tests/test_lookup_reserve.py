@@ -0,0 +1,75 @@
+import asyncio
+import threading
+import types
+from datetime import date
+
+import pytest
+
+import browser_stack
+
+SLOTS = [{'text': "6:00 pm", 'is_enabled': True, 'is_displayed': True}]
+
+
+class FakeDriver:
+    def execute_script(self, script):
+        return 1
+
+    def delete_all_cookies(self):
+        pass
+
+    def get(self, url):
+        pass
+
+    def quit(self):
+        pass
+
+
+@pytest.fixture
+def telegram_bot(monkeypatch):
+    monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "123456:ABCDEF")
+    monkeypatch.setenv("SELECTOR_CACHE_PATH", "off")
+    monkeypatch.setenv("BROWSER_PROFILES", "off")
+    monkeypatch.setenv("BOOKING_ENGINE", "selenium")
+    monkeypatch.delenv("BOOKING_DRIVER_RESERVE", raising=False)
+    import bot
+
+    telegram_bot = bot.TelegramBot()
+    telegram_bot.driver_pool.factory = lambda profile: FakeDriver()
+    yield telegram_bot
+    telegram_bot.workers.shutdown(wait=True)
+    telegram_bot.driver_pool.close()
+
+
+def test_book_lookup_runs_while_the_month_sweep_holds_a_driver(telegram_bot, monkeypatch):
+    sweeping = threading.Event()
+    sweep_done = threading.Event()
+
+    def get_month_availability(driver, timeout=25):
+        sweeping.set()
+        sweep_done.wait(10)
+        return {}
+
+    def get_squash_court_times(driver, preferred_day, timeout=25):
+        return SLOTS
+
+    service = types.SimpleNamespace(get_month_availability=get_month_availability,
+                                    get_squash_court_times=get_squash_court_times)
+
+    async def ready():
+        return service
+
+    monkeypatch.setattr(browser_stack, "ready", ready)
+
+    async def scenario():
+        sweep = asyncio.ensure_future(telegram_bot.prefetcher.sweep())
+        try:
+            assert await asyncio.to_thread(sweeping.wait, 5)
+            # The /book lookup gets the other reserved driver instead of waiting out the sweep
+            slots = await asyncio.wait_for(telegram_bot._scrape_day(date.today()), 5)
+            assert not sweep.done()
+        finally:
+            sweep_done.set()
+        await asyncio.wait_for(sweep, 5)
+        return slots
+
+    assert asyncio.run(scenario()) == SLOTS
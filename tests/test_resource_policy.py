@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+import resource_policy
+
+FONT = "https://static2.sharepointonline.com/files/fabric/assets/fonts/segoeui.woff2"
+SCRIPT = "https://outlook.office365.com/owa/bookings.js"
+
+
+def event(method, **params):
+    return {'message': json.dumps({'message': {'method': method, 'params': params}})}
+
+
+def loaded(request_id, url, size):
+    return [event("Network.requestWillBeSent", requestId=request_id, request={'url': url}),
+            event("Network.loadingFinished", requestId=request_id, encodedDataLength=size)]
+
+
+def blocked(request_id, url):
+    return [event("Network.requestWillBeSent", requestId=request_id, request={'url': url}),
+            event("Network.loadingFailed", requestId=request_id, blockedReason="inspector",
+                  errorText="net::ERR_BLOCKED_BY_CLIENT")]
+
+
+class FakeDriver:
+    def __init__(self, entries):
+        self.entries = entries
+
+    def get_log(self, kind):
+        return self.entries
+
+
+@pytest.fixture(autouse=True)
+def sizes_file(tmp_path, monkeypatch):
+    path = tmp_path / "resource-sizes.json"
+    monkeypatch.setenv("RESOURCE_SIZES_PATH", str(path))
+    monkeypatch.setattr(resource_policy, "_observed_sizes", None)
+    return path
+
+
+def test_blocked_requests_never_audited_are_of_unknown_size(monkeypatch):
+    monkeypatch.setenv("RESOURCE_BLOCKING", "on")
+    report = resource_policy.page_load_report(FakeDriver(loaded("1", SCRIPT, 50000) + blocked("2", FONT)))
+    assert report['blocked_requests'] == 1
+    assert report['unsized_blocked'] == 1
+    assert report['bytes_saved'] == 0
+
+
+def test_sizes_measured_in_audit_mode_estimate_savings_after_a_restart(monkeypatch, sizes_file):
+    monkeypatch.setenv("RESOURCE_BLOCKING", "audit")
+    report = resource_policy.page_load_report(FakeDriver(loaded("1", SCRIPT, 50000) + loaded("2", FONT, 40000)))
+    assert report['bytes_saved'] == 40000
+    assert json.loads(sizes_file.read_text())['sizes'] == {FONT: 40000}
+
+    # A new process reads the sizes back from disk
+    monkeypatch.setattr(resource_policy, "_observed_sizes", None)
+    monkeypatch.setenv("RESOURCE_BLOCKING", "on")
+    report = resource_policy.page_load_report(FakeDriver(blocked("3", FONT + "?v=2")))
+    assert report['bytes_saved'] == 40000
+    assert report['unsized_blocked'] == 0
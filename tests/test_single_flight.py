@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    calls = []
+
+    async def scenario():
+        flight = SingleFlight("test")
+        release = asyncio.Event()
+
+        async def fetch():
+            calls.append(1)
+            await release.wait()
+            return ["6:00 pm"]
+
+        callers = [asyncio.ensure_future(flight.do("day", fetch)) for _ in range(3)]
+        await asyncio.sleep(0)
+        assert flight.in_flight("day")
+        release.set()
+        results = await asyncio.gather(*callers)
+        return results, flight
+
+    results, flight = asyncio.run(scenario())
+    assert calls == [1]
+    assert results == [["6:00 pm"]] * 3
+    assert flight.stats() == {'in_flight': 0, 'hits': 2, 'misses': 1}
+
+
+def test_error_reaches_every_caller_and_is_not_kept():
+    async def scenario():
+        flight = SingleFlight("test")
+        release = asyncio.Event()
+
+        async def fail():
+            await release.wait()
+            raise RuntimeError("page did not load")
+
+        callers = [asyncio.ensure_future(flight.do("day", fail)) for _ in range(2)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*callers, return_exceptions=True)
+
+        # The failure is not cached: the next caller makes a call of its own
+        async def succeed():
+            return []
+        return results, await flight.do("day", succeed)
+
+    results, retried = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert retried == []
+
+
+def test_cancelled_leader_does_not_cancel_the_call_for_others():
+    async def scenario():
+        flight = SingleFlight("test")
+        release = asyncio.Event()
+
+        async def fetch():
+            await release.wait()
+            return ["7:00 pm"]
+
+        leader = asyncio.ensure_future(flight.do("day", fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("day", fetch))
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(scenario()) == ["7:00 pm"]
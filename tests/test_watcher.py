@@ -0,0 +1,81 @@
+import asyncio
+from datetime import date, time as dtime
+
+from availability_cache import AvailabilityCache
+from watcher import AvailabilityWatcher
+
+
+def slots(*texts):
+    return [{'text': text, 'is_enabled': True, 'is_displayed': True} for text in texts]
+
+
+class Harness:
+    """A watcher whose lookups return the queued results, one per poll."""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.notified = []
+
+        async def lookup(day):
+            result = self.results.pop(0)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        async def notify(chat_id, day, texts):
+            self.notified.append((chat_id, texts))
+
+        async def no_fetch(key):
+            return None
+
+        # ttl=0 so every poll goes to the lookup rather than the cache
+        self.watcher = AvailabilityWatcher(lookup, AvailabilityCache(no_fetch, ttl=0, max_stale=0),
+                                           notify, min_interval=60)
+        self.day = date.today()
+
+    def poll_all(self):
+        async def scenario():
+            for _ in range(len(self.results)):
+                for watched in self.watcher._dates.values():
+                    watched.next_poll = 0
+                await self.watcher.poll_due()
+        asyncio.run(scenario())
+
+
+def test_first_poll_only_records_a_snapshot():
+    harness = Harness(slots("6:00 pm"))
+    subscription = harness.watcher.subscribe(1, harness.day)
+    harness.poll_all()
+    assert harness.notified == []
+    assert harness.watcher.current_matches(subscription) == ["6:00 pm"]
+
+
+def test_newly_available_slots_in_the_window_are_announced():
+    harness = Harness(slots("6:00 pm"), slots("6:00 pm", "7:00 pm", "9:00 am"))
+    harness.watcher.subscribe(1, harness.day, window=(dtime(17, 0), dtime(23, 0)))
+    harness.watcher.subscribe(2, harness.day)
+    harness.poll_all()
+    assert harness.notified == [(1, ["7:00 pm"]), (2, ["9:00 am", "7:00 pm"])]
+
+
+def test_slot_freed_on_a_fully_booked_day_is_announced():
+    harness = Harness([], slots("8:00 pm"))
+    subscription = harness.watcher.subscribe(1, harness.day)
+    harness.poll_all()
+    assert harness.notified == [(1, ["8:00 pm"])]
+    assert harness.watcher.current_matches(subscription) == ["8:00 pm"]
+
+
+def test_failed_poll_keeps_the_last_snapshot():
+    harness = Harness(slots("6:00 pm"), None, RuntimeError("scrape failed"), slots("6:00 pm", "7:00 pm"))
+    harness.watcher.subscribe(1, harness.day)
+    harness.poll_all()
+    # Only the slot that really freed up is announced, not everything after the failures
+    assert harness.notified == [(1, ["7:00 pm"])]
+
+
+def test_slot_taken_again_is_not_announced():
+    harness = Harness(slots("6:00 pm", "7:00 pm"), slots("6:00 pm"))
+    harness.watcher.subscribe(1, harness.day)
+    harness.poll_all()
+    assert harness.notified == []
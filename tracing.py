@@ -0,0 +1,143 @@
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import random
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Optional
+
+
+logger = logging.getLogger("tracing")
+
+# Booking/session id shared by every span and log line of one booking flow
+_trace_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("trace_id", default=None)
+_sampled: contextvars.ContextVar[bool] = contextvars.ContextVar("trace_sampled", default=False)
+_span_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("span_id", default=None)
+
+
+def sample_rate() -> float:
+    """Fraction of traces whose spans are logged, from TRACE_SAMPLE_RATE (default 1.0)."""
+    try:
+        return min(1.0, max(0.0, float(os.getenv("TRACE_SAMPLE_RATE", 1.0))))
+    except ValueError:
+        return 1.0
+
+
+def new_trace_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def current_trace_id() -> Optional[str]:
+    """Trace id of the booking flow running in this context, if any."""
+    return _trace_id.get()
+
+
+def start_trace(trace_id: Optional[str] = None) -> str:
+    """
+    Make trace_id the current booking/session id and decide whether it is sampled.
+
+    Context variables are copied into asyncio tasks and into the browser worker
+    threads, so everything running on behalf of the booking shares the id.
+
+    Returns:
+        str: The trace id now in effect
+    """
+    trace_id = trace_id or new_trace_id()
+    _trace_id.set(trace_id)
+    # Sample deterministically per trace so a booking is either fully logged or not at all
+    _sampled.set(random.Random(trace_id).random() < sample_rate())
+    _span_id.set(None)
+    return trace_id
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Time a unit of work and log it as a JSON span record when the trace is sampled.
+
+    Args:
+        name: Span name, e.g. "service.get_squash_court_times"
+        **attributes: Extra fields added to the span record
+    """
+    parent_id = _span_id.get()
+    span_id = uuid.uuid4().hex[:8]
+    token = _span_id.set(span_id)
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        yield
+    except BaseException as e:
+        status = f"error: {type(e).__name__}"
+        raise
+    finally:
+        _span_id.reset(token)
+        if _sampled.get() and logger.isEnabledFor(logging.INFO):
+            logger.info(name, extra={
+                'span': {
+                    'span_id': span_id,
+                    'parent_id': parent_id,
+                    'duration_ms': round((time.perf_counter() - start) * 1000, 1),
+                    'status': status,
+                    **attributes,
+                }
+            })
+
+
+def traced(name: Optional[str] = None):
+    """Decorator wrapping a sync or async function in a span."""
+    def decorator(func):
+        span_name = name or f"{func.__module__}.{func.__qualname__}"
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, carrying the trace id and span fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        trace_id = _trace_id.get()
+        if trace_id:
+            entry['trace_id'] = trace_id
+        span_fields = getattr(record, 'span', None)
+        if span_fields:
+            entry['event'] = 'span'
+            entry.update(span_fields)
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure_logging() -> None:
+    """
+    Set up root logging from LOG_LEVEL (default INFO) and LOG_FORMAT ("json" or "text").
+    """
+    level = getattr(logging, os.getenv("LOG_LEVEL", "INFO").upper(), logging.INFO)
+    handler = logging.StreamHandler(sys.stdout)
+    if os.getenv("LOG_FORMAT", "json").lower() == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    logging.basicConfig(level=level, handlers=[handler], force=True)
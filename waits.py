@@ -0,0 +1,159 @@
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+
+logger = logging.getLogger(__name__)
+
+
+# Waits recorded on each browser worker thread, so concurrent bookings
+# do not clear or mix each other's stages
+_local = threading.local()
+
+
+def stage_waits() -> Dict[str, Tuple[float, bool]]:
+    """
+    Waits recorded on the calling thread since its last reset_stage_waits().
+
+    Returns:
+        Dict[str, Tuple[float, bool]]: Seconds the most recent wait for each stage
+            took, and whether it hit its timeout
+    """
+    if not hasattr(_local, 'waits'):
+        _local.waits = {}
+    return _local.waits
+
+
+def wait_for(driver, condition: Callable, stage: str, timeout: float, poll_frequency: float = 0.1):
+    """
+    Wait until a condition is truthy, returning as soon as the DOM is ready.
+
+    Unlike a fixed time.sleep, this only pays the full timeout when the page
+    really is slow. The time actually spent is recorded in stage_waits()
+    for the calling thread.
+
+    Args:
+        driver: Selenium WebDriver instance
+        condition: Callable taking the driver and returning a truthy value when ready
+        stage (str): Name used when reporting the wait, e.g. "time_picker_populated"
+        timeout (float): Maximum seconds to wait
+        poll_frequency (float): Seconds between condition checks
+
+    Returns:
+        The condition's truthy result, or None if it timed out
+    """
+    start = time.monotonic()
+    try:
+        result = WebDriverWait(
+            driver, timeout,
+            poll_frequency=poll_frequency,
+            ignored_exceptions=(WebDriverException,)
+        ).until(condition)
+    except TimeoutException:
+        result = None
+    waited = time.monotonic() - start
+
+    stage_waits()[stage] = (waited, result is None)
+    status = "ready" if result is not None else "timed out"
+    logger.debug(f"⏱️ {stage}: {status} after {waited * 1000:.0f}ms")
+    return result
+
+
+def reset_stage_waits() -> None:
+    """Forget the calling thread's recorded waits, e.g. at the start of a new booking."""
+    stage_waits().clear()
+
+
+def format_stage_waits(stages: Optional[List[str]] = None) -> str:
+    """One-line summary of recorded waits, e.g. "date_picker_ready=120ms, ..."."""
+    waits = stage_waits()
+    names = stages if stages is not None else list(waits)
+    return ", ".join(
+        f"{name}={waits[name][0] * 1000:.0f}ms" + (" (timeout)" if waits[name][1] else "")
+        for name in names if name in waits
+    )
+
+
+# Conditions are evaluated with execute_script rather than find_elements so
+# they are not slowed down by the driver's implicit wait when nothing matches.
+
+def date_picker_ready(driver) -> bool:
+    """The date picker has rendered at least one day button."""
+    return driver.execute_script(
+        "return document.querySelectorAll('div[aria-label*=\"Date picker\"] div[role=\"button\"]').length > 0;"
+    )
+
+
+def time_picker_populated(driver) -> bool:
+    """The time picker lists at least one slot with text."""
+    return driver.execute_script(
+        """
+        const items = document.querySelectorAll('div[aria-label*="Time picker"] li');
+        return Array.from(items).some(function (li) { return (li.innerText || '').trim().length > 0; });
+        """
+    )
+
+
+def mark_time_picker_stale(driver) -> None:
+    """
+    Tag the current time picker items so a later wait can tell when the
+    list has been re-rendered for a newly selected date.
+    """
+    driver.execute_script(
+        """
+        document.querySelectorAll('div[aria-label*="Time picker"] li').forEach(function (li) {
+            li.setAttribute('data-stale-slot', '1');
+        });
+        """
+    )
+
+
+def time_picker_refreshed(driver) -> bool:
+    """The time picker lists slots and none of them are left over from the previous date."""
+    return driver.execute_script(
+        """
+        const items = Array.from(document.querySelectorAll('div[aria-label*="Time picker"] li'));
+        return items.some(function (li) { return (li.innerText || '').trim().length > 0; })
+            && !items.some(function (li) { return li.hasAttribute('data-stale-slot'); });
+        """
+    )
+
+
+def booking_form_visible(driver) -> bool:
+    """The "Add your details" form has appeared after a slot click."""
+    return driver.execute_script(
+        """
+        return Array.from(document.querySelectorAll('span')).some(function (span) {
+            return (span.textContent || '').indexOf('Add your details') !== -1;
+        });
+        """
+    )
+
+
+def slot_selected(element) -> Callable:
+    """
+    Build a condition that is true once the clicked slot shows a selected state:
+    the #008273 selection colour, a checked input, or a selected/pressed aria flag.
+    """
+    def condition(driver) -> bool:
+        return driver.execute_script(
+            """
+            const el = arguments[0];
+            const nodes = [el, el.parentElement].concat(Array.from(el.querySelectorAll('*')));
+            return nodes.some(function (node) {
+                if (!node) { return false; }
+                const bg = window.getComputedStyle(node).backgroundColor.replace(/\\s/g, '');
+                if (bg === 'rgb(0,130,115)' || bg === 'rgba(0,130,115,1)') { return true; }
+                if (node.checked === true) { return true; }
+                return node.getAttribute('aria-selected') === 'true'
+                    || node.getAttribute('aria-pressed') === 'true'
+                    || node.getAttribute('aria-checked') === 'true';
+            });
+            """,
+            element
+        )
+    return condition
@@ -0,0 +1,221 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import date, time as dtime
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from slot_finder import matching_slots
+
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """A chat waiting for a slot on one date, optionally within a time window."""
+
+    def __init__(self, chat_id: int, day: date, window: Optional[Tuple[dtime, dtime]] = None):
+        self.chat_id = chat_id
+        self.day = day
+        self.window = window
+
+    def matches(self, slot_time: dtime) -> bool:
+        return self.window is None or self.window[0] <= slot_time <= self.window[1]
+
+
+class _WatchedDate:
+    def __init__(self, day: date):
+        self.day = day
+        self.subscribers: List[Subscription] = []
+        # Slot text -> start time of the available slots seen on the last poll
+        self.snapshot: Optional[Dict[str, dtime]] = None
+        self.next_poll = 0.0
+
+
+class AvailabilityWatcher:
+    """
+    Polls watched dates and notifies subscribers when slots free up.
+
+    Polling is per date, not per subscriber: one lookup per date and interval
+    serves every chat watching it, and a fresh enough availability cache
+    entry replaces the lookup altogether. Each poll is diffed against the
+    previous snapshot and subscribers hear only about newly available slots
+    in their window. Dates close at hand are polled more often than dates
+    further out.
+    """
+
+    def __init__(self, lookup: Callable[[date], Awaitable[Optional[List[Dict]]]], cache,
+                 notify: Callable[[int, date, List[str]], Awaitable[None]],
+                 min_interval: Optional[float] = None, max_interval: Optional[float] = None,
+                 tick: float = 5.0):
+        """
+        Args:
+            lookup: Coroutine function scraping one date's time slots, returning an empty
+                list for a fully booked day and None (or raising) if the scrape failed
+            cache: AvailabilityCache reused when fresh and filled with lookup results
+            notify: Coroutine function called with (chat_id, date, freed slot texts)
+            min_interval: Seconds between polls of today's date,
+                defaults to WATCH_MIN_INTERVAL_SECONDS or 60
+            max_interval: Upper bound on the interval for distant dates,
+                defaults to WATCH_MAX_INTERVAL_SECONDS or 900
+            tick: Seconds between checks for due dates
+        """
+        self.lookup = lookup
+        self.cache = cache
+        self.notify = notify
+        self.min_interval = min_interval or float(os.getenv("WATCH_MIN_INTERVAL_SECONDS", 60))
+        self.max_interval = max_interval or float(os.getenv("WATCH_MAX_INTERVAL_SECONDS", 900))
+        self.tick = tick
+
+        self._dates: Dict[date, _WatchedDate] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.polls = 0
+        self.cache_polls = 0
+        self.notifications = 0
+
+    def poll_interval(self, day: date) -> float:
+        """Seconds between polls of a date: the minimum for today, growing by that much per day ahead."""
+        days_ahead = max(0, (day - date.today()).days)
+        return min(self.max_interval, self.min_interval * (1 + days_ahead))
+
+    def subscribe(self, chat_id: int, day: date, window: Optional[Tuple[dtime, dtime]] = None) -> Subscription:
+        """
+        Watch a date for a chat, replacing the chat's previous subscription for it.
+
+        Returns:
+            Subscription: The new subscription
+        """
+        self.unsubscribe(chat_id, day)
+        watched = self._dates.get(day)
+        if watched is None:
+            watched = self._dates[day] = _WatchedDate(day)
+        subscription = Subscription(chat_id, day, window)
+        watched.subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, chat_id: int, day: Optional[date] = None) -> int:
+        """
+        Stop watching one date, or every date when day is None, for a chat.
+
+        Returns:
+            int: Number of subscriptions removed
+        """
+        removed = 0
+        for watched_day, watched in list(self._dates.items()):
+            if day is not None and watched_day != day:
+                continue
+            before = len(watched.subscribers)
+            watched.subscribers = [s for s in watched.subscribers if s.chat_id != chat_id]
+            removed += before - len(watched.subscribers)
+            if not watched.subscribers:
+                del self._dates[watched_day]
+        return removed
+
+    def subscriptions(self, chat_id: int) -> List[Subscription]:
+        """A chat's subscriptions, by date."""
+        return sorted(
+            (s for watched in self._dates.values() for s in watched.subscribers if s.chat_id == chat_id),
+            key=lambda s: s.day
+        )
+
+    def current_matches(self, subscription: Subscription) -> Optional[List[str]]:
+        """Slots of the last poll matching a subscription, or None if the date was not polled yet."""
+        watched = self._dates.get(subscription.day)
+        if watched is None or watched.snapshot is None:
+            return None
+        return [text for text, slot_time in watched.snapshot.items() if subscription.matches(slot_time)]
+
+    def start(self) -> None:
+        """Start polling on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Cancel polling."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.poll_due()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ Availability watch failed: {e}")
+            await asyncio.sleep(self.tick)
+
+    async def poll_due(self) -> int:
+        """
+        Poll every watched date whose interval has elapsed.
+
+        Returns:
+            int: Number of dates polled
+        """
+        today = date.today()
+        for day in [day for day in self._dates if day < today]:
+            del self._dates[day]
+
+        now = time.monotonic()
+        due = [watched for watched in self._dates.values() if watched.next_poll <= now]
+        if due:
+            await asyncio.gather(*(self._poll(watched) for watched in due))
+        return len(due)
+
+    async def _poll(self, watched: _WatchedDate) -> None:
+        interval = self.poll_interval(watched.day)
+        watched.next_poll = time.monotonic() + interval
+
+        # Reuse a lookup made for /book, /find or the prefetcher within this interval
+        cached = self.cache.get(watched.day)
+        if cached and cached[1] < interval:
+            time_slots = cached[0]
+            self.cache_polls += 1
+        else:
+            try:
+                time_slots = await self.lookup(watched.day)
+            except Exception as e:
+                logger.warning(f"⚠️ Watch lookup for {watched.day} failed: {e}")
+                return
+            self.cache.put(watched.day, time_slots)
+            self.polls += 1
+
+        # A failed scrape keeps the last snapshot, so the next successful one does not
+        # announce every slot as freed; a fully booked day is an empty snapshot
+        if time_slots is None:
+            logger.warning(f"⚠️ Watch lookup for {watched.day} failed, keeping the last snapshot")
+            return
+
+        available = {slot.get('text', '').strip(): slot_time for slot_time, slot in matching_slots(time_slots)}
+        previous, watched.snapshot = watched.snapshot, available
+        if previous is None:
+            return
+
+        freed = {text: slot_time for text, slot_time in available.items() if text not in previous}
+        if not freed:
+            return
+        logger.info(f"🔔 {len(freed)} slots freed up on {watched.day}: {', '.join(freed)}")
+
+        for subscription in list(watched.subscribers):
+            texts = [text for text, slot_time in freed.items() if subscription.matches(slot_time)]
+            if not texts:
+                continue
+            try:
+                await self.notify(subscription.chat_id, watched.day, texts)
+                self.notifications += 1
+            except Exception as e:
+                logger.warning(f"⚠️ Failed to notify chat {subscription.chat_id}: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'watched_dates': len(self._dates),
+            'subscriptions': sum(len(watched.subscribers) for watched in self._dates.values()),
+            'polls': self.polls,
+            'cache_polls': self.cache_polls,
+            'notifications': self.notifications,
+        }
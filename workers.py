@@ -0,0 +1,105 @@
+import asyncio
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+
+class WorkerQueueFull(Exception):
+    """Raised when the browser worker queue has no room for another job."""
+
+
+class BrowserWorkerPool:
+    """
+    Runs blocking Selenium calls from service.py on a dedicated thread pool.
+
+    Selenium's WebDriver API is synchronous, so calling it from an aiogram
+    handler freezes the event loop for every chat. Jobs submitted through
+    run() execute on worker threads and are handed back as awaitables.
+    The number of queued + running jobs is bounded so a burst of users
+    gets a fast rejection instead of an ever-growing backlog.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_queue: Optional[int] = None):
+        """
+        Args:
+            max_workers: Number of worker threads, defaults to BROWSER_WORKERS or 2
+            max_queue: Maximum jobs waiting for a free worker, defaults to BROWSER_QUEUE_SIZE or 10
+        """
+        self.max_workers = max_workers or int(os.getenv("BROWSER_WORKERS", 2))
+        self.max_queue = max_queue if max_queue is not None else int(os.getenv("BROWSER_QUEUE_SIZE", 10))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="browser-worker")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of jobs submitted but not yet finished (queued + running)."""
+        return self._pending
+
+    @property
+    def queued(self) -> int:
+        """Number of jobs waiting for a free worker thread."""
+        return self._pending - self._running
+
+    @property
+    def running(self) -> int:
+        """Number of jobs currently executing on a worker thread."""
+        return self._running
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run a blocking function on a worker thread and await its result.
+
+        Args:
+            func: Blocking callable, e.g. get_squash_court_times
+            *args, **kwargs: Arguments passed to func
+
+        Returns:
+            Whatever func returns; exceptions raised by func propagate to the caller
+
+        Raises:
+            WorkerQueueFull: If the queue bound has been reached
+        """
+        return await self._submit(func, args, kwargs, bounded=True)
+
+    async def run_cleanup(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Like run(), but never rejected by the queue bound.
+
+        Used for teardown work such as driver.quit() so a full queue
+        can never leak a browser process.
+        """
+        return await self._submit(func, args, kwargs, bounded=False)
+
+    async def _submit(self, func: Callable[..., Any], args: tuple, kwargs: dict, bounded: bool) -> Any:
+        with self._lock:
+            if bounded and self._pending >= self.max_workers + self.max_queue:
+                raise WorkerQueueFull(
+                    f"Browser queue is full ({self._pending} jobs pending)"
+                )
+            self._pending += 1
+
+        loop = asyncio.get_running_loop()
+        try:
+            # Carry the caller's context (trace id, current span) onto the worker thread
+            context = contextvars.copy_context()
+            return await loop.run_in_executor(self._executor, context.run, self._call, func, args, kwargs)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _call(self, func: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+        with self._lock:
+            self._running += 1
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting jobs and optionally wait for running ones to finish."""
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)